@@ -55,6 +55,8 @@ def stage_actions(state: CoachState) -> List[cl.Action]:
         actions.append(cl.Action(name="submit_code", value="submit_code", label="提交代码", payload={}))
         if state_service.has_code(state):
             actions.append(cl.Action(name="run_tests", value="run_tests", label="运行测试", payload={}))
+            if state_service.can_stress(state):
+                actions.append(cl.Action(name="counterexample", value="counterexample", label="给我一个反例", payload={}))
         actions.append(cl.Action(name="need_hint", value="need_hint", label=f"提示(L{int(state.hint_policy.level)})", payload={}))
         return actions
 
@@ -63,6 +65,8 @@ def stage_actions(state: CoachState) -> List[cl.Action]:
         if not state_service.has_code(state):
             actions.append(cl.Action(name="submit_code", value="submit_code", label="提交代码", payload={}))
         actions.append(cl.Action(name="run_tests", value="run_tests", label="运行测试", payload={}))
+        if state_service.has_code(state) and state_service.can_stress(state):
+            actions.append(cl.Action(name="counterexample", value="counterexample", label="给我一个反例", payload={}))
         return actions
 
     # 5) 复盘阶段：通过/未通过给不同按钮
@@ -73,6 +77,8 @@ def stage_actions(state: CoachState) -> List[cl.Action]:
         else:
             actions.append(cl.Action(name="submit_code", value="submit_code", label="提交修复代码", payload={}))
             actions.append(cl.Action(name="run_tests", value="run_tests", label="再跑测试", payload={}))
+            if state_service.can_stress(state):
+                actions.append(cl.Action(name="counterexample", value="counterexample", label="给我一个反例", payload={}))
             actions.append(cl.Action(name="need_hint", value="need_hint", label=f"提示(L{int(state.hint_policy.level)})", payload={}))
         return actions
 
@@ -290,6 +296,7 @@ async def on_reset_problem(action: cl.Action):
 @cl.action_callback("submit_thoughts")
 @cl.action_callback("submit_code")
 @cl.action_callback("run_tests")
+@cl.action_callback("counterexample")
 @cl.action_callback("need_hint")
 @cl.action_callback("continue")
 @cl.action_callback("variant")
@@ -1,13 +1,10 @@
 from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import InMemorySaver
-import os
 from langchain.agents import create_agent
-chatLLM = ChatOpenAI(
-    api_key=os.getenv("DASHSCOPE_API_KEY"),
-    base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-    model="qwen-plus",  # 此处以qwen-plus为例，您可按需更换模型名称。模型列表：https://help.aliyun.com/zh/model-studio/getting-started/models
-    # other params...
-)
+from coach.llm_clients import get_chat_model
+
+# 共享的客户端，复用 keep-alive 连接
+chatLLM = get_chat_model("qwen-plus")  # 此处以qwen-plus为例，您可按需更换模型名称。模型列表：https://help.aliyun.com/zh/model-studio/getting-started/models
 
 
 def build_agent(llm: ChatOpenAI):
@@ -18,9 +15,18 @@ def build_agent(llm: ChatOpenAI):
     return agent
 
 
+_agent = None
+
+
+def get_agent():
+    """首次调用时构建agent，之后复用"""
+    global _agent
+    if _agent is None:
+        _agent = build_agent(chatLLM)
+    return _agent
 
 
 def chat_node(input_data: str) -> str:
-    agent = build_agent(chatLLM)
+    agent = get_agent()
     response = agent.invoke({"input": input_data})
     print(response['output'])
\ No newline at end of file
@@ -0,0 +1,10 @@
+# coach/compare.py
+"""
+输出比较
+逐token比较期望输出与实际输出，忽略空白差异，可设浮点绝对/相对误差；
+实现与 agent_api 共用 services/agent_api/services/comparator.py
+"""
+
+from services.agent_api.services.comparator import CompareResult, compare_outputs
+
+__all__ = ["CompareResult", "compare_outputs"]
@@ -14,6 +14,8 @@ class ProblemExtractionSubGraph(SubGraph):
     
     def __init__(self):
         super().__init__("problem_extraction")
+        # 响应缓存为进程内共享，同一题目重复提取不再调用LLM
+        self.llm_service = LLMService()
     
     def build(self) -> StateGraph:
         """
@@ -89,20 +91,18 @@ class ProblemExtractionSubGraph(SubGraph):
         """
         使用LLM提取题目字段
         """
+        # 换题后上一题的参考解不再适用
+        state.problem.reference_solution = ""
         try:
             problem_text = state.problem.raw_text
             
-            # 检查环境变量
-            api_key = os.getenv("DASHSCOPE_API_KEY")
-            
             # 构建system prompt和user input
             system_prompt = SYSTEM_PROMPT
             
             user_input = PROBLEM_EXTRACTION_PROMPT.format(problem_text=problem_text)
             
             # 调用LLM - 使用LLM服务类，带重试和缓存机制
-            llm_service = LLMService()
-            agent_output = llm_service.invoke_with_retry(system_prompt, user_input)
+            agent_output = self.llm_service.invoke_with_retry(system_prompt, user_input)
             
             # 解析结果
             try:
@@ -1,3 +1,4 @@
+import asyncio
 from coach.schemas import CoachState, Problem
 import chainlit as cl
 from typing import List, Dict, Any
@@ -74,6 +75,8 @@ class PhaseHandler:
                 return await self._handle_submit_code()
             elif action_name == "run_tests":
                 return await self._handle_run_tests()
+            elif action_name == "counterexample":
+                return await self._handle_counterexample()
             elif action_name == "need_hint":
                 return await self._handle_need_hint()
             else:
@@ -93,6 +96,8 @@ class PhaseHandler:
                 return await self._handle_submit_code()
             elif action_name == "run_tests":
                 return await self._handle_run_tests()
+            elif action_name == "counterexample":
+                return await self._handle_counterexample()
             else:
                 self.state.ui_message = f"未知的操作：{action_name}"
                 return self.state
@@ -114,6 +119,8 @@ class PhaseHandler:
                 return await self._handle_submit_code()
             elif action_name == "run_tests":
                 return await self._handle_run_tests()
+            elif action_name == "counterexample":
+                return await self._handle_counterexample()
             elif action_name == "need_hint":
                 return await self._handle_need_hint()
             else:
@@ -160,6 +167,7 @@ class PhaseHandler:
             
             # 保存原始文本到状态中
             self.state.problem.raw_text = raw
+            self.state.problem.reference_solution = ""
             
             # 进入检查和完善阶段（使用problem_extraction子图进行智能化提取）
             return await self._handle_review_problem()
@@ -261,6 +269,57 @@ class PhaseHandler:
         except Exception as e:
             return self.error_handler.handle_error(e, "运行测试", self.state)
     
+    async def _handle_counterexample(self) -> CoachState:
+        """
+        处理“给我一个反例”：与参考解对拍，找到的反例加入题目用例
+        """
+        try:
+            if not self.state_service.has_code(self.state):
+                self.state.ui_message = "请先提交你的代码实现。"
+                return self.state
+            reference = self.state_service.reference_code(self.state)
+            if not reference:
+                # 第一次请求对拍时才生成参考解，通过全部样例后保存，之后的请求直接复用
+                reference = await asyncio.to_thread(self.problem_service.generate_reference, self.state.problem)
+                self.state.problem.reference_solution = reference
+            if not reference:
+                self.state.ui_message = "当前题目没有参考解，暂时无法通过对拍生成反例。"
+                return self.state
+
+            from coach.stress import find_counterexample
+            result = await asyncio.to_thread(
+                find_counterexample, self.state.user_attempt.code, reference, self.state.problem.testcases
+            )
+
+            if result.get("error") and not result["found"]:
+                self.state.ui_message = f"对拍失败：\n```text\n{result['error'][:500]}\n```"
+            elif not result["found"]:
+                self.state.ui_message = (
+                    f"🔍 对拍了 {result['checked']} 组随机输入（{result['time']:.2f}s），"
+                    "没有找到反例。\n\n可以继续运行测试，或思考更极端的边界情况。"
+                )
+            else:
+                inp = result["input"]
+                if result.get("timeout"):
+                    detail = f"- 运行超时：{result['error']}\n"
+                elif "error" in result:
+                    detail = f"- 运行时错误：\n```text\n{result['error'][:500]}\n```\n"
+                else:
+                    detail = (f"- 你的输出：\n```text\n{result['got'][:200]}\n```\n"
+                              f"- 第一处差异：{result['diff']}\n")
+                self.state.ui_message = (
+                    f"🧪 找到反例（对拍 {result['checked']} 组输入，用时 {result['time']:.2f}s）\n\n"
+                    f"- 输入：\n```text\n{inp[:200]}\n```\n"
+                    + (f"- 期望：\n```text\n{result['expected'][:200]}\n```\n" if "expected" in result else "")
+                    + detail
+                    + "\n这组输入已加入测试用例，修复后可以重新运行测试。"
+                )
+                if inp and "expected" in result and all(tc["input"] != inp for tc in self.state.problem.testcases):
+                    self.state.problem.testcases.append({"input": inp, "expected": result["expected"] + "\n"})
+            return self.state
+        except Exception as e:
+            return self.error_handler.handle_error(e, "生成反例", self.state)
+    
     async def _handle_need_hint(self) -> CoachState:
         """
         处理需要提示
@@ -0,0 +1,146 @@
+# coach/llm_cache.py
+"""
+LLM响应缓存（进程内共享）
+以 hash(model, base_url, 采样参数, messages) 为键，相同请求直接复用之前的响应；
+条数与字节数都有上限，超出时按LRU淘汰，条目超过TTL后视为过期；
+设置 COACH_LLM_CACHE_PATH 时内存之后还有一层SQLite磁盘缓存，重启后仍可命中
+（磁盘层与 agent_api 共用 services/agent_api/services/llm_cache.py 中的 DiskTier）
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.agent_api.services.llm_cache import DiskTier
+
+
+def make_llm_key(model: str, base_url: str, params: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+    """
+    LLM请求的内容地址
+    """
+    payload = json.dumps([model, base_url, params, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    有界的LRU + TTL缓存，线程安全
+    max_entries 为条数上限，max_bytes 为响应文本（UTF-8）的总字节上限，ttl 为有效期（秒，None表示不过期）；
+    设置 persist_path 时内存未命中再查磁盘层，写入同时落盘
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 16 * 1024 * 1024,
+                 ttl: Optional[float] = 24 * 3600, persist_path: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (响应, 过期时间, 字节数)
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.disk = DiskTier(persist_path, max_disk_bytes) if persist_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        found = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return None
+            value, expires_at = found
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value, expires_at, len(value.encode("utf-8")))
+            return value
+
+    def put(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        expires_at = time.time() + self.ttl if self.ttl else None
+        if size <= self.max_bytes:
+            with self._lock:
+                self._remember(key, value, expires_at, size)
+        if self.disk is not None:
+            self.disk.put(key, value, expires_at)
+
+    def _remember(self, key: str, value: str, expires_at: Optional[float], size: int):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        stats = {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+_default_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    获取进程内共享的LLM响应缓存
+    """
+    global _default_cache
+    if _default_cache is None:
+        ttl = float(os.getenv("COACH_LLM_CACHE_TTL", 24 * 3600))
+        _default_cache = LLMCache(
+            max_entries=int(os.getenv("COACH_LLM_CACHE_ENTRIES", 512)),
+            max_bytes=int(float(os.getenv("COACH_LLM_CACHE_MB", 16)) * 1024 * 1024),
+            ttl=ttl if ttl > 0 else None,
+            persist_path=os.getenv("COACH_LLM_CACHE_PATH") or None,
+            max_disk_bytes=int(float(os.getenv("COACH_LLM_CACHE_DISK_MB", 256)) * 1024 * 1024),
+        )
+    return _default_cache
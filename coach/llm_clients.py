@@ -0,0 +1,81 @@
+# coach/llm_clients.py
+"""
+共享的聊天模型客户端
+每个 (model, base_url, 参数) 只创建一个 ChatOpenAI，同一 base_url 的客户端共用一个 keep-alive 连接池，
+请求路径上不再重复构造客户端、重复进行TLS握手
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Dict, Any, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+DEFAULT_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+_lock = threading.Lock()
+_http_clients: Dict[str, httpx.Client] = {}
+_chat_models: Dict[Tuple[str, str, str], ChatOpenAI] = {}
+
+
+def get_http_client(base_url: str) -> httpx.Client:
+    """
+    获取 base_url 对应的共享HTTP连接池
+    连接数、空闲连接保留时间与超时分别由 COACH_LLM_MAX_CONNECTIONS、COACH_LLM_KEEPALIVE_EXPIRY、
+    COACH_LLM_CONNECT_TIMEOUT、COACH_LLM_READ_TIMEOUT 配置
+    """
+    with _lock:
+        client = _http_clients.get(base_url)
+        if client is None or client.is_closed:
+            max_connections = int(os.getenv("COACH_LLM_MAX_CONNECTIONS", 20))
+            client = httpx.Client(
+                timeout=httpx.Timeout(
+                    float(os.getenv("COACH_LLM_READ_TIMEOUT", 120)),
+                    connect=float(os.getenv("COACH_LLM_CONNECT_TIMEOUT", 5))
+                ),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=float(os.getenv("COACH_LLM_KEEPALIVE_EXPIRY", 60))
+                )
+            )
+            _http_clients[base_url] = client
+        return client
+
+
+def get_chat_model(model: str = "qwen3-max", base_url: str = DEFAULT_BASE_URL, **params: Any) -> ChatOpenAI:
+    """
+    获取共享的聊天模型客户端，params 为 temperature 等构造参数
+    """
+    key = (model, base_url, json.dumps(params, sort_keys=True, default=str))
+    with _lock:
+        llm = _chat_models.get(key)
+    if llm is not None:
+        return llm
+    http_client = get_http_client(base_url)
+    with _lock:
+        llm = _chat_models.get(key)
+        if llm is None:
+            llm = ChatOpenAI(
+                api_key=os.getenv("DASHSCOPE_API_KEY"),
+                base_url=base_url,
+                model=model,
+                http_client=http_client,
+                **params
+            )
+            _chat_models[key] = llm
+        return llm
+
+
+def close_chat_models():
+    """
+    关闭所有共享的连接池并丢弃已创建的客户端
+    """
+    with _lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+        _chat_models.clear()
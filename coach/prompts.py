@@ -163,3 +163,24 @@ HINT_PROMPT = """
 
 请用中文回答，确保提示清晰、有帮助。
 """
+
+# 参考解（暴力解）生成提示词
+REFERENCE_SOLUTION_PROMPT = """
+请为以下编程题目写一个用于对拍的参考解。
+
+题目：
+{problem_statement}
+
+约束条件：
+{constraints}
+
+样例：
+{examples}
+
+要求：
+1. 使用 Python，定义函数 solve(inp: str) -> str，inp 为完整的标准输入文本，返回值为完整的标准输出文本
+2. 优先保证正确性，采用最直接的暴力做法，不需要考虑时间复杂度
+3. 不要读写文件，不要使用标准输入输出，不要调用网络
+
+只返回一个 ```python 代码块，不要包含其他任何文本。
+"""
@@ -0,0 +1,38 @@
+# coach/result_cache.py
+"""
+运行结果缓存
+以 hash(language, code, input, limits) 为键，相同代码与输入的重复运行直接复用结果；
+内存中按LRU淘汰，设置 COACH_RESULT_CACHE_PATH 时同时持久化到SQLite
+（缓存实现与 agent_api 共用 services/agent_api/services/result_cache.py）
+"""
+
+from __future__ import annotations
+import os
+from typing import Dict, Any, Optional
+
+from services.agent_api.services.result_cache import ResultCache, make_key
+
+__all__ = ["ResultCache", "make_key", "is_cacheable", "get_result_cache"]
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """
+    只缓存确定性的结果：超时、worker崩溃与沙箱内部错误受机器负载影响，重新运行可能不同
+    """
+    return not (result.get("timeout") or result.get("crashed") or result.get("internal"))
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    获取进程内共享的运行结果缓存
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache(
+            max_entries=int(os.getenv("COACH_RESULT_CACHE_ENTRIES", 1024)),
+            persist_path=os.getenv("COACH_RESULT_CACHE_PATH") or None,
+        )
+    return _default_cache
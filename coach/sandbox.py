@@ -0,0 +1,206 @@
+# coach/sandbox.py
+"""
+隔离执行后端
+在独立的worker进程中运行用户的 solve()，每个用例有墙钟与CPU时间限制，
+超时的worker会被杀掉并替换，避免死循环卡住 Chainlit 服务进程；
+多个worker组成进程池，同一次提交的用例可以分散到各个CPU核上并行执行
+"""
+
+from __future__ import annotations
+import hashlib
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except ImportError:  # 非POSIX平台只有墙钟超时
+    resource = None
+
+
+class CpuTimeExceeded(BaseException):
+    """
+    超出CPU时间（继承BaseException，避免被用户代码的 except Exception 吞掉）
+    """
+
+
+def _on_sigxcpu(signum, frame):
+    raise CpuTimeExceeded()
+
+
+def install_cpu_time_handler():
+    """
+    在当前进程中把 SIGXCPU 转换为 CpuTimeExceeded，worker进程启动时调用一次
+    """
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+
+
+@contextmanager
+def cpu_time_limit(seconds: float):
+    """
+    在此范围内最多再使用 seconds 秒CPU时间，超出时抛出 CpuTimeExceeded（需先调用 install_cpu_time_handler）；
+    非POSIX平台不限制
+    """
+    if resource is None:
+        yield
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    saved_limit = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, saved_limit[1]))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, saved_limit)
+
+
+def _worker_main(conn, cpu_time: float):
+    """
+    worker进程主循环：接收 (user_code, inp)，返回 call_solve 的结果
+    同一份代码只编译一次，每个用例在新的命名空间中执行缓存的 code 对象
+    """
+    from coach.tools_exec import compile_solution, new_namespace, call_solve
+
+    install_cpu_time_handler()
+    loaded_key, code = None, None
+
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        user_code, inp = msg
+
+        start = time.perf_counter()
+        try:
+            with cpu_time_limit(cpu_time):
+                key = hashlib.sha256(user_code.encode("utf-8")).hexdigest()
+                if key != loaded_key:
+                    loaded_key = None
+                    code = compile_solution(user_code)
+                    loaded_key = key
+                result = call_solve(new_namespace(code), inp)
+        except CpuTimeExceeded:
+            result = {"ok": False, "error": f"运行超时（CPU时间超过 {cpu_time:g} 秒）", "timeout": True}
+        except BaseException:
+            import traceback
+            result = {"ok": False, "error": traceback.format_exc()}
+        result["time"] = time.perf_counter() - start
+
+        try:
+            conn.send(result)
+        except Exception:
+            # 结果无法序列化等情况
+            conn.send({"ok": False, "error": "无法返回运行结果", "internal": True})
+
+
+class SolveWorker:
+    """
+    单个worker进程及其通信管道
+    """
+
+    def __init__(self, ctx, cpu_time: float):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, cpu_time), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class SandboxExecutor:
+    """
+    隔离执行后端（worker进程池）
+    每个用例的墙钟超时为 timeout 秒，CPU时间超时为 cpu_time 秒；
+    workers 个worker按需启动，默认与CPU核数相同
+    """
+
+    def __init__(self, timeout: Optional[float] = None, cpu_time: Optional[float] = None,
+                 workers: Optional[int] = None):
+        self.timeout = timeout or float(os.getenv("COACH_CASE_TIMEOUT", 5))
+        self.cpu_time = cpu_time or float(os.getenv("COACH_CASE_CPU_TIME", 2))
+        self.workers = workers or int(os.getenv("COACH_SANDBOX_WORKERS", os.cpu_count() or 1))
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        # 每个槽位持有一个worker（尚未启动或已被替换时为None），取出即独占
+        self._slots: "queue.Queue[List[Optional[SolveWorker]]]" = queue.Queue()
+        for _ in range(self.workers):
+            self._slots.put([None])
+
+    def _get_worker(self, slot: List[Optional[SolveWorker]]) -> SolveWorker:
+        if slot[0] is None or not slot[0].process.is_alive():
+            slot[0] = SolveWorker(self._ctx, self.cpu_time)
+        return slot[0]
+
+    def _replace_worker(self, slot: List[Optional[SolveWorker]]):
+        if slot[0] is not None:
+            slot[0].kill()
+        slot[0] = None
+
+    def run(self, user_code: str, inp: str) -> Dict[str, Any]:
+        """
+        在空闲worker中运行 solve(inp)
+        """
+        slot = self._slots.get()
+        try:
+            worker = self._get_worker(slot)
+            try:
+                worker.conn.send((user_code, inp))
+                if not worker.conn.poll(self.timeout):
+                    self._replace_worker(slot)
+                    return {"ok": False, "error": f"运行超时（超过 {self.timeout:g} 秒）", "timeout": True,
+                            "time": self.timeout}
+                return worker.conn.recv()
+            except (EOFError, OSError):
+                # worker崩溃（如 os._exit、段错误）
+                self._replace_worker(slot)
+                return {"ok": False, "error": "运行进程异常退出", "crashed": True}
+        finally:
+            self._slots.put(slot)
+
+    def run_many(self, user_code: str, inputs: List[str]) -> List[Dict[str, Any]]:
+        """
+        把多个用例分散到各个worker并行运行，结果与输入顺序一致
+        """
+        if self.workers <= 1 or len(inputs) <= 1:
+            return [self.run(user_code, inp) for inp in inputs]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(inputs))) as executor:
+            return list(executor.map(lambda inp: self.run(user_code, inp), inputs))
+
+    def close(self):
+        slots = [self._slots.get() for _ in range(self.workers)]
+        for slot in slots:
+            if slot[0] is not None:
+                try:
+                    slot[0].conn.send(None)
+                except (OSError, BrokenPipeError):
+                    pass
+            self._replace_worker(slot)
+        for slot in slots:
+            self._slots.put(slot)
+
+
+_default_executor: Optional[SandboxExecutor] = None
+
+
+def get_sandbox() -> SandboxExecutor:
+    """
+    获取进程内共享的隔离执行后端
+    """
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = SandboxExecutor()
+    return _default_executor
@@ -16,6 +16,7 @@ class Problem(BaseModel):
     examples: str = ""      # 仍保留：展示用
     raw_text: str = ""      # 新增：完整题干
     testcases: List[Dict[str, str]] = Field(default_factory=list)  # 新增：评测用例
+    reference_solution: str = ""  # 参考解（题库或可信的暴力解，定义 solve），用于对拍找反例
 
 class UserAttempt(BaseModel):
     """
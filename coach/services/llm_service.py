@@ -5,63 +5,69 @@ LLM服务模块
 """
 
 from langchain_openai import ChatOpenAI
-import os
 import time
-import hashlib
 from typing import Dict, Any, Optional, List
 
+from coach.llm_cache import LLMCache, get_llm_cache, make_llm_key
+from coach.llm_clients import DEFAULT_BASE_URL, get_chat_model
+
 class LLMService:
     """
     LLM服务类
     负责LLM调用的封装，包括重试机制和缓存机制
+    缓存为进程内共享的有界LRU/TTL缓存，每次新建 LLMService 也能命中之前的响应
     """
-    
-    def __init__(self):
-        self.cache = {}
+
+    def __init__(self, model: str = "qwen3-max",
+                 base_url: str = DEFAULT_BASE_URL,
+                 params: Optional[Dict[str, Any]] = None, cache: Optional[LLMCache] = None):
+        self.model = model
+        self.base_url = base_url
+        self.params = params or {}  # 采样参数（temperature 等），同时作为缓存键的一部分
+        self.cache = cache if cache is not None else get_llm_cache()
         self.max_retries = 3
         self.retry_delay = 2
-    
+
     def get_llm(self) -> ChatOpenAI:
         """
-        获取LLM实例
+        获取共享的LLM实例，重试时复用同一客户端及其连接
         """
-        return ChatOpenAI(
-            api_key=os.getenv("DASHSCOPE_API_KEY"),
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-            model="qwen3-max"
-        )
-    
+        return get_chat_model(self.model, self.base_url, **self.params)
+
     def generate_cache_key(self, system_prompt: str, user_input: str) -> str:
         """
-        生成缓存键
+        生成缓存键：hash(模型, 接口地址, 采样参数, 消息)
         """
-        combined = f"{system_prompt}|{user_input}"
-        return hashlib.md5(combined.encode()).hexdigest()
-    
+        return make_llm_key(self.model, self.base_url, self.params, self._messages(system_prompt, user_input))
+
+    def _messages(self, system_prompt: str, user_input: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_input}
+        ]
+
     def invoke_with_retry(self, system_prompt: str, user_input: str) -> str:
         """
         调用LLM，带重试机制
         """
         # 生成缓存键
         cache_key = self.generate_cache_key(system_prompt, user_input)
-        
+
         # 检查缓存
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # 调用LLM，带重试机制
+        llm = self.get_llm()
+        messages = self._messages(system_prompt, user_input)
         for attempt in range(self.max_retries):
             try:
-                llm = self.get_llm()
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ]
                 response = llm.invoke(messages)
                 output = response.content
-                
+
                 # 缓存结果
-                self.cache[cache_key] = output
+                self.cache.put(cache_key, output)
                 return output
             except Exception as e:
                 print(f"LLM调用失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
@@ -69,15 +75,21 @@ class LLMService:
                     time.sleep(self.retry_delay)
                 else:
                     raise
-    
+
     def clear_cache(self):
         """
         清除缓存
         """
         self.cache.clear()
-    
+
     def get_cache_size(self) -> int:
         """
         获取缓存大小
         """
         return len(self.cache)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        缓存命中统计
+        """
+        return self.cache.stats()
@@ -1,6 +1,12 @@
 from coach.schemas import Problem
 from coach.problem_parser import parse_examples_from_text, summarize_title, extract_constraints
+from coach.prompts import SYSTEM_PROMPT, REFERENCE_SOLUTION_PROMPT
+from coach.services.llm_service import LLMService
 from typing import List, Dict
+import logging
+import re
+
+logger = logging.getLogger(__name__)
 
 class ProblemService:
     """
@@ -9,7 +15,7 @@ class ProblemService:
     """
     
     def __init__(self):
-        pass
+        self.llm_service = LLMService()
     
     def parse_problem(self, raw_text: str) -> Problem:
         """
@@ -71,3 +77,27 @@ class ProblemService:
         content += f"**约束条件**：\n{problem.constraints or '无'}\n\n"
         content += f"**样例**：\n{problem.examples or '无'}"
         return content
+
+    def generate_reference(self, problem: Problem) -> str:
+        """
+        让LLM写一个暴力参考解，在沙箱中通过全部样例才采用，否则返回空字符串（不提供对拍）
+        只在学生第一次请求对拍时调用，不占用题目提取的时间
+        """
+        if not problem.testcases:
+            return ""
+        from coach.tools_exec import run_tests
+        try:
+            user_input = REFERENCE_SOLUTION_PROMPT.format(
+                problem_statement=problem.statement,
+                constraints=problem.constraints,
+                examples=problem.examples
+            )
+            output = self.llm_service.invoke_with_retry(SYSTEM_PROMPT, user_input)
+            match = re.search(r"```(?:python)?\s*\n([\s\S]*?)```", output)
+            code = (match.group(1) if match else output).strip()
+            if code and run_tests(code, problem.testcases)["passed"]:
+                return code
+            logger.warning("生成的参考解未通过全部样例，不提供对拍")
+        except Exception as e:
+            logger.error(f"生成参考解失败: {e}")
+        return ""
@@ -94,6 +94,18 @@ class StateService:
         """
         return bool((state.user_attempt.code or "").strip())
     
+    def reference_code(self, state: CoachState) -> str:
+        """
+        获取对拍用的参考解（题库自带或通过全部样例验证的暴力解），没有时返回空字符串
+        """
+        return (state.problem.reference_solution or "").strip()
+    
+    def can_stress(self, state: CoachState) -> bool:
+        """
+        检查是否可以对拍：已有参考解，或有样例可用来验证首次请求时生成的参考解
+        """
+        return bool(self.reference_code(state) or state.problem.testcases)
+    
     def passed(self, state: CoachState) -> bool:
         """
         检查是否通过测试
@@ -0,0 +1,209 @@
+# coach/stress.py
+"""
+对拍（差分压力测试）
+在进程池中同时运行学生的 solve() 与参考解，输入按样例形状随机生成，
+找到第一个输出不一致的输入即停止，作为反例返回给学生
+"""
+
+from __future__ import annotations
+import multiprocessing
+import os
+import random
+import time
+import types
+from typing import Dict, Any, List, Optional
+
+from coach.sandbox import CpuTimeExceeded, cpu_time_limit, install_cpu_time_handler
+
+
+def _load(code: str) -> types.CodeType:
+    """
+    编译代码（worker内按源码哈希缓存 code 对象），并试运行一次顶层代码以便尽早报告加载错误
+    """
+    from coach.tools_exec import compile_solution, new_namespace
+    compiled = compile_solution(code)
+    new_namespace(compiled)
+    return compiled
+
+
+def _call_limited(code: types.CodeType, inp: str, cpu_time: float) -> Dict[str, Any]:
+    """
+    带CPU时间限制地调用一次 solve，每次调用都在新的命名空间中执行顶层代码
+    """
+    from coach.tools_exec import new_namespace, call_solve
+    try:
+        with cpu_time_limit(cpu_time):
+            return call_solve(new_namespace(code), inp)
+    except CpuTimeExceeded:
+        return {"ok": False, "error": f"运行超时（CPU时间超过 {cpu_time:g} 秒）", "timeout": True}
+    except Exception:
+        import traceback
+        return {"ok": False, "error": traceback.format_exc()}
+
+
+def _init_worker():
+    install_cpu_time_handler()
+
+
+def _stress_chunk(task) -> Dict[str, Any]:
+    """
+    worker中执行一个分片：逐个输入先跑参考解再跑学生代码，遇到第一个不一致即返回
+    参考解出错的输入视为不合法输入，跳过
+    """
+    from coach.compare import compare_outputs
+    user_code, reference_code, inputs, cpu_time = task
+    try:
+        user_module = _load(user_code)
+    except BaseException:
+        import traceback
+        return {"mismatch": {"input": inputs[0] if inputs else "", "error": traceback.format_exc()},
+                "checked": 1, "skipped": 0}
+    try:
+        reference = _load(reference_code)
+    except BaseException:
+        import traceback
+        return {"reference_error": traceback.format_exc(), "mismatch": None, "checked": 0, "skipped": 0}
+    skipped = 0
+    for i, inp in enumerate(inputs):
+        expected = _call_limited(reference, inp, cpu_time)
+        if not expected["ok"]:
+            skipped += 1
+            continue
+        got = _call_limited(user_module, inp, cpu_time)
+        exp = expected["output"].strip()
+        if not got["ok"]:
+            mismatch = {"input": inp, "expected": exp, "error": got["error"]}
+            if got.get("timeout"):
+                mismatch["timeout"] = True
+            return {"mismatch": mismatch, "checked": i + 1, "skipped": skipped}
+        comparison = compare_outputs(expected["output"], got["output"])
+        if not comparison.ok:
+            return {"mismatch": {"input": inp, "expected": exp, "got": got["output"].strip(),
+                                 "diff": comparison.message},
+                    "checked": i + 1, "skipped": skipped}
+    return {"mismatch": None, "checked": len(inputs), "skipped": skipped}
+
+
+class StressTester:
+    """
+    对拍执行器（常驻进程池）
+    输入分成 chunk_size 个一组交给worker，任何一组找到反例即停止派发；
+    workers 默认与CPU核数相同，单个输入的CPU时间上限为 cpu_time 秒
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 200,
+                 cpu_time: Optional[float] = None):
+        self.workers = workers or int(os.getenv("COACH_STRESS_WORKERS", os.cpu_count() or 1))
+        self.chunk_size = chunk_size
+        self.cpu_time = cpu_time or float(os.getenv("COACH_CASE_CPU_TIME", 2))
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self._ctx.Pool(self.workers, initializer=_init_worker)
+        return self._pool
+
+    def run(self, user_code: str, reference_code: str, inputs: List[str],
+            timeout: float = 10) -> Dict[str, Any]:
+        """
+        对拍给定的输入，返回 found / input / expected / got 或 error / checked / skipped / time
+        超过 timeout 秒仍未结束时终止进程池（学生代码可能卡在非CPU的等待上）
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        chunks = [inputs[i:i + self.chunk_size] for i in range(0, len(inputs), self.chunk_size)]
+        pool = self._get_pool()
+        pending: List[Any] = []
+        checked = skipped = 0
+        mismatch = None
+        timed_out = False
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            # 同时在途的分片数为worker数的两倍
+            while next_chunk < len(chunks) and len(pending) < 2 * self.workers:
+                task = (user_code, reference_code, chunks[next_chunk], self.cpu_time)
+                pending.append(pool.apply_async(_stress_chunk, (task,)))
+                next_chunk += 1
+            if not pending:
+                break
+            head = pending.pop(0)
+            head.wait(max(0.0, deadline - time.perf_counter()))
+            if not head.ready():
+                timed_out = True
+                break
+            result = head.get()
+            if "reference_error" in result:
+                return {"found": False, "checked": 0, "skipped": 0, "time": time.perf_counter() - start,
+                        "error": "参考解加载失败：\n" + result["reference_error"]}
+            checked += result["checked"]
+            skipped += result["skipped"]
+            if result["mismatch"] is not None:
+                # 已在途的分片在worker中自然结束，不再等待
+                mismatch = result["mismatch"]
+                break
+        if timed_out:
+            self._terminate()
+        report: Dict[str, Any] = {
+            "found": mismatch is not None,
+            "checked": checked,
+            "skipped": skipped,
+            "time": time.perf_counter() - start,
+        }
+        if mismatch is not None:
+            report.update(mismatch)
+        elif timed_out:
+            report.update({"found": True, "timeout": True, "input": "",
+                           "error": f"对拍超过 {timeout:g} 秒仍未结束，代码可能卡住"})
+        return report
+
+    def find_counterexample(self, user_code: str, reference_code: str,
+                            testcases: List[Dict[str, str]], trials: int = 2000,
+                            seed: Optional[int] = None, timeout: float = 10) -> Dict[str, Any]:
+        """
+        先对拍边界输入，再对拍 trials 个随机小规模输入
+        """
+        from coach.testgen import edge_inputs, random_inputs
+        from coach.tools_exec import preflight
+        error = preflight(user_code)
+        if error is not None:
+            # 代码无法编译时不必启动进程池
+            return {"found": False, "error": error, "checked": 0, "skipped": 0, "time": 0.0}
+        if seed is None:
+            seed = random.randrange(1 << 30)
+        inputs = edge_inputs(testcases) + random_inputs(testcases, trials, seed)
+        return self.run(user_code, reference_code, inputs, timeout=timeout)
+
+    def _terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+_default_tester: Optional[StressTester] = None
+
+
+def get_stress_tester() -> StressTester:
+    """
+    获取进程内共享的对拍执行器
+    """
+    global _default_tester
+    if _default_tester is None:
+        _default_tester = StressTester()
+    return _default_tester
+
+
+def find_counterexample(user_code: str, reference_code: str, testcases: List[Dict[str, str]],
+                        trials: int = 2000, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    用共享的对拍执行器寻找反例
+    """
+    return get_stress_tester().find_counterexample(user_code, reference_code, testcases, trials, seed)
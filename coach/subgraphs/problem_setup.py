@@ -1,9 +1,8 @@
 # coach/subgraphs/problem_setup.py
 from __future__ import annotations
-import os
 from langgraph.graph import StateGraph, END
 from coach.schemas import CoachState
-from langchain_openai import ChatOpenAI
+from coach.llm_clients import get_chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
@@ -20,16 +19,10 @@ class ParsedProblem(BaseModel):
     examples: str = Field(..., description="格式化的样例展示，用于用户查看")
 
 
-def parse_problem_with_agent(raw_text: str) -> ParsedProblem:
-    """
-    使用LLM解析题目信息
-    """
-    try:
-        # 创建输出解析器
-        output_parser = PydanticOutputParser(pydantic_object=ParsedProblem)
-        
-        # 创建提示模板
-        prompt = ChatPromptTemplate.from_template("""
+# 提示模板与输出解析器只构建一次，所有请求复用
+_OUTPUT_PARSER = PydanticOutputParser(pydantic_object=ParsedProblem)
+
+_PROMPT = ChatPromptTemplate.from_template("""
         你是一个专业的编程题目解析助手，负责将原始题目文本解析为结构化的题目信息。
         
         请仔细分析以下题目文本，提取并结构化以下信息：
@@ -48,22 +41,28 @@ def parse_problem_with_agent(raw_text: str) -> ParsedProblem:
         {raw_text}
         
         {format_instructions}
-        """)
-        
-        # 配置LLM
-        llm = ChatOpenAI(api_key=os.getenv("DASHSCOPE_API_KEY"),
-                         base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-                         model="qwen3-max"
-        )
-        
-        # 绑定提示和解析器
-        prompt_with_format = prompt.partial(format_instructions=output_parser.get_format_instructions())
-        
-        # 创建链
-        chain = prompt_with_format | llm | output_parser
-        
+        """).partial(format_instructions=_OUTPUT_PARSER.get_format_instructions())
+
+_parse_chain = None
+
+
+def get_parse_chain():
+    """
+    获取题目解析链（提示 | 共享的LLM客户端 | 解析器），首次调用时构建
+    """
+    global _parse_chain
+    if _parse_chain is None:
+        _parse_chain = _PROMPT | get_chat_model("qwen3-max") | _OUTPUT_PARSER
+    return _parse_chain
+
+
+def parse_problem_with_agent(raw_text: str) -> ParsedProblem:
+    """
+    使用LLM解析题目信息
+    """
+    try:
         # 执行链
-        parsed_result = chain.invoke({"raw_text": raw_text})
+        parsed_result = get_parse_chain().invoke({"raw_text": raw_text})
         
         return parsed_result
     except Exception as e:
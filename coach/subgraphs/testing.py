@@ -2,7 +2,7 @@
 from __future__ import annotations
 from langgraph.graph import StateGraph, END
 from coach.schemas import CoachState
-from coach.tools_exec import run_tests
+from coach.tools_exec import run_max_tests, run_tests
 
 def run_test_cases(state: CoachState) -> CoachState:
     """
@@ -35,11 +35,28 @@ def run_test_cases(state: CoachState) -> CoachState:
         
         # 运行测试用例
         result = run_tests(state.user_attempt.code, state.problem.testcases)
+        max_failed = False
+        if result["passed"]:
+            # 样例全部通过后，再用约束上界的最大规模输入检查是否超时
+            max_result = run_max_tests(
+                state.user_attempt.code, state.problem.testcases, state.problem.constraints
+            )
+            if max_result["checked"]:
+                state.user_attempt.tests_run.append(
+                    f"最大规模测试: {max_result['checked']} 组输入，最慢 {max_result['max_time']:.2f}s"
+                )
+            if not max_result["passed"]:
+                max_failed = True
+                result["passed"] = False
+                result["failing"] = max_result["failing"]
         state.evaluation.passed = result["passed"]
         state.evaluation.failing_cases = result["failing"]
         
         # 记录测试运行
-        state.user_attempt.tests_run.append(f"测试运行: {len(result['failing'])} 个失败用例")
+        state.user_attempt.tests_run.append(
+            f"测试运行: {len(result['failing'])} 个失败用例"
+            f"（用例耗时合计 {result['total_time']:.2f}s，实际耗时 {result['wall_time']:.2f}s）"
+        )
         
         # 根据测试结果决定下一步
         if state.evaluation.passed:
@@ -52,16 +69,24 @@ def run_test_cases(state: CoachState) -> CoachState:
         else:
             # 处理失败情况
             total_cases = len(state.problem.testcases)
-            passed_cases = total_cases - len(result["failing"])
+            passed_cases = total_cases if max_failed else total_cases - len(result["failing"])
             
             state.ui_message = (
                 f"❌ 测试用例失败\n\n"
                 f"**测试结果**：{passed_cases}/{total_cases} 个用例通过\n\n"
             )
+            if max_failed:
+                state.ui_message += "样例全部通过，但在约束上界的最大规模输入上失败，请检查算法复杂度。\n\n"
             
             # 显示前3个失败用例
             for i, failure in enumerate(result["failing"][:3]):
-                if "error" in failure:
+                if failure.get("timeout"):
+                    # 运行超时
+                    state.ui_message += (
+                        f"**Case {failure['case']} 运行超时**：{failure['error']}\n"
+                        f"- 输入：\n```text\n{failure['input'][:200]}{'...' if len(failure['input']) > 200 else ''}\n```\n\n"
+                    )
+                elif "error" in failure:
                     # 运行时错误
                     state.ui_message += (
                         f"**Case {failure['case']} 运行时错误**：\n"
@@ -73,7 +98,8 @@ def run_test_cases(state: CoachState) -> CoachState:
                         f"**Case {failure['case']} 输出不匹配**\n"
                         f"- 输入：\n```text\n{failure['input'][:200]}{'...' if len(failure['input']) > 200 else ''}\n```\n"
                         f"- 期望：\n```text\n{failure['expected'][:200]}{'...' if len(failure['expected']) > 200 else ''}\n```\n"
-                        f"- 实际：\n```text\n{failure['got'][:200]}{'...' if len(failure['got']) > 200 else ''}\n```\n\n"
+                        f"- 实际：\n```text\n{failure['got'][:200]}{'...' if len(failure['got']) > 200 else ''}\n```\n"
+                        f"- 第一处差异：{failure['diff']}\n\n"
                     )
             
             # 添加失败原因分析
@@ -83,7 +109,8 @@ def run_test_cases(state: CoachState) -> CoachState:
                 "- 输入输出格式错误：检查是否正确解析输入和格式化输出\n"
                 "- 逻辑算法错误：检查算法思路是否正确\n"
                 "- 变量初始化错误：检查变量是否正确初始化\n"
-                "- 异常处理错误：检查是否正确处理可能的异常情况\n\n"
+                "- 异常处理错误：检查是否正确处理可能的异常情况\n"
+                "- 运行超时：检查是否存在死循环，或算法复杂度是否过高\n\n"
                 "请分析失败原因，并进行最小修改。"
             )
             
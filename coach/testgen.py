@@ -0,0 +1,438 @@
+# coach/testgen.py
+"""
+测试输入生成
+按样例输入的“形状”（哪一行是元素个数、哪一行是对应的列表、其余是标量）生成新的输入，
+用于对拍找反例与边界用例；按题目约束的上界生成最大规模输入，用于发现超时
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 没有NumPy时退化为纯Python生成（较慢）
+    np = None
+
+_INT_RE = re.compile(r"-?\d+")
+
+
+def _is_int(token: str) -> bool:
+    return _INT_RE.fullmatch(token) is not None
+
+
+class InputShape:
+    """
+    样例输入的形状：逐行记录 count（元素个数）/ list（与上一行个数对应的列表）/ scalar（其余行）
+    """
+
+    def __init__(self, sample: str):
+        self.lines = [line.split() for line in sample.strip().splitlines()]
+        self.kinds: List[str] = []
+        for i, tokens in enumerate(self.lines):
+            prev = self.lines[i - 1] if i else None
+            if (prev is not None and len(prev) == 1 and _is_int(prev[0])
+                    and int(prev[0]) == len(tokens) and tokens and self.kinds[-1] == "scalar"):
+                self.kinds[-1] = "count"
+                self.kinds.append("list")
+            else:
+                self.kinds.append("scalar")
+        values = [int(t) for tokens in self.lines for t in tokens if _is_int(t)]
+        self.lo = min(values) if values else 0
+        self.hi = max(values) if values else 10
+
+    def _list_range(self, tokens: List[str]):
+        values = [int(t) for t in tokens if _is_int(t)]
+        lo, hi = (min(values), max(values)) if values else (self.lo, self.hi)
+        return lo, max(hi, lo + 10)
+
+    def render(self, lines: List[List[str]]) -> str:
+        return "\n".join(" ".join(tokens) for tokens in lines) + "\n"
+
+    def random(self, rng: random.Random, max_len: int = 8) -> str:
+        """
+        生成一个随机的小规模输入：列表长度在 [1, max(样例长度, max_len)] 内，数值范围参照样例
+        """
+        out: List[List[str]] = []
+        for tokens, kind in zip(self.lines, self.kinds):
+            if kind == "count":
+                out.append([])  # 由下一行的长度回填
+            elif kind == "list":
+                length = rng.randint(1, max(len(tokens), max_len))
+                out[-1] = [str(length)]
+                out.append(self._random_list(tokens, length, rng))
+            else:
+                out.append([self._random_scalar(t, rng) for t in tokens])
+        return self.render(out)
+
+    def _random_list(self, tokens: List[str], length: int, rng: random.Random) -> List[str]:
+        if all(_is_int(t) for t in tokens):
+            lo, hi = self._list_range(tokens)
+            return [str(rng.randint(lo, hi)) for _ in range(length)]
+        alphabet = sorted(set("".join(tokens)))
+        width = max(len(t) for t in tokens)
+        return ["".join(rng.choice(alphabet) for _ in range(width)) for _ in range(length)]
+
+    def _random_scalar(self, token: str, rng: random.Random) -> str:
+        if _is_int(token):
+            v = int(token)
+            if v > 0:
+                return str(rng.randint(1, max(2 * v, 10)))
+            if v == 0:
+                return str(rng.randint(0, 10))
+            return str(rng.randint(2 * v, max(-2 * v, 10)))
+        if token.isalpha():
+            return "".join(rng.choice(token) for _ in range(rng.randint(1, len(token) + 3)))
+        return token
+
+    def edges(self) -> List[str]:
+        """
+        边界输入：单元素、全相等、升序、降序、全取最大值；没有列表时为最小的标量
+        """
+        if "list" not in self.kinds:
+            small = []
+            for tokens in self.lines:
+                small.append([("1" if int(t) > 0 else t) if _is_int(t)
+                              else (t[:1] if t.isalpha() else t) for t in tokens])
+            return [self.render(small)]
+
+        def build(make):
+            out: List[List[str]] = []
+            for tokens, kind in zip(self.lines, self.kinds):
+                if kind == "list":
+                    values = make(tokens)
+                    out[-1] = [str(len(values))]
+                    out.append(values)
+                else:
+                    out.append(list(tokens))
+            return self.render(out)
+
+        def numeric(tokens):
+            return all(_is_int(t) for t in tokens)
+
+        def ordered(tokens, reverse):
+            if numeric(tokens):
+                return [str(v) for v in sorted((int(t) for t in tokens), reverse=reverse)]
+            return sorted(tokens, reverse=reverse)
+
+        def extreme(tokens):
+            return [max(tokens, key=lambda t: int(t) if numeric(tokens) else t)] * len(tokens)
+
+        candidates = [
+            build(lambda tokens: tokens[:1]),
+            build(lambda tokens: [min(tokens, key=lambda t: int(t) if numeric(tokens) else t)] * len(tokens)),
+            build(lambda tokens: ordered(tokens, False)),
+            build(lambda tokens: ordered(tokens, True)),
+            build(extreme),
+        ]
+        return list(dict.fromkeys(candidates))
+
+
+def sample_shapes(testcases: List[Dict[str, str]]) -> List[InputShape]:
+    """
+    样例输入的形状（去掉空输入）
+    """
+    return [InputShape(tc["input"]) for tc in testcases if tc.get("input", "").strip()]
+
+
+def random_inputs(testcases: List[Dict[str, str]], count: int, seed: int = 0,
+                  max_len: int = 8) -> List[str]:
+    """
+    按样例形状生成 count 个随机小规模输入，相同 seed 生成相同序列
+    """
+    shapes = sample_shapes(testcases)
+    if not shapes:
+        return []
+    rng = random.Random(seed)
+    return [rng.choice(shapes).random(rng, max_len) for _ in range(count)]
+
+
+def edge_inputs(testcases: List[Dict[str, str]], limit: Optional[int] = None) -> List[str]:
+    """
+    按样例形状生成边界输入，去重后最多 limit 个
+    """
+    inputs = []
+    for shape in sample_shapes(testcases):
+        inputs.extend(shape.edges())
+    inputs = list(dict.fromkeys(inputs))
+    return inputs[:limit] if limit else inputs
+
+
+# ---------------------------------------------------------------------------
+# 按约束生成最大规模输入
+# ---------------------------------------------------------------------------
+
+_NUM = r"[-−]?\s*\d+(?:\.\d+)?\s*(?:[x×*·]\s*10\s*(?:\^|\*\*)\s*\d+|[eE]\d+|\s*(?:\^|\*\*)\s*\d+|[⁰¹²³⁴⁵⁶⁷⁸⁹]+)?"
+_LE = r"(?:<=|≤|<|＜|⩽)"
+_NAME = r"[A-Za-z_][\w.\[\]()]*"
+_RANGE_RE = re.compile(rf"({_NUM})\s*{_LE}\s*({_NAME}(?:\s*,\s*{_NAME})*)\s*{_LE}\s*({_NUM})")
+_UPPER_RE = re.compile(rf"(?<![\w<≤⩽])({_NAME})\s*{_LE}\s*({_NUM})")
+_SUPERSCRIPT = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+_LENGTH_NAMES = {"n", "m", "len", "length", "size", "q"}
+
+# 单个输入最多生成的元素个数，避免约束写错时生成超大输入
+MAX_ELEMENTS = int(os.getenv("COACH_TESTGEN_MAX_ELEMENTS", 10 ** 6))
+
+
+def parse_number(text: str) -> int:
+    """
+    解析约束中的数值：10^5、10**5、1e5、2×10^5、2*10^5、10⁵
+    """
+    s = text.replace(" ", "").replace("−", "-")
+    if any(c in s for c in "⁰¹²³⁴⁵⁶⁷⁸⁹"):
+        digits = re.match(r"-?\d+", s).group()
+        return int(digits) ** int(s[len(digits):].translate(_SUPERSCRIPT))
+    m = re.fullmatch(r"(-?\d+(?:\.\d+)?)[x×*·]10(?:\^|\*\*)(\d+)", s)
+    if m:
+        return int(float(m.group(1)) * 10 ** int(m.group(2)))
+    m = re.fullmatch(r"(-?\d+)(?:\^|\*\*)(\d+)", s)
+    if m:
+        base = int(m.group(1))
+        return -(abs(base) ** int(m.group(2))) if base < 0 else base ** int(m.group(2))
+    return int(float(s))
+
+
+def parse_bounds(constraints: str) -> Dict[str, Tuple[int, int]]:
+    """
+    从约束文本中解析数值范围，返回 {变量名: (下界, 上界)}
+    支持 "1 <= n <= 10^5"、"-10^9 <= nums[i], target <= 10^9"、"n ≤ 2×10^5" 等写法
+    """
+    bounds: Dict[str, Tuple[int, int]] = {}
+    text = constraints or ""
+    for m in _RANGE_RE.finditer(text):
+        try:
+            lo, hi = parse_number(m.group(1)), parse_number(m.group(3))
+        except (ValueError, AttributeError):
+            continue
+        for name in m.group(2).split(","):
+            bounds.setdefault(name.strip(), (lo, hi))
+    for m in _UPPER_RE.finditer(_RANGE_RE.sub(" ", text)):
+        try:
+            hi = parse_number(m.group(2))
+        except (ValueError, AttributeError):
+            continue
+        bounds.setdefault(m.group(1), (min(1, hi), hi))
+    return bounds
+
+
+def _is_length_name(name: str) -> bool:
+    lower = name.lower()
+    return lower in _LENGTH_NAMES or lower.endswith(".length") or lower.endswith(".size()") \
+        or lower.startswith("len(")
+
+
+def split_bounds(bounds: Dict[str, Tuple[int, int]]):
+    """
+    区分规模约束（n、nums.length 等）与元素取值约束（nums[i] 等），各取第一个
+    """
+    length = next((b for name, b in bounds.items() if _is_length_name(name)), None)
+    value = next((b for name, b in bounds.items() if not _is_length_name(name)), None)
+    return length, value
+
+
+def format_ints(values) -> str:
+    """
+    把整数数组格式化为空格分隔的文本；使用NumPy按列向量化生成每一位数字，
+    百万级元素不需要逐个调用 str()
+    """
+    if np is None:
+        return " ".join(map(str, values))
+    values = np.asarray(values, dtype=np.int64)
+    count = len(values)
+    if count == 0:
+        return ""
+    magnitude = np.abs(values)
+    top = int(magnitude.max())
+    magnitude = magnitude.astype(np.uint32 if top < 2 ** 32 else np.uint64)
+    width = len(str(top))
+    # 每行：符号位 + width位数字 + 空格，再用掩码去掉正号与前导零
+    chars = np.empty((count, width + 2), dtype=np.uint8)
+    keep = np.empty((count, width + 2), dtype=bool)
+    chars[:, 0], keep[:, 0] = ord("-"), values < 0
+    chars[:, -1], keep[:, -1] = ord(" "), True
+    rest = magnitude
+    for col in range(width, 0, -1):
+        chars[:, col] = rest % 10
+        rest = rest // 10
+    chars[:, 1:-1] += ord("0")
+    powers = np.array([10 ** k for k in range(1, width)], dtype=magnitude.dtype)
+    digits = np.searchsorted(powers, magnitude, side="right") + 1
+    keep[:, 1:-1] = np.arange(width) >= (width - digits)[:, None]
+    return chars[keep].tobytes()[:-1].decode("ascii")
+
+
+def _int_array(kind: str, length: int, lo: int, hi: int, seed: int):
+    """
+    生成一种最坏情况的整数数组：random / sorted / reversed / equal / alternating / max
+    """
+    if np is None:
+        rng = random.Random(seed)
+        values = [rng.randint(lo, hi) for _ in range(length)]
+        if kind == "sorted":
+            values.sort()
+        elif kind == "reversed":
+            values.sort(reverse=True)
+        elif kind == "equal":
+            values = [lo] * length
+        elif kind == "alternating":
+            values = [lo if i % 2 == 0 else hi for i in range(length)]
+        elif kind == "max":
+            values = [hi] * length
+        return values
+    if kind == "equal":
+        return np.full(length, lo, dtype=np.int64)
+    if kind == "max":
+        return np.full(length, hi, dtype=np.int64)
+    if kind == "alternating":
+        values = np.full(length, lo, dtype=np.int64)
+        values[1::2] = hi
+        return values
+    values = np.random.default_rng(seed).integers(lo, hi, size=length, dtype=np.int64, endpoint=True)
+    if kind == "sorted":
+        values.sort()
+    elif kind == "reversed":
+        values[::-1].sort()
+    return values
+
+
+def _random_text(alphabet: List[str], length: int, seed: int, same: bool = False) -> str:
+    if same:
+        return alphabet[0] * length
+    if np is None:
+        rng = random.Random(seed)
+        return "".join(rng.choice(alphabet) for _ in range(length))
+    codes = np.frombuffer("".join(alphabet).encode("utf-8"), dtype=np.uint8)
+    if len(codes) != len(alphabet):  # 非ASCII字母表
+        rng = random.Random(seed)
+        return "".join(rng.choice(alphabet) for _ in range(length))
+    picks = np.random.default_rng(seed).integers(0, len(codes), size=length)
+    return codes[picks].tobytes().decode("ascii")
+
+
+def _random_words(alphabet: List[str], count: int, word_length: int, seed: int, kind: str) -> List[str]:
+    if kind == "equal":
+        return [alphabet[0] * word_length] * count
+    text = _random_text(alphabet, count * word_length, seed)
+    words = [text[i:i + word_length] for i in range(0, len(text), word_length)]
+    if kind == "sorted":
+        words.sort()
+    elif kind == "reversed":
+        words.sort(reverse=True)
+    return words
+
+
+ARRAY_KINDS = ["random", "sorted", "reversed", "equal", "alternating", "max"]
+WORD_KINDS = ["random", "sorted", "reversed", "equal"]
+
+
+def max_inputs(testcases: List[Dict[str, str]], constraints: str,
+               max_elements: Optional[int] = None, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    按约束上界生成最大规模的输入：随机、升序、降序、全相等、两端交替、全取最大值，
+    字符串列表只生成随机、升序、降序、全相等四种；
+    返回 [{"name": 种类, "input": 输入}]；没有规模约束（n、nums.length 等）或样例形状无法识别时返回空列表
+    """
+    max_elements = max_elements or MAX_ELEMENTS
+    length_bound, value_bound = split_bounds(parse_bounds(constraints))
+    shapes = sample_shapes(testcases)
+    if not shapes or length_bound is None:
+        # 元素取值范围不是规模，不能当作数组长度
+        return []
+    # 以含列表的样例为模板，其次是单个整数/字符串的样例
+    shape = next((s for s in shapes if "list" in s.kinds), shapes[0])
+    length = min(length_bound[1], max_elements)
+
+    if "list" not in shape.kinds:
+        tokens = shape.lines[0] if len(shape.lines) == 1 else []
+        if len(tokens) != 1:
+            return []
+        token = tokens[0]
+        if _is_int(token):
+            return [{"name": "max", "input": f"{length}\n"}]
+        if token.isalpha():
+            alphabet = sorted(set(token))
+            return [{"name": "random", "input": _random_text(alphabet, length, seed) + "\n"},
+                    {"name": "equal", "input": _random_text(alphabet, length, seed, same=True) + "\n"}]
+        return []
+
+    int_lists = all(all(_is_int(t) for t in tokens)
+                    for tokens, line_kind in zip(shape.lines, shape.kinds) if line_kind == "list")
+    cases = []
+    for kind in ARRAY_KINDS if int_lists else WORD_KINDS:
+        lines: List[str] = []
+        for tokens, line_kind in zip(shape.lines, shape.kinds):
+            if line_kind == "count":
+                lines.append(str(length))
+            elif line_kind == "list" and all(_is_int(t) for t in tokens):
+                lo, hi = value_bound or shape._list_range(tokens)
+                lines.append(format_ints(_int_array(kind, length, lo, hi, seed)))
+            elif line_kind == "list":
+                alphabet = sorted(set("".join(tokens)))
+                word_length = max(len(t) for t in tokens)
+                lines.append(" ".join(_random_words(alphabet, length, word_length, seed, kind)))
+            else:
+                lines.append(" ".join(tokens))
+        cases.append({"name": kind, "input": "\n".join(lines) + "\n"})
+    return cases
+
+
+class MaxInputCache:
+    """
+    按题目指纹（约束 + 样例输入）缓存生成的最大规模输入
+    最多保留 max_bytes 字节，按LRU淘汰
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(testcases: List[Dict[str, str]], constraints: str) -> str:
+        h = hashlib.sha256((constraints or "").encode("utf-8"))
+        for tc in testcases:
+            h.update(b"\0" + tc.get("input", "").encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, testcases: List[Dict[str, str]], constraints: str) -> List[Dict[str, str]]:
+        """
+        命中时直接返回，未命中时生成并缓存
+        """
+        key = self.fingerprint(testcases, constraints)
+        with self._lock:
+            cases = self._entries.get(key)
+            if cases is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cases
+            self.misses += 1
+        cases = max_inputs(testcases, constraints)
+        size = sum(len(c["input"]) for c in cases)
+        with self._lock:
+            self._entries[key] = cases
+            self._sizes[key] = size
+            while len(self._entries) > 1 and sum(self._sizes.values()) > self.max_bytes:
+                old, _ = self._entries.popitem(last=False)
+                del self._sizes[old]
+        return cases
+
+
+_default_max_cache: Optional[MaxInputCache] = None
+
+
+def get_max_inputs(testcases: List[Dict[str, str]], constraints: str) -> List[Dict[str, str]]:
+    """
+    获取（并缓存）题目的最大规模输入
+    """
+    global _default_max_cache
+    if _default_max_cache is None:
+        _default_max_cache = MaxInputCache(int(os.getenv("COACH_TESTGEN_CACHE_MB", 256)) * 1024 * 1024)
+    return _default_max_cache.get(testcases, constraints)
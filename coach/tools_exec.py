@@ -1,18 +1,84 @@
 # coach/tools_exec.py
 from __future__ import annotations
+import ast
+import hashlib
 import textwrap
+import time
 import traceback
-from typing import Dict, Any, List
+import types
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 
-def run_solution(user_code: str, inp: str) -> Dict[str, Any]:
+# 按源码哈希缓存编译结果，同一份代码在多次运行测试之间只编译一次
+_CODE_CACHE: "OrderedDict[str, types.CodeType]" = OrderedDict()
+_CODE_CACHE_SIZE = 64
+
+def compile_solution(user_code: str) -> types.CodeType:
     """
-    约定：用户代码必须定义 solve(inp: str) -> str
+    编译用户代码，按 sha256(源码) 缓存 code 对象
+    """
+    key = hashlib.sha256(user_code.encode("utf-8")).hexdigest()
+    code = _CODE_CACHE.get(key)
+    if code is None:
+        code = compile(user_code, "<solution>", "exec")
+        _CODE_CACHE[key] = code
+        if len(_CODE_CACHE) > _CODE_CACHE_SIZE:
+            _CODE_CACHE.popitem(last=False)
+    else:
+        _CODE_CACHE.move_to_end(key)
+    return code
+
+def _defines_solve(tree: ast.Module) -> bool:
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "solve":
+            return True
+        if isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(t, ast.Name) and t.id == "solve" for t in targets):
+                return True
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if any((alias.asname or alias.name) == "solve" for alias in node.names):
+                return True
+    return False
+
+def preflight(user_code: str) -> Optional[str]:
+    """
+    执行前检查：在当前进程内编译代码并检查顶层是否定义了 solve，不启动任何进程
+    通过时返回 None，否则返回错误说明（语法错误保留 SyntaxError 的原始提示）
     """
-    g = {}
     try:
-        exec(user_code, g, g)
-        if "solve" not in g:
-            return {"ok": False, "error": "未找到 solve(inp: str) -> str 函数。"}
+        compile_solution(user_code)
+        tree = ast.parse(user_code, "<solution>")
+    except SyntaxError as e:
+        return "".join(traceback.format_exception_only(type(e), e))
+    except (ValueError, RecursionError) as e:
+        return f"代码无法编译：{e}"
+    if not _defines_solve(tree):
+        return "未找到 solve(inp: str) -> str 函数。"
+    return None
+
+def new_namespace(code: types.CodeType) -> Dict[str, Any]:
+    """
+    在一个全新的字典中执行已编译的 code 对象，返回模块命名空间
+    每个用例各自调用一次，顶层的可变对象不会在用例之间残留
+    """
+    g = {"__name__": "__solution__"}
+    exec(code, g, g)
+    return g
+
+def load_module(user_code: str) -> Dict[str, Any]:
+    """
+    编译（命中缓存时复用 code 对象）并执行一次用户代码，返回模块命名空间
+    """
+    return new_namespace(compile_solution(user_code))
+
+def call_solve(g: Dict[str, Any], inp: str) -> Dict[str, Any]:
+    """
+    在给定命名空间中调用 solve
+    """
+    if "solve" not in g:
+        return {"ok": False, "error": "未找到 solve(inp: str) -> str 函数。"}
+    try:
         out = g["solve"](inp)
         if not isinstance(out, str):
             out = str(out)
@@ -20,22 +86,163 @@ def run_solution(user_code: str, inp: str) -> Dict[str, Any]:
     except Exception:
         return {"ok": False, "error": traceback.format_exc()}
 
-def run_tests(user_code: str, testcases: List[Dict[str, str]]) -> Dict[str, Any]:
+def run_solution(user_code: str, inp: str) -> Dict[str, Any]:
+    """
+    约定：用户代码必须定义 solve(inp: str) -> str
+    """
+    try:
+        g = load_module(user_code)
+    except Exception:
+        return {"ok": False, "error": traceback.format_exc()}
+    return call_solve(g, inp)
+
+def _iter_in_process(user_code: str, testcases: List[Dict[str, str]]):
+    # 代码只编译一次，每个用例在新的命名空间中重新执行顶层代码
+    try:
+        code = compile_solution(user_code)
+    except Exception:
+        code, load_error = None, traceback.format_exc()
+    for tc in testcases:
+        if code is None:
+            yield {"ok": False, "error": load_error}
+            continue
+        start = time.perf_counter()
+        try:
+            result = call_solve(new_namespace(code), tc["input"])
+        except Exception:
+            result = {"ok": False, "error": traceback.format_exc()}
+        result["time"] = time.perf_counter() - start
+        yield result
+
+def _iter_sandboxed(user_code: str, testcases: List[Dict[str, str]], parallel: bool = True):
+    # 在隔离的worker进程中运行，每个用例有墙钟/CPU超时；parallel=True 时用例分散到多个worker
+    from coach.sandbox import get_sandbox
+    sandbox = get_sandbox()
+    if parallel:
+        yield from sandbox.run_many(user_code, [tc["input"] for tc in testcases])
+        return
+    for tc in testcases:
+        yield sandbox.run(user_code, tc["input"])
+
+def _limits_key(sandbox: bool) -> Dict[str, Any]:
+    if not sandbox:
+        return {"sandbox": False}
+    from coach.sandbox import get_sandbox
+    executor = get_sandbox()
+    return {"sandbox": True, "timeout": executor.timeout, "cpu_time": executor.cpu_time}
+
+def _execute(user_code: str, testcases: List[Dict[str, str]], sandbox: bool, parallel: bool):
+    if sandbox:
+        return _iter_sandboxed(user_code, testcases, parallel)
+    return _iter_in_process(user_code, testcases)
+
+def _run_cached(user_code: str, testcases: List[Dict[str, str]], sandbox: bool, use_cache: bool,
+                parallel: bool = True):
+    """
+    命中缓存的用例直接复用结果，只运行未命中的用例；超时、崩溃等不确定的结果不缓存
+    """
+    if not use_cache:
+        return list(_execute(user_code, testcases, sandbox, parallel))
+    from coach.result_cache import get_result_cache, is_cacheable, make_key
+    cache = get_result_cache()
+    limits = _limits_key(sandbox)
+    keys = [make_key("python", user_code, tc["input"], limits) for tc in testcases]
+    results = [cache.get(key) for key in keys]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if pending:
+        cases = [testcases[i] for i in pending]
+        fresh = _execute(user_code, cases, sandbox, parallel)
+        for i, r in zip(pending, fresh):
+            results[i] = r
+            if is_cacheable(r):
+                cache.put(keys[i], r)
+    return results
+
+def run_tests(user_code: str, testcases: List[Dict[str, str]], sandbox: bool = True,
+              use_cache: bool = True, parallel: bool = True,
+              abs_eps: Optional[float] = None, rel_eps: Optional[float] = None) -> Dict[str, Any]:
+    """
+    运行全部用例；sandbox=True 时在独立进程中带超时运行，否则在当前进程中运行
+    use_cache=True 时相同代码与输入的用例复用之前的运行结果
+    parallel=True（且 sandbox=True）时用例分散到多个worker进程并行运行，结果顺序不变
+    输出逐token比较（忽略空白差异），abs_eps / rel_eps 为浮点答案的绝对/相对容差
+    返回的 total_time 为各用例耗时之和，wall_time 为整组用例的实际耗时（秒）
+    """
+    from coach.compare import compare_outputs
+    start = time.perf_counter()
+    error = preflight(user_code)
+    if error is not None:
+        # 编译或入口检查不通过时所有用例直接判失败，不占用worker
+        results = [{"ok": False, "error": error} for _ in testcases]
+    else:
+        results = _run_cached(user_code, testcases, sandbox, use_cache, parallel)
+    wall_time = time.perf_counter() - start
     failing = []
-    for i, tc in enumerate(testcases, 1):
-        r = run_solution(user_code, tc["input"])
+    for i, (tc, r) in enumerate(zip(testcases, results), 1):
         if not r["ok"]:
-            failing.append({"case": i, "input": tc["input"], "expected": tc["expected"], "error": r["error"]})
+            failure = {"case": i, "input": tc["input"], "expected": tc["expected"], "error": r["error"]}
+            if r.get("timeout"):
+                failure["timeout"] = True
+            failing.append(failure)
             continue
-        got = (r["output"] or "").strip()
-        exp = (tc["expected"] or "").strip()
-        if got != exp:
-            failing.append({"case": i, "input": tc["input"], "expected": exp, "got": got})
-    return {"passed": len(failing) == 0, "failing": failing}
-
-def generate_edge_cases() -> List[Dict[str, str]]:
-    # MVP：先返回空；后续按题型生成
-    return []
+        comparison = compare_outputs(tc["expected"] or "", r["output"] or "", abs_eps, rel_eps)
+        if not comparison.ok:
+            failing.append({"case": i, "input": tc["input"], "expected": (tc["expected"] or "").strip(),
+                            "got": (r["output"] or "").strip(), "diff": comparison.message,
+                            "line": comparison.line, "column": comparison.column})
+    return {
+        "passed": len(failing) == 0,
+        "failing": failing,
+        "total_time": sum(r.get("time") or 0 for r in results),
+        "wall_time": wall_time,
+    }
+
+def run_max_tests(user_code: str, testcases: List[Dict[str, str]], constraints: str) -> Dict[str, Any]:
+    """
+    在沙箱中用约束上界的最大规模输入（随机/有序/逆序/全相等等）运行代码，只检查超时与运行错误，
+    遇到第一个失败即停止；约束无法解析时 checked 为 0
+    """
+    from coach.sandbox import get_sandbox
+    from coach.testgen import get_max_inputs
+    error = preflight(user_code)
+    if error is not None:
+        return {"passed": False, "failing": [{"case": "preflight", "input": "", "error": error}],
+                "checked": 0, "max_time": 0.0}
+    sandbox = get_sandbox()
+    cases = get_max_inputs(testcases, constraints)
+    failing = []
+    slowest = 0.0
+    for case in cases:
+        r = sandbox.run(user_code, case["input"])
+        slowest = max(slowest, r.get("time") or 0)
+        if not r["ok"]:
+            # 最大规模输入可能有数MB，失败记录中只保留开头
+            failure = {"case": f"max-{case['name']}", "input": case["input"][:1000], "error": r["error"]}
+            if r.get("timeout"):
+                failure["timeout"] = True
+            failing.append(failure)
+            break
+    return {"passed": not failing, "failing": failing, "checked": len(cases), "max_time": slowest}
+
+def generate_edge_cases(testcases: List[Dict[str, str]], reference_code: str = "",
+                        limit: int = 10) -> List[Dict[str, str]]:
+    """
+    按样例形状生成边界用例（单元素、全相等、有序、逆序等），期望输出由参考解在沙箱中运行给出；
+    没有参考解时无法确定期望输出，返回空列表
+    """
+    if not reference_code or preflight(reference_code) is not None:
+        return []
+    from coach.sandbox import get_sandbox
+    from coach.testgen import edge_inputs
+    known = {tc["input"] for tc in testcases}
+    inputs = [inp for inp in edge_inputs(testcases) if inp not in known]
+    cases = []
+    for inp, r in zip(inputs, get_sandbox().run_many(reference_code, inputs)):
+        if r["ok"]:
+            cases.append({"input": inp, "expected": r["output"]})
+        if len(cases) >= limit:
+            break
+    return cases
 
 def default_plan_steps() -> List[str]:
     return [
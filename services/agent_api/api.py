@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any
+import json
 import uuid
 import sys
 import os
@@ -11,6 +13,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')
 
 from services.agent_api.graphs.main import TutorAgentGraph
 from services.agent_api.schemas.state import CoachState, Event
+from services.agent_api.services.scheduler import QueueFullError, get_scheduler
+from services.agent_api.services.result_cache import get_result_cache
+from services.agent_api.services.llm_service import close_http_clients
 
 
 app = FastAPI()
@@ -79,6 +84,16 @@ async def create_session(request: SessionCreate):
     )
 
 
+def _apply_event(session_id: str, event: Event) -> CoachState:
+    """把用户事件写入会话的当前状态"""
+    current_state = sessions[session_id]["state"]
+    if event.type == "TEXT":
+        current_state.user_input = event.payload.get("content", "")
+    elif event.type == "ACTION":
+        current_state.user_input = event.payload.get("action", "")
+    return current_state
+
+
 @app.post("/events", response_model=EventResponse)
 async def handle_event(request: EventRequest):
     """处理用户事件"""
@@ -90,17 +105,13 @@ async def handle_event(request: EventRequest):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # 获取当前状态
-    current_state = sessions[session_id]["state"]
+    current_state = _apply_event(session_id, event)
     
-    # 更新状态
-    if event.type == "TEXT":
-        current_state.user_input = event.payload.get("content", "")
-    elif event.type == "ACTION":
-        current_state.user_input = event.payload.get("action", "")
-    
-    # 运行图
-    result = await compiled_graph.ainvoke(current_state.model_dump())
+    # 运行图；代码执行队列已满时返回503，由客户端稍后重试
+    try:
+        result = await compiled_graph.ainvoke(current_state.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     
     # 更新会话状态
     new_state = CoachState(**result)
@@ -115,20 +126,73 @@ async def handle_event(request: EventRequest):
     )
 
 
-@app.get("/stream")
-async def stream_events(session_id: str):
-    """流式响应事件"""
+def _sse(data: Dict[str, Any]) -> str:
+    """编码一条SSE消息"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/stream")
+async def stream_events(request: EventRequest):
+    """流式处理用户事件（SSE）
+
+    与 /events 相同地运行图，但边运行边推送：
+    - {"type": "test_case_result", ...}：测试子图中每个用例完成后立即推送
+    - {"type": "llm_token", "node": ..., "title": ..., "content": ...}：LLM每生成一段内容立即推送；
+      {"type": "llm_done", "node": ...}：该节点的生成结束
+    - {"type": "final", "response": ..., "stage": ...}：图运行结束后的最终响应
+    - {"type": "error", "detail": ...}：运行失败（如执行队列已满）
+    """
+    session_id = request.session_id
     # 检查会话是否存在
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    # 这里简化处理，实际实现需要使用SSE或WebSocket
-    # 暂时返回当前状态
-    current_state = sessions[session_id]["state"]
-    
+
+    current_state = _apply_event(session_id, request.event)
+
+    async def event_source():
+        result = None
+        try:
+            # subgraphs=True 才能收到子图节点写入的自定义事件；根命名空间的最后一个 values 即最终状态
+            async for namespace, mode, chunk in compiled_graph.astream(
+                current_state.model_dump(), stream_mode=["custom", "values"], subgraphs=True
+            ):
+                if mode == "custom":
+                    yield _sse(chunk)
+                elif not namespace:
+                    result = chunk
+        except QueueFullError as e:
+            yield _sse({"type": "error", "detail": str(e)})
+            return
+        except Exception as e:
+            # 响应头已发出，无法再返回500，改为推送错误事件
+            yield _sse({"type": "error", "detail": f"处理事件失败: {e}"})
+            return
+
+        # 更新会话状态
+        new_state = CoachState(**result)
+        sessions[session_id]["state"] = new_state
+        yield _sse({
+            "type": "final",
+            "response": result.get("response", {"content": "", "buttons": []}),
+            "stage": new_state.stage.value
+        })
+
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """关闭共享的LLM连接池"""
+    await close_http_clients()
+
+
+@app.get("/metrics")
+async def metrics():
+    """运行指标"""
     return {
-        "stage": current_state.stage.value,
-        "message": "Stream endpoint not fully implemented"
+        "runner": get_scheduler().metrics(),
+        "result_cache": get_result_cache().stats()
     }
 
 
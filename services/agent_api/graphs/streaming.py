@@ -0,0 +1,25 @@
+from langgraph.config import get_stream_writer
+from typing import Callable, Dict, Any
+from ..services.llm_service import LLMService
+
+
+def stream_writer() -> Callable[[Dict[str, Any]], None]:
+    """获取LangGraph的自定义流写入器，不在图运行中（如单独调用节点）时忽略写入"""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+async def stream_llm(llm_service: LLMService, prompt: str, node: str, title: str = "") -> str:
+    """流式调用LLM，每收到一段内容即以 llm_token 事件推送给前端，返回完整文本
+
+    同一个 node 的事件属于同一条消息，title 为前端显示的消息标题。
+    """
+    writer = stream_writer()
+    parts = []
+    async for token in llm_service.stream_generate(prompt):
+        parts.append(token)
+        writer({"type": "llm_token", "node": node, "title": title, "content": token})
+    writer({"type": "llm_done", "node": node})
+    return "".join(parts).strip()
@@ -1,16 +1,22 @@
+import re
 from langgraph.graph import StateGraph, END
 from typing import Dict, Any
 from datetime import datetime
 from ...schemas.state import CoachState, CodeSpec, RunReport
 from ...schemas.stage import Stage
-from ...services.runner_service import RunnerService
+from ...services.runner_client import get_runner
+from ...services.preflight import check_code
+from ...services.languages import normalize_language
+
+# Markdown代码块：```语言\n代码```
+CODE_BLOCK_RE = re.compile(r"```([\w+#-]*)[ \t]*\n(.*?)```", re.S)
 
 
 class CodingSubGraph:
     """编码子图"""
     def __init__(self):
         self.name = "coding"
-        self.runner_service = RunnerService()
+        self.runner_service = get_runner()
 
     def build(self) -> StateGraph:
         """构建子图"""
@@ -35,10 +41,13 @@ class CodingSubGraph:
         if not user_input:
             return {"code": None}
 
-        # 从用户输入中提取代码块
-        # 这里简化处理，实际实现需要更复杂的解析逻辑
+        # 从用户输入中提取代码块，代码块标注了语言时按标注运行，否则默认为Python
         code_text = user_input
-        language = "python"  # 默认语言，实际实现需要检测
+        language = "python"
+        match = CODE_BLOCK_RE.search(user_input)
+        if match:
+            code_text = match.group(2)
+            language = normalize_language(match.group(1)) or "python"
 
         # 构建CodeSpec
         code = CodeSpec(
@@ -56,18 +65,23 @@ class CodingSubGraph:
         if not code:
             return {"code": None}
 
-        # 检查代码格式和入口点
-        # 这里简化处理，实际实现需要更复杂的检查逻辑
-        code.format_ok = True
-        code.entrypoint_detected = True
+        # 在进程内编译并检查入口，有问题时直接给出结构化错误，不占用执行资源
+        preflight = check_code(code.code_text, code.language)
+        code.format_ok = preflight.format_ok
+        code.entrypoint_detected = preflight.entrypoint_detected
+        if not preflight.ok:
+            return {
+                "code": code,
+                "run_report": RunReport(ok=False, output="", error=preflight.error, status="RE")
+            }
 
         return {"code": code}
 
     async def run_examples(self, state: CoachState) -> Dict[str, Any]:
         """运行示例"""
         code = state.code
-        if not code or not code.format_ok:
-            return {"run_report": None}
+        if not code or not code.format_ok or not code.entrypoint_detected:
+            return {}
 
         # 获取题目示例
         examples = []
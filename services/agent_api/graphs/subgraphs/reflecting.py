@@ -3,6 +3,7 @@ from typing import Dict, Any
 from ...schemas.state import CoachState
 from ...schemas.stage import Stage
 from ...services.llm_service import LLMService
+from ...services.complexity import exceeds_claim
 
 
 class ReflectingSubGraph:
@@ -46,7 +47,10 @@ class ReflectingSubGraph:
             summary += f"## 测试结果\n"
             summary += f"通过状态: {'通过' if state.test_report.passed else '未通过'}\n"
             summary += f"总执行时间: {state.test_report.total_time}秒\n"
-            summary += f"内存使用: {state.test_report.memory_usage}MB\n\n"
+            summary += f"内存使用: {state.test_report.memory_usage}MB\n"
+            if state.test_report.complexity:
+                summary += f"实测复杂度: {state.test_report.complexity}\n"
+            summary += "\n"
 
         return {"summary": summary}
 
@@ -59,6 +63,12 @@ class ReflectingSubGraph:
         if state.test_report and not state.test_report.passed:
             weaknesses.append("代码实现存在问题，部分测试用例未通过")
 
+        if state.test_report and exceeds_claim(state.test_report.complexity, state.test_report.claimed_complexity):
+            weaknesses.append(
+                f"复杂度分析与实现不符：声明 {state.test_report.claimed_complexity}，"
+                f"实测 {state.test_report.complexity}"
+            )
+
         if not state.idea:
             weaknesses.append("缺乏清晰的解题思路分析")
 
@@ -3,6 +3,7 @@ from typing import Dict, Any
 from ...schemas.state import CoachState, IdeaSpec
 from ...schemas.stage import Stage
 from ...services.llm_service import LLMService
+from ..streaming import stream_llm
 
 
 class ThinkingSubGraph:
@@ -35,8 +36,8 @@ class ThinkingSubGraph:
         # 构建提示词
         prompt = f"请分析以下解题思路的正确性、缺失点和错误点：\n\n{user_input}"
 
-        # 调用LLM
-        response = await self.llm_service.generate(prompt)
+        # 流式调用LLM，分析内容边生成边推送给前端
+        response = await stream_llm(self.llm_service, prompt, "analyze_idea", "思路分析")
 
         # 构建IdeaSpec
         idea = IdeaSpec(
@@ -64,8 +65,8 @@ class ThinkingSubGraph:
         else:  # high
             guidance_prompt = f"请对以下思路给出高级别提示，提供完整推导与伪代码：\n\n{idea.user_idea_raw}"
 
-        # 调用LLM
-        guidance = await self.llm_service.generate(guidance_prompt)
+        # 流式调用LLM，高级别提示较长，边生成边推送给前端
+        guidance = await stream_llm(self.llm_service, guidance_prompt, "generate_guidance", "引导提示")
 
         idea.guidance = guidance
         return {"idea": idea}
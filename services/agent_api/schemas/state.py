@@ -55,7 +55,11 @@ class RunReport(BaseModel):
     ok: bool
     output: str
     error: Optional[str] = None
-    execution_time: Optional[float] = None
+    execution_time: Optional[float] = None  # 墙钟时间（秒）
+    cpu_time: Optional[float] = None  # user+sys CPU时间（秒）
+    memory_usage: Optional[float] = None  # 峰值内存（MB）
+    status: Optional[Literal["OK", "TLE", "MLE", "OLE", "RE"]] = None
+    truncated: bool = False  # 输出超过上限，只保留了开头与结尾
 
 
 class TestCaseResult(BaseModel):
@@ -64,16 +68,26 @@ class TestCaseResult(BaseModel):
     expected: str
     actual: str
     passed: bool
-    execution_time: Optional[float] = None
+    execution_time: Optional[float] = None  # 墙钟时间（秒）
+    cpu_time: Optional[float] = None  # user+sys CPU时间（秒）
+    memory_usage: Optional[float] = None  # 峰值内存（MB）
+    status: Optional[Literal["OK", "WA", "TLE", "MLE", "OLE", "RE"]] = None
+    error: Optional[str] = None
+    truncated: bool = False  # 输出超过上限，只保留了开头与结尾
+    diff: Optional[str] = None  # 答案错误时第一处差异的行列与内容
 
 
 class TestReport(BaseModel):
     """测试结果报告"""
     passed: bool
     results: List[TestCaseResult]
-    total_time: Optional[float] = None
-    memory_usage: Optional[float] = None
-    failure_category: Optional[Literal["WA", "TLE", "MLE", "RE"]] = None
+    total_time: Optional[float] = None  # 各用例墙钟时间之和（秒）
+    wall_time: Optional[float] = None  # 整组用例实际耗时（秒），并行执行时小于 total_time
+    memory_usage: Optional[float] = None  # 各用例峰值内存的最大值（MB）
+    failure_category: Optional[Literal["WA", "TLE", "MLE", "OLE", "RE"]] = None
+    complexity: Optional[str] = None  # 按输入规模增长实测的时间复杂度，如 "O(n^2)"
+    claimed_complexity: Optional[str] = None  # 思路阶段声明的复杂度（规范化后）
+    complexity_samples: Optional[List[Dict[str, float]]] = None  # 复杂度分析的 (规模, CPU时间) 样本
 
 
 class TraceEvent(BaseModel):
@@ -108,6 +122,7 @@ class CoachState(BaseModel):
     code: Optional[CodeSpec] = None
     run_report: Optional[RunReport] = None
     test_report: Optional[TestReport] = None
+    test_cases: List[Dict[str, Any]] = Field(default_factory=list)  # 测试子图生成的用例（input/expected）
     history: List[Message] = Field(default_factory=list)
     trace: TraceBundle = Field(default_factory=lambda: TraceBundle(stages={}, events=[]))
     session_id: Optional[str] = None
@@ -0,0 +1,117 @@
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\S+")
+_BLOCK_SIZE = 1 << 16
+_PREVIEW = 50
+
+
+@dataclass
+class CompareResult:
+    """输出比较结果，不一致时记录第一处差异（行列号从1开始，指向实际输出）"""
+    ok: bool
+    line: Optional[int] = None
+    column: Optional[int] = None
+    expected_token: Optional[str] = None  # None 表示期望输出已结束
+    actual_token: Optional[str] = None  # None 表示实际输出已结束
+
+    @property
+    def message(self) -> Optional[str]:
+        """差异说明"""
+        if self.ok:
+            return None
+        where = f"第{self.line}行第{self.column}列"
+        if self.actual_token is None:
+            return f"{where}：输出提前结束，期望 {_preview(self.expected_token)}"
+        if self.expected_token is None:
+            return f"{where}：多余的输出 {_preview(self.actual_token)}"
+        return f"{where}：期望 {_preview(self.expected_token)}，实际 {_preview(self.actual_token)}"
+
+
+def _preview(token: str) -> str:
+    return token if len(token) <= _PREVIEW else token[:_PREVIEW] + "..."
+
+
+def _blocks(text: str) -> Iterator[Tuple[int, List[str]]]:
+    """按约64KB分块切出token，返回 (块起点, token列表)；块边界对齐到空白处，只持有当前块的副本"""
+    pos, n = 0, len(text)
+    while pos < n:
+        end = min(pos + _BLOCK_SIZE, n)
+        while end < n and not text[end].isspace():
+            end += 1
+        yield pos, text[pos:end].split()
+        pos = end
+
+
+def _tokens_equal(expected: str, actual: str, abs_eps: Optional[float], rel_eps: Optional[float]) -> bool:
+    if expected == actual:
+        return True
+    if abs_eps is None and rel_eps is None:
+        return False
+    try:
+        e, a = float(expected), float(actual)
+    except ValueError:
+        return False
+    diff = abs(e - a)
+    return (abs_eps is not None and diff <= abs_eps) or (rel_eps is not None and diff <= rel_eps * abs(e))
+
+
+def _locate(text: str, start: int, index: int) -> Tuple[int, int]:
+    """从 start 起第 index 个token（从0开始）所在的行列；不存在时返回文本末尾的位置"""
+    pos = len(text)
+    for i, match in enumerate(_TOKEN_RE.finditer(text, start)):
+        if i == index:
+            pos = match.start()
+            break
+    line = text.count("\n", 0, pos) + 1
+    return line, pos - (text.rfind("\n", 0, pos) + 1) + 1
+
+
+def compare_outputs(expected: str, actual: str, abs_eps: Optional[float] = None,
+                    rel_eps: Optional[float] = None) -> CompareResult:
+    """逐token比较输出，忽略空白差异
+
+    设置 abs_eps / rel_eps 时数值token按绝对或相对误差比较；
+    分块流式比较，遇到第一处差异即停止，不会复制整个输出。
+    """
+    if expected == actual:
+        return CompareResult(ok=True)
+
+    expected_blocks, actual_blocks = _blocks(expected), _blocks(actual)
+    exp: Optional[List[str]] = []
+    act: Optional[List[str]] = []
+    i = j = 0  # exp/act 中尚未比较的起点
+    act_start = 0  # act 块在实际输出中的起点
+    while True:
+        if i == len(exp):
+            _, exp = next(expected_blocks, (None, None))
+            i = 0
+        if j == len(act):
+            act_start, act = next(actual_blocks, (len(actual), None))
+            j = 0
+        if exp is None or act is None:
+            break
+        k = min(len(exp) - i, len(act) - j)
+        # 整段相同时走C层的列表比较
+        if exp[i:i + k] != act[j:j + k]:
+            for offset in range(k):
+                if not _tokens_equal(exp[i + offset], act[j + offset], abs_eps, rel_eps):
+                    line, column = _locate(actual, act_start, j + offset)
+                    return CompareResult(False, line, column, exp[i + offset], act[j + offset])
+        i, j = i + k, j + k
+
+    # 一方已结束：跳过纯空白的块，看另一方是否还有token
+    rest_exp = exp[i] if exp else next((b[0] for _, b in expected_blocks if b), None)
+    if act is None:
+        rest_act = None
+    else:
+        while not act:
+            act_start, act = next(actual_blocks, (len(actual), None))
+            if act is None:
+                break
+        rest_act = act[j] if act else None
+    if rest_exp is None and rest_act is None:
+        return CompareResult(ok=True)
+    line, column = _locate(actual, act_start, j if act else 0)
+    return CompareResult(False, line, column, rest_exp, rest_act)
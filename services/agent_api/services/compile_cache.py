@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from .languages import CompiledLanguage
+
+logger = logging.getLogger(__name__)
+
+ERROR_FILE = "compile_error.txt"
+_TMP_PREFIX = ".tmp-"
+_MAX_ERROR_CHARS = 4000
+
+
+@dataclass
+class CompiledArtifact:
+    """编译产物：path 为产物目录，编译失败时 error 为编译器输出"""
+    path: str
+    error: Optional[str] = None
+    cached: bool = False
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class CompileCache:
+    """编译产物的磁盘缓存（内容寻址）
+
+    每份产物放在 root/<hash(语言, 编译器, 编译参数, 源码)> 目录下，源码与参数不变时直接复用，不再编译；
+    编译错误同样缓存。命中时刷新目录的mtime，总大小超过 max_bytes 时按mtime淘汰最久未使用的产物。
+    多个进程可以共享同一个目录：编译在临时目录中进行，完成后原子地重命名为最终目录。
+    """
+    def __init__(self, root: Optional[str] = None, max_mb: Optional[int] = None,
+                 compile_timeout: Optional[float] = None):
+        self.root = root or os.getenv("RUNNER_COMPILE_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "tutor-agent-compile-cache")
+        self.max_bytes = (max_mb or int(os.getenv("RUNNER_COMPILE_CACHE_MB", 512))) * 1024 * 1024
+        self.compile_timeout = compile_timeout or float(os.getenv("RUNNER_COMPILE_TIMEOUT", 30))
+        os.makedirs(self.root, exist_ok=True)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, plugin: CompiledLanguage, code: str) -> str:
+        """产物的内容地址：hash(语言, 编译器, 编译参数, 源码)"""
+        payload = json.dumps([plugin.name, plugin.compiler, plugin.flags, code], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[CompiledArtifact]:
+        """查询已有产物，命中时刷新其最近使用时间"""
+        path = os.path.join(self.root, key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        error = None
+        error_file = os.path.join(path, ERROR_FILE)
+        if os.path.exists(error_file):
+            with open(error_file, encoding="utf-8", errors="replace") as f:
+                error = f.read()
+        return CompiledArtifact(path=path, error=error, cached=True)
+
+    async def get_or_compile(self, plugin: CompiledLanguage, code: str) -> CompiledArtifact:
+        """返回源码对应的编译产物，未缓存时编译；同一份源码并发请求时只编译一次"""
+        key = self.key(plugin, code)
+        artifact = self.lookup(key)
+        if artifact is not None:
+            self.hits += 1
+            return artifact
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                artifact = self.lookup(key)
+                if artifact is not None:
+                    self.hits += 1
+                    return artifact
+                self.misses += 1
+                artifact = await self._compile(plugin, code, key)
+        finally:
+            if not lock.locked():
+                self._locks.pop(key, None)
+        self._evict(keep=key)
+        return artifact
+
+    async def _compile(self, plugin: CompiledLanguage, code: str, key: str) -> CompiledArtifact:
+        """在临时目录中编译，完成后重命名为产物目录"""
+        workdir = tempfile.mkdtemp(prefix=_TMP_PREFIX, dir=self.root)
+        try:
+            source = os.path.join(workdir, plugin.source_name(code))
+            with open(source, "w", encoding="utf-8") as f:
+                f.write(code)
+            error, cacheable = await self._run_compiler(plugin.compile_command(source, workdir), workdir)
+            if not cacheable:
+                return CompiledArtifact(path=workdir, error=error)
+            if error is not None:
+                with open(os.path.join(workdir, ERROR_FILE), "w", encoding="utf-8") as f:
+                    f.write(error)
+            path = os.path.join(self.root, key)
+            try:
+                os.rename(workdir, path)
+            except OSError:
+                # 其他进程已写入同一产物
+                shutil.rmtree(workdir, ignore_errors=True)
+                os.utime(path)
+            return CompiledArtifact(path=path, error=error)
+        finally:
+            if os.path.isdir(workdir) and not os.path.isdir(os.path.join(self.root, key)):
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    async def _run_compiler(self, command: List[str], cwd: str) -> Tuple[Optional[str], bool]:
+        """运行编译器，返回 (错误信息, 结果是否可缓存)；编译超时与无法启动编译器不缓存"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+            )
+        except OSError as e:
+            return f"无法启动编译器 {command[0]}：{e}", False
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), timeout=self.compile_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return f"编译超过 {self.compile_timeout:g} 秒", False
+        if process.returncode == 0:
+            return None, True
+        text = output.decode("utf-8", errors="replace").replace(cwd + os.sep, "")
+        if len(text) > _MAX_ERROR_CHARS:
+            text = text[:_MAX_ERROR_CHARS] + "\n...（编译输出过长，已截断）"
+        return text or f"编译失败（退出码 {process.returncode}）", True
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """所有产物的 (mtime, 大小, 路径)"""
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith(_TMP_PREFIX):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, _dir_size(path), path))
+        return entries
+
+    def _evict(self, keep: Optional[str] = None):
+        """总大小超过上限时按最近使用时间淘汰，不淘汰刚写入的产物"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        keep_path = os.path.join(self.root, keep) if keep else None
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """清空缓存目录"""
+        for _, _, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计与磁盘占用"""
+        entries = self._entries()
+        total = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+_default_cache: Optional[CompileCache] = None
+
+
+def get_compile_cache() -> CompileCache:
+    """获取进程内共享的编译缓存"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CompileCache()
+    return _default_cache
@@ -0,0 +1,218 @@
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 候选复杂度，按增长速度从低到高排列
+COMPLEXITY_CLASSES: List[Tuple[str, Callable[[int], float]]] = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(2^n)", lambda n: 2.0 ** n),
+]
+_RANKS = {label: rank for rank, (label, _) in enumerate(COMPLEXITY_CLASSES)}
+
+# 仅差一个对数因子的两类在计时上很难区分，比较声明复杂度时视为一致
+_LOG_FACTOR_PAIRS = {("O(1)", "O(log n)"), ("O(n)", "O(n log n)")}
+
+# 简单类优先：更复杂的类误差需要明显更小才会被选中
+_SIMPLER_TOLERANCE = 1.5
+
+
+@dataclass
+class ComplexityEstimate:
+    """复杂度估计结果"""
+    complexity: str
+    samples: List[Tuple[int, float]]  # (规模, 耗时秒)
+    scores: Dict[str, float] = field(default_factory=dict)  # 各候选类的相对拟合误差
+    censored: bool = False  # 最后一个规模超时，耗时取的是下界
+
+
+def _weighted_fit(xs: List[float], ts: List[float]) -> float:
+    """按相对误差加权拟合 t = a*f(n) + b（a >= 0），返回加权残差均方"""
+    ws = [1.0 / (t * t) for t in ts]
+    sw = sum(ws)
+    sx = sum(w * x for w, x in zip(ws, xs))
+    st = sum(w * t for w, t in zip(ws, ts))
+    sxx = sum(w * x * x for w, x in zip(ws, xs))
+    sxt = sum(w * x * t for w, x, t in zip(ws, xs, ts))
+    det = sw * sxx - sx * sx
+    a = (sw * sxt - sx * st) / det if det > 1e-12 * sw * sxx else 0.0
+    if a < 0:
+        a = 0.0
+    b = (st - a * sx) / sw
+    return sum(w * (t - a * x - b) ** 2 for w, x, t in zip(ws, xs, ts)) / len(ts)
+
+
+def fit_complexity(samples: List[Tuple[int, float]]) -> Tuple[Optional[str], Dict[str, float]]:
+    """用 (规模, 耗时) 样本拟合各候选复杂度，返回 (最匹配的类, 各类误差)；样本不足3个时返回None
+
+    每一类都拟合 t = a*f(n) + b，常数项 b 吸收进程内的固定开销；
+    误差按相对值计算，小规模和大规模的样本权重相当。
+    """
+    samples = [(n, max(t, 1e-6)) for n, t in samples if n > 1]
+    if len(samples) < 3:
+        return None, {}
+    ts = [t for _, t in samples]
+    scores: Dict[str, float] = {}
+    for label, f in COMPLEXITY_CLASSES:
+        try:
+            values = [f(n) for n, _ in samples]
+        except OverflowError:
+            continue
+        top = max(values)
+        scores[label] = _weighted_fit([v / top for v in values], ts)
+
+    best = min(scores.values())
+    for label, _ in COMPLEXITY_CLASSES:
+        if label in scores and scores[label] <= best * _SIMPLER_TOLERANCE + 1e-4:
+            return label, scores
+    return None, scores
+
+
+_CLAIM_PATTERN = re.compile(r"O\s*\(([^()]*(?:\([^()]*\))?[^()]*)\)", re.IGNORECASE)
+
+
+def normalize_complexity(text: Optional[str]) -> Optional[str]:
+    """从文本中提取第一个大O表达式并规范化为候选类名，无法识别时返回None
+
+    如 "时间复杂度 O(nlogn)" → "O(n log n)"，"O(n²)" → "O(n^2)"
+    """
+    if not text:
+        return None
+    for match in _CLAIM_PATTERN.finditer(text):
+        expr = match.group(1).lower().replace(" ", "").replace("*", "").replace("·", "")
+        expr = expr.replace("²", "^2").replace("ⁿ", "^n").replace("lgn", "logn").replace("log(n)", "logn")
+        expr = re.sub(r"log_?2", "log", expr)
+        known = {
+            "1": "O(1)",
+            "logn": "O(log n)",
+            "n": "O(n)",
+            "nlogn": "O(n log n)",
+            "n^2": "O(n^2)",
+            "nn": "O(n^2)",
+            "2^n": "O(2^n)",
+        }
+        if expr in known:
+            return known[expr]
+    return None
+
+
+def exceeds_claim(measured: Optional[str], claimed: Optional[str]) -> bool:
+    """实测复杂度是否明显高于声明的复杂度（只差对数因子时不算）"""
+    if measured not in _RANKS or claimed not in _RANKS:
+        return False
+    if _RANKS[measured] <= _RANKS[claimed]:
+        return False
+    return (claimed, measured) not in _LOG_FACTOR_PAIRS
+
+
+def _is_int(token: str) -> bool:
+    return re.fullmatch(r"-?\d+", token) is not None
+
+
+def scale_input(sample: str, n: int, rng: random.Random) -> Optional[str]:
+    """按样例输入的格式生成规模为 n 的输入，无法识别格式时返回None
+
+    支持的格式：
+    - 第一行为元素个数 k，第二行恰有 k 个元素（其余行原样保留）
+    - 只有一个整数（如求第 n 项）
+    - 只有一个由字母组成的字符串
+    """
+    lines = sample.strip().splitlines()
+    if not lines:
+        return None
+    first = lines[0].split()
+
+    if len(lines) >= 2 and len(first) == 1 and _is_int(first[0]):
+        items = lines[1].split()
+        if int(first[0]) == len(items) and items:
+            if all(_is_int(t) for t in items):
+                values = [int(t) for t in items]
+                lo, hi = min(values), max(values)
+                hi = max(hi, lo + n)
+                generated = [str(rng.randint(lo, hi)) for _ in range(n)]
+            else:
+                alphabet = sorted(set("".join(items)))
+                width = max(len(t) for t in items)
+                generated = ["".join(rng.choice(alphabet) for _ in range(width)) for _ in range(n)]
+            return "\n".join([str(n), " ".join(generated)] + lines[2:]) + "\n"
+
+    if len(lines) == 1 and len(first) == 1:
+        token = first[0]
+        if _is_int(token):
+            return f"{n}\n"
+        if token.isalpha():
+            alphabet = sorted(set(token))
+            return "".join(rng.choice(alphabet) for _ in range(n)) + "\n"
+    return None
+
+
+def pick_template(inputs: List[str]) -> Optional[str]:
+    """从样例输入中选出格式可识别的最长一个，作为生成大规模输入的模板"""
+    usable = [s for s in inputs if scale_input(s, 1, random.Random(0)) is not None]
+    return max(usable, key=len) if usable else None
+
+
+class ComplexityProfiler:
+    """经验复杂度分析
+
+    以几何增长的规模生成输入并运行提交的代码，用各规模的CPU时间拟合复杂度曲线。
+    单次运行超过 run_budget 秒、累计超过 total_budget 秒或出现超时后停止加大规模。
+    """
+    def __init__(self, runner, start_size: int = 4, growth: int = 2, max_size: int = 1 << 17,
+                 run_budget: float = 0.25, total_budget: float = 2.0, seed: int = 0):
+        self.runner = runner  # RunnerService 或 RunnerClient
+        self.start_size = start_size
+        self.growth = growth
+        self.max_size = max_size
+        self.run_budget = run_budget
+        self.total_budget = total_budget
+        self.seed = seed  # 固定种子，同一份代码的多次分析使用相同输入
+
+    def sizes(self) -> List[int]:
+        """待测规模序列"""
+        sizes, n = [], self.start_size
+        while n <= self.max_size:
+            sizes.append(n)
+            n *= self.growth
+        return sizes
+
+    async def profile(self, code: str, language: str, sample_input: str) -> Optional[ComplexityEstimate]:
+        """分析代码复杂度，输入格式无法识别、样本不足或运行出错时返回None"""
+        rng = random.Random(self.seed)
+        samples: List[Tuple[int, float]] = []
+        censored = False
+        spent = 0.0
+        for n in self.sizes():
+            input_data = scale_input(sample_input, n, rng)
+            if input_data is None:
+                return None
+            result = await self.runner.run_code(code, language, input_data)
+            status = result.get("status") or ("OK" if result.get("ok") else "RE")
+            if status == "TLE":
+                # 超时的耗时只是下界，按预算记录，陡增的曲线仍能被拟合出来
+                samples.append((n, max(self.run_budget, result.get("cpu_time") or 0.0)))
+                censored = True
+                break
+            if status != "OK":
+                logger.info(f"复杂度分析在规模 {n} 处运行失败（{status}），停止分析")
+                break
+            elapsed = result.get("cpu_time")
+            if elapsed is None:
+                elapsed = result.get("execution_time") or 0.0
+            samples.append((n, elapsed))
+            spent += elapsed
+            if elapsed > self.run_budget or spent > self.total_budget:
+                break
+
+        complexity, scores = fit_complexity(samples)
+        if complexity is None:
+            return None
+        return ComplexityEstimate(complexity=complexity, samples=samples, scores=scores, censored=censored)
@@ -0,0 +1,123 @@
+import os
+import re
+import shlex
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+# 语言名的常见写法
+LANGUAGE_ALIASES = {
+    "py": "python", "python3": "python",
+    "js": "javascript", "node": "javascript",
+    "c++": "cpp", "cc": "cpp", "cxx": "cpp",
+}
+
+
+def normalize_language(name: str) -> str:
+    """统一语言名（小写，别名映射为注册名）"""
+    name = (name or "").strip().lower()
+    return LANGUAGE_ALIASES.get(name, name)
+
+
+class CompiledLanguage:
+    """编译型语言插件
+
+    源码写入产物目录后用 compile_command 编译，产物目录由编译缓存按 (源码哈希, 编译参数) 管理；
+    运行时执行 run_command。编译参数可用环境变量 RUNNER_<NAME>_FLAGS 覆盖。
+    """
+    name = ""
+    compiler = ""
+    default_flags: List[str] = []
+    mle_markers: Tuple[str, ...] = ()  # stderr中出现时判定为MLE
+    limit_address_space = True  # 是否用 RLIMIT_AS 限制内存（JVM预留大量虚拟地址，改用堆上限）
+
+    def __init__(self):
+        override = os.getenv(f"RUNNER_{self.name.upper()}_FLAGS")
+        self.flags = shlex.split(override) if override else list(self.default_flags)
+
+    def available(self) -> bool:
+        """本机是否安装了编译器"""
+        return shutil.which(self.compiler) is not None
+
+    def source_name(self, code: str) -> str:
+        raise NotImplementedError
+
+    def compile_command(self, source: str, out_dir: str) -> List[str]:
+        raise NotImplementedError
+
+    def run_command(self, out_dir: str, code: str, memory_mb: int) -> List[str]:
+        raise NotImplementedError
+
+
+class CLanguage(CompiledLanguage):
+    name = "c"
+    compiler = "gcc"
+    default_flags = ["-O2", "-std=gnu11", "-pipe"]
+    mle_markers = ("Cannot allocate memory",)
+
+    def source_name(self, code: str) -> str:
+        return "main.c"
+
+    def compile_command(self, source: str, out_dir: str) -> List[str]:
+        return [self.compiler, *self.flags, source, "-o", os.path.join(out_dir, "main"), "-lm"]
+
+    def run_command(self, out_dir: str, code: str, memory_mb: int) -> List[str]:
+        return [os.path.join(out_dir, "main")]
+
+
+class CppLanguage(CLanguage):
+    name = "cpp"
+    compiler = "g++"
+    default_flags = ["-O2", "-std=gnu++17", "-pipe"]
+    mle_markers = ("std::bad_alloc", "Cannot allocate memory")
+
+    def source_name(self, code: str) -> str:
+        return "main.cpp"
+
+
+class JavaLanguage(CompiledLanguage):
+    name = "java"
+    compiler = "javac"
+    default_flags = ["-encoding", "UTF-8"]
+    mle_markers = ("java.lang.OutOfMemoryError",)
+    limit_address_space = False
+
+    _CLASS_RE = re.compile(r"\bpublic\s+(?:final\s+)?class\s+(\w+)")
+
+    def available(self) -> bool:
+        return super().available() and shutil.which("java") is not None
+
+    def main_class(self, code: str) -> str:
+        """public类名即文件名，没有public类时约定为Main"""
+        match = self._CLASS_RE.search(code)
+        return match.group(1) if match else "Main"
+
+    def source_name(self, code: str) -> str:
+        return f"{self.main_class(code)}.java"
+
+    def compile_command(self, source: str, out_dir: str) -> List[str]:
+        return [self.compiler, *self.flags, "-d", out_dir, source]
+
+    def run_command(self, out_dir: str, code: str, memory_mb: int) -> List[str]:
+        return ["java", f"-Xmx{memory_mb}m", "-Xss64m", "-XX:+UseSerialGC", "-cp", out_dir, self.main_class(code)]
+
+
+_languages: Dict[str, CompiledLanguage] = {}
+
+
+def register_language(plugin: CompiledLanguage):
+    """注册编译型语言插件（同名插件会被替换）"""
+    _languages[plugin.name] = plugin
+
+
+def get_language(name: str) -> Optional[CompiledLanguage]:
+    """按语言名获取编译型语言插件，未注册时返回None"""
+    return _languages.get(normalize_language(name))
+
+
+def registered_languages() -> List[str]:
+    """已注册的编译型语言"""
+    return sorted(_languages)
+
+
+for _plugin in (CLanguage(), CppLanguage(), JavaLanguage()):
+    register_language(_plugin)
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def make_llm_key(model: str, task: str, input_data: Dict[str, Any], params: Dict[str, Any]) -> str:
+    """LLM请求的内容地址：hash(model, task, prompt/messages, params)"""
+    payload = json.dumps([model, task, input_data, params], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """LLM响应的SQLite磁盘层
+
+    总大小超过 max_bytes 时按最近访问时间淘汰；每写入 compact_every 条在后台线程中整理一次：
+    清理过期条目、淘汰超出上限的条目并归还空闲页。coach 的进程内缓存也使用这一层。
+    """
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, compact_every: int = 100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._compacting = threading.Lock()
+        self._writes = 0
+        self.compactions = 0
+        self._init_sqlite()
+
+    def _init_sqlite(self):
+        """初始化SQLite存储"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            # auto_vacuum 必须在切换到WAL、建表之前设置，之后才能用 incremental_vacuum 归还空闲页；
+            # 旧的缓存文件需要一次VACUUM才能生效
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA journal_mode = DELETE")
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    size INTEGER,
+                    expires_at REAL,
+                    accessed_at REAL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # WAL模式记录在数据库文件中，初始化后每个连接都沿用
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """返回 (响应, 过期时间)，不存在或已过期时返回None"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, expires_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                if row is None or (row[1] is not None and row[1] <= time.time()):
+                    return None
+                conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                return row[0], row[1]
+        except Exception as e:
+            logger.error(f"读取LLM响应缓存失败: {e}")
+            return None
+
+    def put(self, key: str, value: str, expires_at: Optional[float]):
+        """写入一条响应，每写入 compact_every 条触发一次后台整理"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, value, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), expires_at, time.time())
+                )
+        except Exception as e:
+            logger.error(f"写入LLM响应缓存失败: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= self.compact_every
+            if due:
+                self._writes = 0
+        if due:
+            self.compact_async()
+
+    def compact(self):
+        """清理过期条目，按最近访问时间淘汰超出磁盘上限的条目，并归还空闲页"""
+        with self._compacting:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM llm_responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                 (time.time(),))
+                    (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+                    if total > self.max_bytes:
+                        stale = []
+                        for key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY accessed_at"):
+                            if total <= self.max_bytes:
+                                break
+                            stale.append((key,))
+                            total -= size
+                        conn.executemany("DELETE FROM llm_responses WHERE key = ?", stale)
+                    conn.commit()
+                    # execute 每次只执行一步（只归还一页），executescript 才会执行完；checkpoint 后文件才真正缩小
+                    conn.executescript("PRAGMA incremental_vacuum;")
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+                self.compactions += 1
+            except Exception as e:
+                logger.error(f"整理LLM响应缓存失败: {e}")
+
+    def compact_async(self):
+        """在后台线程中整理，已有整理在进行时跳过"""
+        if self._compacting.locked():
+            return
+        threading.Thread(target=self.compact, name="llm-cache-compact", daemon=True).start()
+
+    def clear(self):
+        """清空磁盘层"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """条目数、磁盘占用与整理次数"""
+        try:
+            with self._connect() as conn:
+                entries, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        except Exception:
+            entries, size = 0, 0
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "compactions": self.compactions}
+
+
+class LLMCache:
+    """LLM响应缓存
+
+    内存中按LRU淘汰，最多保留 max_entries 条；同时写入 persist_path 指向的 DiskTier，重启后仍可命中。
+    条目超过 ttl 秒后过期。
+    """
+    def __init__(self, persist_path: str, max_entries: int = 512, max_disk_bytes: int = 256 * 1024 * 1024,
+                 ttl: Optional[float] = 7 * 24 * 3600, compact_every: int = 100):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (响应, 过期时间)
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = DiskTier(persist_path, max_disk_bytes, compact_every)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """查询缓存，未命中或已过期返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        entry = self.disk.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, entry)
+            return entry[0]
+
+    def put(self, key: str, value: str):
+        """写入缓存"""
+        entry = (value, time.time() + self.ttl if self.ttl else None)
+        with self._lock:
+            self._remember(key, entry)
+        self.disk.put(key, *entry)
+
+    def _remember(self, key: str, entry: Tuple[str, Optional[float]]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def compact(self):
+        """整理磁盘层"""
+        self.disk.compact()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计与磁盘占用"""
+        disk = self.disk.stats()
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "disk_entries": disk["entries"],
+            "disk_bytes": disk["bytes"],
+            "max_disk_bytes": disk["max_bytes"],
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "compactions": disk["compactions"],
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+_default_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """获取进程内共享的LLM响应缓存；未设置 LLM_CACHE_PATH 时不缓存，返回None"""
+    global _default_cache
+    path = os.getenv("LLM_CACHE_PATH")
+    if _default_cache is None and path:
+        ttl = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+        _default_cache = LLMCache(
+            persist_path=path,
+            max_entries=int(os.getenv("LLM_CACHE_ENTRIES", 512)),
+            max_disk_bytes=int(float(os.getenv("LLM_CACHE_DISK_MB", 256)) * 1024 * 1024),
+            ttl=ttl if ttl > 0 else None
+        )
+    return _default_cache
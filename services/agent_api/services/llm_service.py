@@ -1,74 +1,142 @@
 import asyncio
+import json
 import os
-import requests
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit
 import logging
 
+import httpx
+
+from .llm_cache import LLMCache, get_llm_cache, make_llm_key
+
 logger = logging.getLogger(__name__)
 
+# 按 (scheme, host, transport) 共享的连接池，同一主机的所有请求复用 keep-alive 连接
+_http_clients: Dict[Tuple[Any, ...], Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+
+
+def get_http_client(url: str, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """获取目标主机的共享HTTP客户端
+
+    连接超时、读取超时与每个主机的最大连接数分别由 LLM_CONNECT_TIMEOUT、LLM_READ_TIMEOUT、
+    LLM_MAX_CONNECTIONS_PER_HOST 配置；事件循环变化时（如测试中每个用例新建循环）重新创建。
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc, transport)
+    loop = asyncio.get_running_loop()
+    entry = _http_clients.get(key)
+    if entry is not None and entry[1] is loop and not entry[0].is_closed:
+        return entry[0]
+    max_connections = int(os.getenv("LLM_MAX_CONNECTIONS_PER_HOST", 20))
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            float(os.getenv("LLM_READ_TIMEOUT", 60)),
+            connect=float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+        ),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", 30))
+        ),
+        transport=transport
+    )
+    _http_clients[key] = (client, loop)
+    return client
+
+
+async def close_http_clients():
+    """关闭当前事件循环上的共享HTTP客户端；其他事件循环上的客户端保持不变，由各自的循环关闭"""
+    loop = asyncio.get_running_loop()
+    for key, (client, client_loop) in list(_http_clients.items()):
+        if client_loop is loop:
+            await client.aclose()
+            del _http_clients[key]
+
 
 class LLMService:
-    """LLM服务"""
-    def __init__(self):
+    """LLM服务
+
+    通过共享的异步连接池调用DashScope，等待响应时不阻塞事件循环，多个会话的请求可以并发进行。
+    设置 LLM_CACHE_PATH 时相同的 (model, prompt, params) 直接复用磁盘缓存中的响应，重启后仍可命中。
+    """
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None, cache: Optional[LLMCache] = None):
         # 从环境变量读取API密钥
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
         if self.api_key:
             logger.info("DASHSCOPE_API_KEY 环境变量已设置")
         else:
             logger.warning("未设置 DASHSCOPE_API_KEY 环境变量，LLM 服务可能无法正常工作")
-        
+
         self.model = "qwen-turbo"
         self.max_retries = 3
         self.retry_delay = 1.0
         self.base_url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+        self._transport = transport  # 测试时可替换为 httpx.MockTransport
+        self.cache = cache if cache is not None else get_llm_cache()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_http_client(self.base_url, self._transport)
+
+    def _headers(self) -> Dict[str, str]:
+        # 检查API密钥是否设置
+        if not self.api_key:
+            logger.error("未设置 DASHSCOPE API 密钥，无法调用 API")
+            raise ValueError("未设置 DASHSCOPE API 密钥")
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _request(self, task: str, input_data: Dict[str, Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """构建请求数据"""
+        return {
+            "model": self.model,
+            "task": task,
+            "input": input_data,
+            "parameters": {
+                "max_tokens": kwargs.get("max_tokens", 1000),
+                "temperature": kwargs.get("temperature", 0.7),
+                **kwargs
+            }
+        }
+
+    def _cache_key(self, data: Dict[str, Any], fmt: str = "text") -> Optional[str]:
+        """请求的缓存键；fmt 区分缓存的是文本还是完整JSON响应，文本的流式与非流式请求共用"""
+        if self.cache is None:
+            return None
+        params = {k: v for k, v in data["parameters"].items() if k != "incremental_output"}
+        return make_llm_key(data["model"], f"{data['task']}:{fmt}", data["input"], params)
+
+    async def _post(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """发送请求并返回JSON响应"""
+        headers = self._headers()
+        response = await self.client.post(self.base_url, headers=headers, json=data)
+
+        # 检查响应状态
+        try:
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"API请求失败: {e}")
+            logger.error(f"响应内容: {response.text}")
+            raise
+        return response.json()
 
     async def generate(self, prompt: str, **kwargs) -> str:
         """生成文本"""
+        data = self._request("text-generation", {"prompt": prompt}, kwargs)
+        key = self._cache_key(data)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached.strip()
         for attempt in range(self.max_retries):
             try:
-                # 检查API密钥是否设置
-                if not self.api_key:
-                    logger.error("未设置 DASHSCOPE API 密钥，无法调用 API")
-                    raise ValueError("未设置 DASHSCOPE API 密钥")
-                
-                # 构建请求数据
-                data = {
-                    "model": self.model,
-                    "task": "text-generation",
-                    "input": {
-                        "prompt": prompt
-                    },
-                    "parameters": {
-                        "max_tokens": kwargs.get("max_tokens", 1000),
-                        "temperature": kwargs.get("temperature", 0.7),
-                        **kwargs
-                    }
-                }
-                
-                # 设置请求头
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                # 发送请求
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    json=data
-                )
-                
-                # 检查响应状态
-                try:
-                    response.raise_for_status()
-                except Exception as e:
-                    logger.error(f"API请求失败: {e}")
-                    logger.error(f"响应内容: {response.text}")
-                    raise
-                
                 # 提取生成的文本
-                result = response.json()
+                result = await self._post(data)
                 generated_text = result["output"]["text"].strip()
+                if key is not None:
+                    self.cache.put(key, generated_text)
                 return generated_text
             except ValueError as e:
                 # API密钥错误，不需要重试
@@ -84,51 +152,19 @@ class LLMService:
 
     async def chat_completion(self, messages: list, **kwargs) -> Dict[str, Any]:
         """聊天完成"""
+        data = self._request("chat-completions", {"messages": messages}, kwargs)
+        key = self._cache_key(data, "json")
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
         for attempt in range(self.max_retries):
             try:
-                # 检查API密钥是否设置
-                if not self.api_key:
-                    logger.error("未设置 DASHSCOPE API 密钥，无法调用 API")
-                    raise ValueError("未设置 DASHSCOPE API 密钥")
-                
-                # 构建请求数据
-                data = {
-                    "model": self.model,
-                    "task": "chat-completions",
-                    "input": {
-                        "messages": messages
-                    },
-                    "parameters": {
-                        "max_tokens": kwargs.get("max_tokens", 1000),
-                        "temperature": kwargs.get("temperature", 0.7),
-                        **kwargs
-                    }
-                }
-                
-                # 设置请求头
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                # 发送请求
                 # 使用与文本生成相同的API端点
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    json=data
-                )
-                
-                # 检查响应状态
-                try:
-                    response.raise_for_status()
-                except Exception as e:
-                    logger.error(f"API请求失败: {e}")
-                    logger.error(f"响应内容: {response.text}")
-                    raise
-                
-                # 返回响应
-                return response.json()
+                result = await self._post(data)
+                if key is not None:
+                    self.cache.put(key, json.dumps(result, ensure_ascii=False))
+                return result
             except ValueError as e:
                 # API密钥错误，不需要重试
                 logger.error(f"值错误: {e}")
@@ -140,3 +176,76 @@ class LLMService:
                     await asyncio.sleep(self.retry_delay * (2 ** attempt))
                 else:
                     raise
+
+    async def stream_generate(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """流式生成文本，逐段产出新增的内容"""
+        async for token in self._stream("text-generation", {"prompt": prompt}, kwargs):
+            yield token
+
+    async def stream_chat_completion(self, messages: list, **kwargs) -> AsyncIterator[str]:
+        """流式聊天完成，逐段产出新增的内容"""
+        async for token in self._stream("chat-completions", {"messages": messages}, kwargs):
+            yield token
+
+    async def _stream(self, task: str, input_data: Dict[str, Any], kwargs: Dict[str, Any]) -> AsyncIterator[str]:
+        """以SSE方式请求增量输出；尚未产出任何内容时失败才重试
+
+        缓存命中时一次性产出完整文本；完整结束的流写入缓存。
+        """
+        data = self._request(task, input_data, {**kwargs, "incremental_output": True})
+        key = self._cache_key(data)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        for attempt in range(self.max_retries):
+            produced = False
+            complete = True
+            tokens = []
+            try:
+                headers = {**self._headers(), "Accept": "text/event-stream", "X-DashScope-SSE": "enable"}
+                async with self.client.stream("POST", self.base_url, headers=headers, json=data) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        logger.error(f"API请求失败: {response.status_code}")
+                        logger.error(f"响应内容: {response.text}")
+                        response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        try:
+                            payload = json.loads(line[len("data:"):])
+                        except json.JSONDecodeError as e:
+                            # 单个数据块损坏时跳过，不当作API密钥错误；这样的输出不完整，不写入缓存
+                            logger.warning(f"跳过无法解析的SSE数据块: {e}")
+                            complete = False
+                            continue
+                        token = _chunk_text(payload)
+                        if token:
+                            produced = True
+                            tokens.append(token)
+                            yield token
+                if key is not None and tokens and complete:
+                    self.cache.put(key, "".join(tokens))
+                return
+            except ValueError as e:
+                # API密钥错误，不需要重试
+                logger.error(f"值错误: {e}")
+                raise
+            except Exception as e:
+                logger.error(f"LLM流式调用失败 (尝试 {attempt+1}/{self.max_retries}): {e}")
+                if produced or attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(self.retry_delay * (2 ** attempt))
+
+
+def _chunk_text(payload: Dict[str, Any]) -> str:
+    """SSE数据块中的增量文本（兼容 text 与 message 两种结果格式）"""
+    output = payload.get("output") or {}
+    if output.get("text"):
+        return output["text"]
+    choices = output.get("choices") or []
+    if choices:
+        return (choices[0].get("message") or {}).get("content") or ""
+    return ""
@@ -0,0 +1,358 @@
+// Node.js常驻执行worker
+//
+// 由 NodeWorkerPool 以独立进程启动，协议与 python_worker.py 相同：
+// stdin/stdout 上收发 4字节大端长度 + UTF-8 JSON 的帧。
+// 每次运行在全新的 vm 上下文中执行用户代码，上下文中的 console、process、require
+// 都是替身：标准输入来自任务的 input，输出写入缓冲区，不会破坏协议。
+// vm 不是安全边界，资源隔离依赖进程本身（堆上限、超时后由池杀掉并替换）。
+'use strict';
+
+const fs = require('fs');
+const util = require('util');
+const vm = require('vm');
+
+const MB = 1024 * 1024;
+// 允许用户代码 require 的内置模块（fs、readline 使用替身）
+const ALLOWED_MODULES = new Set(['util', 'assert', 'events', 'string_decoder']);
+
+class ProcessExit {
+  constructor(code) {
+    this.code = code;
+  }
+}
+
+class OutputLimitExceeded {}
+
+// 有上限的输出缓冲：只保留开头与结尾各 limit/2 字节，累计超过 limit 时中止运行
+class CappedOutput {
+  constructor(limit) {
+    this.limit = limit;
+    this.total = 0;
+    this.head = [];
+    this.headBytes = 0;
+    this.tail = Buffer.alloc(0);
+  }
+
+  get truncated() {
+    return Boolean(this.limit) && this.total > this.limit;
+  }
+
+  write(text) {
+    let data = Buffer.from(text, 'utf8');
+    this.total += data.length;
+    if (!this.limit) {
+      this.head.push(data);
+      return;
+    }
+    const half = Math.floor(this.limit / 2);
+    const room = half - this.headBytes;
+    if (room > 0) {
+      this.head.push(data.subarray(0, room));
+      this.headBytes += Math.min(room, data.length);
+      data = data.subarray(room);
+    }
+    if (data.length) {
+      const tail = Buffer.concat([this.tail, data]);
+      this.tail = tail.subarray(Math.max(0, tail.length - (this.limit - half)));
+    }
+    if (this.total > this.limit) {
+      throw new OutputLimitExceeded();
+    }
+  }
+
+  text() {
+    const head = Buffer.concat(this.head).toString('utf8');
+    const tail = this.tail.toString('utf8');
+    if (!this.truncated) {
+      return head + tail;
+    }
+    const omitted = this.total - this.headBytes - this.tail.length;
+    return `${head}\n...（输出超过 ${this.limit} 字节，省略 ${omitted} 字节）...\n${tail}`;
+  }
+}
+
+function writeFrame(obj) {
+  const body = Buffer.from(JSON.stringify(obj), 'utf8');
+  const header = Buffer.alloc(4);
+  header.writeUInt32BE(body.length, 0);
+  process.stdout.write(Buffer.concat([header, body]));
+}
+
+function resetPeakRss() {
+  try {
+    fs.writeFileSync('/proc/self/clear_refs', '5');
+  } catch (e) {
+    // 非Linux平台无法重置
+  }
+}
+
+function peakRss() {
+  try {
+    const match = /VmHWM:\s+(\d+)/.exec(fs.readFileSync('/proc/self/status', 'utf8'));
+    if (match) {
+      return Number(match[1]) * 1024;
+    }
+  } catch (e) {
+    // 退化为当前RSS
+  }
+  return process.memoryUsage().rss;
+}
+
+// 在上下文内执行的运行时：标准输入事件与定时器都在上下文中派发，
+// 因此 vm 的 timeout 同样覆盖回调中的代码
+const RUNTIME = `
+(function (host) {
+  const listeners = { stdin: {}, lines: [] };
+  const timers = [];
+  let timerSeq = 0;
+
+  function on(table, event, fn) {
+    (table[event] = table[event] || []).push(fn);
+  }
+
+  const stdin = {
+    fd: 0,
+    isTTY: false,
+    setEncoding() { return stdin; },
+    resume() { return stdin; },
+    pause() { return stdin; },
+    on(event, fn) { on(listeners.stdin, event, fn); return stdin; },
+    once(event, fn) { on(listeners.stdin, event, fn); return stdin; },
+    addListener(event, fn) { on(listeners.stdin, event, fn); return stdin; },
+    read() { return host.input; },
+  };
+
+  globalThis.process = {
+    argv: ['node', 'solution.js'],
+    env: {},
+    platform: host.platform,
+    version: host.version,
+    exitCode: undefined,
+    stdin: stdin,
+    stdout: { write(s) { host.out(String(s)); return true; }, isTTY: false },
+    stderr: { write(s) { host.err(String(s)); return true; }, isTTY: false },
+    exit(code) { host.exit(code === undefined ? globalThis.process.exitCode : code); },
+    hrtime: host.hrtime,
+    memoryUsage: host.memoryUsage,
+    nextTick(fn, ...args) { Promise.resolve().then(() => fn(...args)); },
+    on() { return globalThis.process; },
+  };
+
+  globalThis.console = {
+    log(...args) { host.out(host.format(...args) + '\\n'); },
+    info(...args) { host.out(host.format(...args) + '\\n'); },
+    error(...args) { host.err(host.format(...args) + '\\n'); },
+    warn(...args) { host.err(host.format(...args) + '\\n'); },
+    debug(...args) { host.err(host.format(...args) + '\\n'); },
+  };
+
+  globalThis.setTimeout = function (fn, delay, ...args) {
+    const id = ++timerSeq;
+    timers.push({ id, due: Number(delay) || 0, fn, args });
+    return id;
+  };
+  globalThis.setImmediate = (fn, ...args) => globalThis.setTimeout(fn, 0, ...args);
+  globalThis.clearTimeout = globalThis.clearImmediate = function (id) {
+    const i = timers.findIndex((t) => t.id === id);
+    if (i >= 0) timers.splice(i, 1);
+  };
+  globalThis.queueMicrotask = (fn) => Promise.resolve().then(fn);
+
+  function createInterface() {
+    const rl = {
+      on(event, fn) { on(listeners, event === 'line' ? 'lines' : event, fn); return rl; },
+      once(event, fn) { return rl.on(event, fn); },
+      close() {},
+      setPrompt() {},
+      prompt() {},
+      [Symbol.asyncIterator]: async function* () {
+        for (const line of splitLines()) yield line;
+      },
+    };
+    return rl;
+  }
+
+  function splitLines() {
+    if (host.input === '') return [];
+    const lines = host.input.split(/\\r?\\n/);
+    if (lines[lines.length - 1] === '') lines.pop();
+    return lines;
+  }
+
+  const fsShim = {
+    readFileSync(file, options) {
+      if (file === 0 || file === '/dev/stdin') {
+        const encoding = typeof options === 'string' ? options : options && options.encoding;
+        return encoding ? host.input : host.inputBuffer();
+      }
+      throw new Error('不允许读取文件: ' + file);
+    },
+  };
+
+  globalThis.require = function (name) {
+    const id = String(name).replace(/^node:/, '');
+    if (id === 'fs') return fsShim;
+    if (id === 'readline') return { createInterface };
+    return host.require(id);
+  };
+  globalThis.module = { exports: {} };
+  globalThis.exports = globalThis.module.exports;
+
+  // 脚本执行完后派发输入事件与定时器
+  return function flush() {
+    const emit = (fns, ...args) => (fns || []).forEach((fn) => fn(...args));
+    emit(listeners.stdin.data, host.input);
+    emit(listeners.stdin.end);
+    emit(listeners.stdin.close);
+    const lineFns = listeners.lines || [];
+    if (lineFns.length || listeners.close) {
+      for (const line of splitLines()) emit(lineFns, line);
+      emit(listeners.close);
+    }
+    while (timers.length) {
+      timers.sort((a, b) => a.due - b.due || a.id - b.id);
+      const t = timers.shift();
+      t.fn(...t.args);
+    }
+  };
+})
+`;
+
+function createHost(input, output) {
+  return {
+    input,
+    inputBuffer: () => Buffer.from(input, 'utf8'),
+    platform: process.platform,
+    version: process.version,
+    out: (s) => output.stdout.write(s),
+    err: (s) => output.stderr.write(s),
+    exit: (code) => {
+      throw new ProcessExit(code || 0);
+    },
+    format: util.format,
+    hrtime: process.hrtime,
+    memoryUsage: process.memoryUsage,
+    require: (id) => {
+      if (!ALLOWED_MODULES.has(id)) {
+        throw new Error('不允许加载模块: ' + id);
+      }
+      return require(id);
+    },
+  };
+}
+
+function formatError(err) {
+  if (err && err.stack) {
+    let lines = err.stack.split('\n');
+    if (lines[0].includes('node_worker.js')) {
+      // 替身抛出的错误：去掉指向worker源码的位置提示
+      lines = lines.slice(lines.indexOf('') + 1);
+    }
+    // 只保留用户代码部分的调用栈
+    return lines.filter((line) => !/^\s+at /.test(line) || line.includes('solution.js')).join('\n');
+  }
+  return String(err);
+}
+
+function runJob(script, input, limits) {
+  const outputLimit = limits && limits.output_bytes;
+  const output = { stdout: new CappedOutput(outputLimit), stderr: new CappedOutput(outputLimit) };
+  const timeout = limits && limits.cpu_time ? Math.ceil(limits.cpu_time * 1000) : undefined;
+  const report = (message) => {
+    try {
+      output.stderr.write(message + '\n');
+    } catch (e) {
+      // 已达输出上限
+    }
+  };
+  let status = 'OK';
+
+  resetPeakRss();
+  const cpuStart = process.cpuUsage();
+  const start = process.hrtime.bigint();
+  try {
+    if (script instanceof Error) {
+      throw script;
+    }
+    const context = vm.createContext({}, { microtaskMode: 'afterEvaluate' });
+    const flush = vm.runInContext(RUNTIME, context)(createHost(input, output));
+    script.runInContext(context, { timeout });
+    context.__flush = flush;
+    vm.runInContext('__flush()', context, { timeout });
+  } catch (err) {
+    if (err instanceof ProcessExit) {
+      status = err.code ? 'RE' : 'OK';
+    } else if (err instanceof OutputLimitExceeded) {
+      status = 'OLE';
+    } else if (err && err.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+      status = 'TLE';
+      report('超出时间限制');
+    } else if (err && err.name === 'RangeError' && /memory|allocation/i.test(err.message)) {
+      status = 'MLE';
+      report('超出内存限制');
+    } else {
+      status = 'RE';
+      report(formatError(err));
+    }
+  }
+  // 用户代码可能捕获了中止异常，以实际输出量为准
+  const truncated = output.stdout.truncated || output.stderr.truncated;
+  if (truncated) {
+    status = 'OLE';
+  }
+  const cpu = process.cpuUsage(cpuStart);
+  let error = output.stderr.text();
+  if (truncated) {
+    error = (error ? error.replace(/\n+$/, '') + '\n' : '') + `输出超过 ${outputLimit} 字节，运行已被终止`;
+  }
+  return {
+    ok: status === 'OK',
+    status,
+    output: output.stdout.text(),
+    error: error || null,
+    truncated,
+    execution_time: Number(process.hrtime.bigint() - start) / 1e9,
+    cpu_time: (cpu.user + cpu.system) / 1e6,
+    memory_usage: peakRss() / MB,
+  };
+}
+
+function compileScript(code) {
+  try {
+    return new vm.Script(code, { filename: 'solution.js' });
+  } catch (err) {
+    return err;
+  }
+}
+
+function handle(job) {
+  const script = compileScript(job.code || '');
+  if (job.cases) {
+    job.cases.forEach((input, index) => {
+      writeFrame(Object.assign(runJob(script, input, job.limits), { index }));
+    });
+    writeFrame({ done: true, rss: process.memoryUsage().rss });
+    return;
+  }
+  const result = runJob(script, job.input || '', job.limits);
+  result.rss = process.memoryUsage().rss;
+  writeFrame(result);
+}
+
+function main() {
+  let buffer = Buffer.alloc(0);
+  process.stdin.on('data', (chunk) => {
+    buffer = Buffer.concat([buffer, chunk]);
+    while (buffer.length >= 4) {
+      const length = buffer.readUInt32BE(0);
+      if (buffer.length < 4 + length) break;
+      const job = JSON.parse(buffer.subarray(4, 4 + length).toString('utf8'));
+      buffer = buffer.subarray(4 + length);
+      handle(job);
+    }
+  });
+  process.stdin.on('end', () => process.exit(0));
+  writeFrame({ ready: true, pid: process.pid });
+}
+
+main();
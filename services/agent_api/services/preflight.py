@@ -0,0 +1,104 @@
+import ast
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from .languages import normalize_language
+
+# 视为程序入口的函数/类名
+ENTRYPOINT_NAMES = {"main", "solve", "Solution"}
+
+_JS_ENTRYPOINT_RE = re.compile(
+    r"\b(?:function\s+(?:main|solve)\b|class\s+Solution\b|console\.log|process\.stdout|process\.stdin|"
+    r"readFileSync|readline)"
+)
+_NATIVE_ENTRYPOINT_RE = {
+    "c": re.compile(r"\bmain\s*\("),
+    "cpp": re.compile(r"\bmain\s*\("),
+    "java": re.compile(r"\bstatic\s+(?:public\s+)?void\s+main\s*\("),
+}
+
+
+@dataclass
+class PreflightResult:
+    """执行前检查结果"""
+    format_ok: bool  # 语法正确
+    entrypoint_detected: bool  # 存在可运行入口
+    error: Optional[str] = None
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.format_ok and self.entrypoint_detected
+
+
+def _python_entrypoint(tree: ast.Module) -> bool:
+    """存在 main/solve/Solution 定义，或有在顶层执行的语句（读输入、打印、调用函数等）"""
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if node.name in ENTRYPOINT_NAMES:
+                return True
+        elif isinstance(node, (ast.Expr, ast.If, ast.For, ast.While, ast.With, ast.Try)):
+            return True
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)) and any(
+                isinstance(child, ast.Call) for child in ast.walk(node)):
+            return True
+    return False
+
+
+def check_python(code: str) -> PreflightResult:
+    """在当前进程内编译代码并检查入口，不启动任何进程"""
+    try:
+        tree = ast.parse(code, "solution.py")
+        compile(tree, "solution.py", "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return PreflightResult(
+            format_ok=False,
+            entrypoint_detected=False,
+            error=f"语法错误（第{e.lineno}行）：{e.msg}" + (f"\n{e.text.rstrip()}" if e.text else ""),
+            line=e.lineno,
+            column=e.offset
+        )
+    except (ValueError, RecursionError) as e:
+        # 源码含空字符或嵌套过深
+        return PreflightResult(format_ok=False, entrypoint_detected=False, error=f"代码无法编译：{e}")
+    if not _python_entrypoint(tree):
+        return PreflightResult(
+            format_ok=True,
+            entrypoint_detected=False,
+            error="未找到程序入口：请定义 main / solve 函数或 Solution 类，并在顶层读取输入、输出结果"
+        )
+    return PreflightResult(format_ok=True, entrypoint_detected=True)
+
+
+def check_javascript(code: str) -> PreflightResult:
+    """JavaScript只做入口的静态检查，语法错误由Node worker编译时报告"""
+    if not _JS_ENTRYPOINT_RE.search(code):
+        return PreflightResult(
+            format_ok=True,
+            entrypoint_detected=False,
+            error="未找到程序入口：请定义 main / solve 函数或 Solution 类，并读取标准输入、输出结果"
+        )
+    return PreflightResult(format_ok=True, entrypoint_detected=True)
+
+
+def check_native(code: str, language: str) -> PreflightResult:
+    """编译型语言只检查 main 函数，语法错误由编译器报告"""
+    if not _NATIVE_ENTRYPOINT_RE[language].search(code):
+        return PreflightResult(format_ok=True, entrypoint_detected=False, error="未找到 main 函数")
+    return PreflightResult(format_ok=True, entrypoint_detected=True)
+
+
+def check_code(code: str, language: str) -> PreflightResult:
+    """按语言做执行前检查，未知语言不做检查"""
+    if not code.strip():
+        return PreflightResult(format_ok=False, entrypoint_detected=False, error="代码为空")
+    language = normalize_language(language)
+    if language == "python":
+        return check_python(code)
+    if language == "javascript":
+        return check_javascript(code)
+    if language in _NATIVE_ENTRYPOINT_RE:
+        return check_native(code, language)
+    return PreflightResult(format_ok=True, entrypoint_detected=True)
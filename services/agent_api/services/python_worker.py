@@ -0,0 +1,404 @@
+"""Python常驻执行worker
+
+由 PythonWorkerPool 以独立进程启动，通过 stdin/stdout 管道收发长度前缀的 JSON 帧：
+每个任务包含 code、input 与可选的 limits（cpu_time 秒 / memory_mb / output_bytes），
+返回 ok/output/error/status/truncated，以及墙钟时间、CPU时间（user+sys）和峰值内存；
+批量任务包含 code 与 cases（输入列表），代码只编译一次，每个用例返回一帧，最后返回 done 帧。
+status 取值：OK / RE（运行错误）/ TLE（超出CPU时间）/ MLE（超出内存）/ OLE（输出超限）。
+启动参数 --preload 指定预先导入的模块（逗号分隔）；--fork 时worker作为zygote常驻，
+每个任务 fork 一个子进程执行，子进程通过写时复制继承已导入的模块，CPU时间与峰值内存由 os.wait4 测量，
+limits 中的 wall_time（秒）超时后子进程被杀死，zygote 本身继续服务。
+本文件只依赖标准库，既可作为脚本运行，也可被导入以复用帧读写函数。
+"""
+import argparse
+import builtins
+import importlib
+import io
+import json
+import math
+import os
+import resource
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+# 帧格式：4字节大端长度 + UTF-8 JSON
+FRAME_HEADER = struct.Struct(">I")
+
+MB = 1024 * 1024
+
+
+class CpuLimitExceeded(BaseException):
+    """超出CPU时间限制（继承BaseException，避免被用户代码的 except Exception 吞掉）"""
+
+
+class OutputLimitExceeded(BaseException):
+    """输出超过上限"""
+
+
+_in_job = False
+
+
+def _on_sigxcpu(signum, frame):
+    if _in_job:
+        raise CpuLimitExceeded()
+
+
+def read_frame(stream) -> Optional[Dict[str, Any]]:
+    """读取一帧，流结束时返回None"""
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+def write_frame(stream, obj: Dict[str, Any]):
+    """写入一帧"""
+    body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    stream.write(FRAME_HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def _statm(field: int) -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[field]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def current_rss() -> int:
+    """当前常驻内存（字节）"""
+    try:
+        return _statm(1)
+    except (OSError, ValueError, IndexError):
+        # 非Linux平台退化为峰值RSS（Linux单位为KB）
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss():
+    """重置进程的峰值RSS（VmHWM），使每个任务单独统计"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss() -> int:
+    """自上次重置以来的峰值RSS（字节）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cpu_seconds() -> float:
+    """进程累计CPU时间（user+sys）"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Limits:
+    """在单个任务期间生效的 rlimit
+
+    RLIMIT_CPU 是进程累计值，因此软限制设为“已用CPU时间 + 本次额度”；
+    RLIMIT_AS 设为“当前地址空间 + 本次额度”。任务结束后恢复原值。
+    """
+    def __init__(self, limits: Optional[Dict[str, Any]]):
+        limits = limits or {}
+        self.cpu_time = limits.get("cpu_time")
+        self.memory_mb = limits.get("memory_mb")
+        self._saved = {}
+
+    def __enter__(self):
+        if self.cpu_time:
+            self._set(resource.RLIMIT_CPU, math.ceil(cpu_seconds() + self.cpu_time))
+        if self.memory_mb:
+            try:
+                base = _statm(0)
+            except (OSError, ValueError, IndexError):
+                base = 0
+            self._set(resource.RLIMIT_AS, base + int(self.memory_mb * MB))
+        return self
+
+    def _set(self, which: int, soft: int):
+        current_soft, hard = resource.getrlimit(which)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(which, (soft, hard))
+            self._saved[which] = (current_soft, hard)
+        except (ValueError, OSError):
+            pass
+
+    def __exit__(self, *exc):
+        for which, saved in self._saved.items():
+            resource.setrlimit(which, saved)
+        self._saved.clear()
+        return False
+
+
+class CappedBuffer(io.BytesIO):
+    """有上限的输出缓冲
+
+    只保留开头与结尾各 limit//2 字节，内存占用与输出总量无关；
+    累计写入超过 limit 字节时抛出 OutputLimitExceeded。limit 为None时不设上限。
+    """
+    def __init__(self, limit: Optional[int] = None):
+        super().__init__()
+        self.limit = limit
+        self.total = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    @property
+    def truncated(self) -> bool:
+        return self.limit is not None and self.total > self.limit
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        n = len(data)
+        self.total += n
+        if self.limit is None:
+            self._head += data
+            return n
+        half = self.limit // 2
+        room = half - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data:
+            self._tail += data
+            del self._tail[:max(0, len(self._tail) - (self.limit - half))]
+        if self.total > self.limit:
+            raise OutputLimitExceeded()
+        return n
+
+    def text(self) -> str:
+        """已保留的输出；截断时在开头与结尾之间注明省略的字节数"""
+        head = self._head.decode("utf-8", errors="replace")
+        tail = self._tail.decode("utf-8", errors="replace")
+        if not self.truncated:
+            return head + tail
+        omitted = self.total - len(self._head) - len(self._tail)
+        return f"{head}\n...（输出超过 {self.limit} 字节，省略 {omitted} 字节）...\n{tail}"
+
+
+def run_job(code, input_data: str, limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """在全新的 __main__ 命名空间中执行一次用户代码（源码或已编译的code对象）"""
+    global _in_job
+    output_limit = (limits or {}).get("output_bytes")
+    stdin = io.TextIOWrapper(io.BytesIO(input_data.encode("utf-8")), encoding="utf-8")
+    stdout = io.TextIOWrapper(CappedBuffer(output_limit), encoding="utf-8")
+    stderr = io.TextIOWrapper(CappedBuffer(output_limit), encoding="utf-8")
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = stdin, stdout, stderr
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    status = "OK"
+    try:
+        if isinstance(code, str):
+            code = compile(code, "<solution>", "exec")
+        with Limits(limits):
+            _in_job = True
+            try:
+                exec(code, namespace)
+            finally:
+                _in_job = False
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status = "RE"
+    except OutputLimitExceeded:
+        status = "OLE"
+    except CpuLimitExceeded:
+        status = "TLE"
+        _report(stderr, "超出CPU时间限制")
+    except MemoryError:
+        status = "MLE"
+        _report(stderr, "超出内存限制")
+    except BaseException as e:
+        status = "RE"
+        # 跳过worker自身的栈帧，只保留用户代码部分
+        _report(stderr, "".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next)).rstrip("\n"))
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved
+        namespace.clear()
+
+    for stream in (stdout, stderr):
+        try:
+            stream.flush()
+        except OutputLimitExceeded:
+            status = "OLE"
+    # 用户代码可能捕获了中止异常，以实际输出量为准
+    truncated = stdout.buffer.truncated or stderr.buffer.truncated
+    if truncated:
+        status = "OLE"
+    error = stderr.buffer.text()
+    if truncated:
+        error = (error.rstrip("\n") + "\n" if error else "") + f"输出超过 {output_limit} 字节，运行已被终止"
+    return {
+        "ok": status == "OK",
+        "status": status,
+        "output": stdout.buffer.text(),
+        "error": error or None,
+        "truncated": truncated,
+    }
+
+
+def _report(stream, message: str):
+    """向用户代码的stderr追加一行说明（已达输出上限时忽略）"""
+    try:
+        print(message, file=stream)
+    except OutputLimitExceeded:
+        pass
+
+
+def timed_job(code, input_data: str, limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """执行并测量墙钟时间、CPU时间与峰值内存（MB）"""
+    reset_peak_rss()
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    result = run_job(code, input_data, limits)
+    result["execution_time"] = time.perf_counter() - start
+    result["cpu_time"] = cpu_seconds() - cpu_start
+    result["memory_usage"] = peak_rss() / MB
+    return result
+
+
+def _child_failure(status: int, usage, limits: Optional[Dict[str, Any]], timed_out: bool,
+                   elapsed: float) -> Dict[str, Any]:
+    """子进程未回传结果（被杀死或直接退出）时的结果"""
+    cpu_limit = (limits or {}).get("cpu_time")
+    if timed_out:
+        status_code, error = "TLE", "执行超时"
+    elif os.WIFSIGNALED(status) and cpu_limit and usage.ru_utime + usage.ru_stime >= cpu_limit:
+        status_code, error = "TLE", "超出CPU时间限制"
+    elif os.WIFSIGNALED(status):
+        status_code, error = "RE", f"进程被信号 {os.WTERMSIG(status)} 终止"
+    else:
+        status_code, error = "RE", f"进程异常退出（退出码 {os.waitstatus_to_exitcode(status)}）"
+    return {"ok": False, "status": status_code, "output": "", "error": error, "truncated": False,
+            "execution_time": elapsed}
+
+
+def forked_job(code, input_data: str, limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """fork 一个子进程执行任务，结果经管道回传
+
+    子进程是当前进程（已预导入模块、已编译代码）的写时复制副本，执行完即退出，
+    用户代码对全局状态的修改不会影响后续任务。
+    """
+    wall_time = (limits or {}).get("wall_time")
+    read_fd, write_fd = os.pipe()
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            result = run_job(code, input_data, limits)
+            result["execution_time"] = time.perf_counter() - start
+            with os.fdopen(write_fd, "wb") as out:
+                write_frame(out, result)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    chunks = []
+    timed_out = False
+    deadline = start + wall_time if wall_time else None
+    try:
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            ready, _, _ = select.select([read_fd], [], [], wait)
+            if not ready:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                break
+            chunk = os.read(read_fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+    _, status, usage = os.wait4(pid, 0)
+    elapsed = time.perf_counter() - start
+
+    body = b"".join(chunks)
+    if timed_out or len(body) < FRAME_HEADER.size:
+        result = _child_failure(status, usage, limits, timed_out, wall_time if timed_out else elapsed)
+    else:
+        result = json.loads(body[FRAME_HEADER.size:].decode("utf-8"))
+    result["cpu_time"] = usage.ru_utime + usage.ru_stime
+    result["memory_usage"] = usage.ru_maxrss * 1024 / MB  # Linux下 ru_maxrss 单位为KB
+    return result
+
+
+def preload(modules: List[str]):
+    """预先导入常用模块，不存在的模块忽略"""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def run_batch(proto_out, code: str, cases: List[str], limits: Optional[Dict[str, Any]] = None,
+              fork: bool = False):
+    """编译一次，逐个用例执行并立即回传结果"""
+    try:
+        code_obj = compile(code, "<solution>", "exec")
+    except SyntaxError:
+        error = traceback.format_exc(limit=0)
+        for index in range(len(cases)):
+            write_frame(proto_out, {"index": index, "ok": False, "status": "RE", "output": "", "error": error,
+                                    "truncated": False, "execution_time": 0.0, "cpu_time": 0.0,
+                                    "memory_usage": None})
+    else:
+        for index, input_data in enumerate(cases):
+            result = (forked_job if fork else timed_job)(code_obj, input_data, limits)
+            result["index"] = index
+            write_frame(proto_out, result)
+    write_frame(proto_out, {"done": True, "rss": current_rss()})
+
+
+def main():
+    """worker主循环"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preload", default="", help="预先导入的模块，逗号分隔")
+    parser.add_argument("--fork", action="store_true", help="每个任务在fork出的子进程中执行")
+    args = parser.parse_args()
+    fork = args.fork and hasattr(os, "fork")
+    preload([name for name in args.preload.split(",") if name])
+
+    # 协议使用复制出的文件描述符，0/1 指向 /dev/null，避免用户代码直接写 fd 破坏协议
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    signal.signal(signal.SIGXCPU, _on_sigxcpu)
+    write_frame(proto_out, {"ready": True, "pid": os.getpid()})
+    while True:
+        job = read_frame(proto_in)
+        if job is None:
+            break
+        if "cases" in job:
+            run_batch(proto_out, job.get("code", ""), job["cases"], job.get("limits"), fork)
+            continue
+        result = (forked_job if fork else timed_job)(job.get("code", ""), job.get("input", ""), job.get("limits"))
+        result["rss"] = current_rss()
+        write_frame(proto_out, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(language: str, code: str, input_data: str, limits: Optional[Dict[str, Any]] = None) -> str:
+    """运行结果的内容地址：hash(language, code, input, limits)"""
+    payload = json.dumps([language, code, input_data, limits or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """代码运行结果缓存
+
+    内存中按LRU淘汰，最多保留 max_entries 条；设置 persist_path 时同时写入SQLite，
+    重启后仍可命中，磁盘上最多保留 max_disk_entries 条（按最近访问时间淘汰）。
+    """
+    def __init__(self, max_entries: int = 1024, persist_path: Optional[str] = None,
+                 max_disk_entries: int = 100000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if persist_path:
+            self._init_sqlite()
+
+    def _init_sqlite(self):
+        """初始化SQLite存储"""
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(self.persist_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS run_results (
+                    key TEXT PRIMARY KEY,
+                    result_json TEXT,
+                    accessed_at REAL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_run_results_accessed ON run_results (accessed_at)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """查询缓存，未命中返回None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(result)
+
+        result = self._load(key) if self.persist_path else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+            return dict(result)
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """写入缓存"""
+        with self._lock:
+            self._remember(key, dict(result))
+        if self.persist_path:
+            self._store(key, result)
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with sqlite3.connect(self.persist_path) as conn:
+                row = conn.execute("SELECT result_json FROM run_results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE run_results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                return json.loads(row[0])
+        except Exception as e:
+            logger.error(f"读取运行结果缓存失败: {e}")
+            return None
+
+    def _store(self, key: str, result: Dict[str, Any]):
+        try:
+            with sqlite3.connect(self.persist_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO run_results (key, result_json, accessed_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(result, ensure_ascii=False), time.time())
+                )
+                # 超出磁盘上限时淘汰最久未访问的条目
+                (count,) = conn.execute("SELECT COUNT(*) FROM run_results").fetchone()
+                if count > self.max_disk_entries:
+                    conn.execute(
+                        "DELETE FROM run_results WHERE key IN "
+                        "(SELECT key FROM run_results ORDER BY accessed_at LIMIT ?)",
+                        (count - self.max_disk_entries,)
+                    )
+        except Exception as e:
+            logger.error(f"写入运行结果缓存失败: {e}")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+        if self.persist_path:
+            with sqlite3.connect(self.persist_path) as conn:
+                conn.execute("DELETE FROM run_results")
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """获取进程内共享的运行结果缓存"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache(
+            max_entries=int(os.getenv("RUNNER_CACHE_ENTRIES", 1024)),
+            persist_path=os.getenv("RUNNER_CACHE_PATH") or None
+        )
+    return _default_cache
@@ -0,0 +1,98 @@
+import json
+import os
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
+import logging
+
+import httpx
+
+from .runner_service import RunnerService
+from .scheduler import QueueFullError
+from ..schemas.state import TestCaseResult
+
+logger = logging.getLogger(__name__)
+
+
+class RunnerClient:
+    """runner_api 的客户端，接口与 RunnerService 一致
+
+    所有请求共用一个 keep-alive 连接池；runner_api 队列已满（503）时抛出 QueueFullError。
+    """
+    def __init__(self, base_url: str, timeout: float = 60, max_connections: int = 100,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self._timeout = httpx.Timeout(timeout, connect=5)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self._timeout,
+                                             limits=self._limits, transport=self._transport)
+        return self._client
+
+    def _check(self, response: httpx.Response):
+        if response.status_code == 503:
+            raise QueueFullError(response.json().get("detail", "执行队列已满，请稍后重试"))
+        response.raise_for_status()
+
+    async def run_code(self, code: str, language: str, input_data: str = "") -> Dict[str, Any]:
+        """运行代码"""
+        response = await self.client.post("/run", json={"code": code, "language": language, "input": input_data})
+        self._check(response)
+        return response.json()
+
+    async def run_batch(self, code: str, language: str, cases: List[Dict[str, Any]],
+                        parallel: bool = True) -> List[TestCaseResult]:
+        """批量运行测试用例，结果与用例顺序一致"""
+        response = await self.client.post(
+            "/batch", json={"code": code, "language": language, "cases": cases, "parallel": parallel}
+        )
+        self._check(response)
+        return [TestCaseResult(**result) for result in response.json()["results"]]
+
+    async def stream_batch(self, code: str, language: str, cases: List[Dict[str, Any]],
+                           parallel: bool = True) -> AsyncIterator[Tuple[int, TestCaseResult]]:
+        """批量运行测试用例，每个用例完成后立即产出 (用例序号, TestCaseResult)
+
+        流中出现错误行或连接提前结束、结果少于用例数时抛出异常，不会静默返回部分结果。
+        """
+        payload = {"code": code, "language": language, "cases": cases, "parallel": parallel}
+        received = 0
+        async with self.client.stream("POST", "/batch", params={"stream": "true"}, json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+            self._check(response)
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                if "error" in item:
+                    if item.get("status_code") == 503:
+                        raise QueueFullError(item["error"])
+                    raise RuntimeError(f"runner_api 批量运行失败: {item['error']}")
+                received += 1
+                yield item["index"], TestCaseResult(**item["result"])
+        if received < len(cases):
+            raise RuntimeError(f"runner_api 只返回了 {received}/{len(cases)} 个用例的结果")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_default_client: Optional[RunnerClient] = None
+
+
+def get_runner() -> Union[RunnerService, RunnerClient]:
+    """设置了 RUNNER_API_URL 时通过共享的客户端调用独立的 runner_api，否则在本进程内执行"""
+    global _default_client
+    base_url = os.getenv("RUNNER_API_URL")
+    if not base_url:
+        return RunnerService()
+    if _default_client is None:
+        _default_client = RunnerClient(base_url)
+        logger.info(f"代码执行由 runner_api 处理: {base_url}")
+    return _default_client
@@ -1,144 +1,422 @@
 import asyncio
+import functools
+import math
+import resource
+import signal
 import subprocess
 import tempfile
+import time
 import os
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import logging
 
+from .python_worker import CappedBuffer, OutputLimitExceeded
+from .worker_pool import WorkerPool, get_node_worker_pool, get_worker_pool, run_once
+from .scheduler import get_scheduler
+from .result_cache import get_result_cache, make_key
+from .comparator import compare_outputs
+from .preflight import check_code
+from .languages import CompiledLanguage, get_language
+from .compile_cache import get_compile_cache
+from ..schemas.state import TestCaseResult
+
 logger = logging.getLogger(__name__)
 
 
 class RunnerService:
     """Runner服务"""
-    def __init__(self):
-        self.timeout = 5  # 执行超时时间（秒）
+    def __init__(self, use_pool: bool = True, use_cache: bool = True):
+        self.timeout = 5  # 执行超时时间（秒，墙钟）
+        self.cpu_time_limit = float(os.getenv("RUNNER_CPU_TIME_LIMIT", 2))  # CPU时间限制（秒）
+        self.memory_limit_mb = int(os.getenv("RUNNER_MEMORY_LIMIT_MB", 256))  # 内存限制（MB）
+        self.output_limit = int(os.getenv("RUNNER_OUTPUT_LIMIT_BYTES", 1024 * 1024))  # stdout/stderr各自的字节上限
+        # 浮点答案的默认容差（未设置时逐字比较），用例中的 abs_eps / rel_eps 优先
+        self.abs_eps = float(os.environ["RUNNER_FLOAT_ABS_EPS"]) if os.getenv("RUNNER_FLOAT_ABS_EPS") else None
+        self.rel_eps = float(os.environ["RUNNER_FLOAT_REL_EPS"]) if os.getenv("RUNNER_FLOAT_REL_EPS") else None
+        self.use_pool = use_pool  # Python/JavaScript代码是否走预启动的worker池
+        self.scheduler = get_scheduler()  # 进程内共享的准入控制
+        self.result_cache = get_result_cache() if use_cache else None  # 相同代码+输入+限制直接复用结果
+
+    @property
+    def limits(self) -> Dict[str, Any]:
+        """单次运行的资源限制"""
+        return {"cpu_time": self.cpu_time_limit, "memory_mb": self.memory_limit_mb, "output_bytes": self.output_limit}
+
+    def _cache_key(self, code: str, language: str, input_data: str) -> str:
+        return make_key(language, code, input_data, {**self.limits, "timeout": self.timeout})
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.result_cache is None:
+            return None
+        result = self.result_cache.get(key)
+        if result is not None:
+            result["cached"] = True
+        return result
+
+    def _cache_put(self, key: str, result: Dict[str, Any]):
+        # 超时与进程崩溃等结果受机器负载影响，不缓存
+        if self.result_cache is not None and result.get("status") in ("OK", "RE", "MLE", "OLE") \
+                and result.get("execution_time") is not None:
+            self.result_cache.put(key, result)
 
     async def run_code(self, code: str, language: str, input_data: str = "") -> Dict[str, Any]:
-        """运行代码"""
+        """运行代码（经过调度器准入控制，队列满时抛出 QueueFullError）
+
+        命中结果缓存时直接返回，不占用执行槽位；语法错误在进程内编译时即返回。
+        """
+        key = self._cache_key(code, language, input_data)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        preflight = check_code(code, language)
+        if not preflight.format_ok:
+            return self._error_result(preflight.error)
+        async with self.scheduler.slot():
+            result = await self._dispatch(code, language, input_data)
+        self._cache_put(key, result)
+        return result
+
+    async def _dispatch(self, code: str, language: str, input_data: str) -> Dict[str, Any]:
+        """按语言分发"""
         if language == "python":
             return await self._run_python(code, input_data)
         elif language == "javascript":
             return await self._run_javascript(code, input_data)
+        plugin = get_language(language)
+        if plugin is not None:
+            return await self._run_compiled(plugin, code, input_data)
+        return self._error_result(f"不支持的语言: {language}")
+
+    async def run_batch(self, code: str, language: str, cases: List[Dict[str, Any]],
+                        parallel: bool = True) -> List[TestCaseResult]:
+        """批量运行测试用例，结果与用例顺序一致"""
+        results: List[Optional[TestCaseResult]] = [None] * len(cases)
+        async for index, result in self.stream_batch(code, language, cases, parallel=parallel):
+            results[index] = result
+        return results
+
+    async def stream_batch(self, code: str, language: str, cases: List[Dict[str, Any]],
+                           parallel: bool = True) -> AsyncIterator[Tuple[int, TestCaseResult]]:
+        """批量运行测试用例，每个用例完成后立即产出 (用例序号, TestCaseResult)
+
+        Python代码在同一个worker中只加载一次，依次执行分到的用例；
+        parallel=True 时用例交错分片到多个worker并行执行，产出顺序为完成顺序。
+        每个用例单独计时，单个用例失败不影响其他用例的结果。
+        已缓存的用例最先产出，只运行未命中的用例；有语法错误时不占用worker，所有用例直接判为RE。
+        """
+        keys = [self._cache_key(code, language, case.get("input", "")) for case in cases]
+        pending = []
+        for i, key in enumerate(keys):
+            raw = self._cache_get(key)
+            if raw is None:
+                pending.append(i)
+            else:
+                yield i, self._to_test_case_result(cases[i], raw)
+        if not pending:
+            return
+
+        preflight = check_code(code, language)
+        if not preflight.format_ok:
+            for i in pending:
+                yield i, self._to_test_case_result(cases[i], self._error_result(preflight.error))
+            return
+
+        inputs = [cases[i].get("input", "") for i in pending]
+        async for j, raw in self._stream_execute(code, language, inputs, parallel):
+            i = pending[j]
+            self._cache_put(keys[i], raw)
+            yield i, self._to_test_case_result(cases[i], raw)
+
+    def _pool_for(self, language: str) -> Optional[WorkerPool]:
+        """语言对应的常驻worker池，不使用池时返回None"""
+        if not self.use_pool:
+            return None
+        if language == "python":
+            return get_worker_pool()
+        if language == "javascript":
+            return get_node_worker_pool()
+        return None
+
+    def _parallelism(self, language: str) -> int:
+        """单次批量运行最多同时使用的进程数"""
+        pool = self._pool_for(language)
+        return pool.size if pool is not None else self.scheduler.max_parallelism
+
+    async def _stream_execute(self, code: str, language: str, inputs: List[str],
+                              parallel: bool) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """执行一批输入，按完成顺序产出 (序号, 结果)；并行时每个分片各占用一个执行槽位"""
+        shards = min(self._parallelism(language), len(inputs)) if parallel else 1
+        if shards <= 1:
+            async with self.scheduler.slot():
+                async for item in self._stream_shard(code, language, inputs):
+                    yield item
+            return
+
+        # 交错分片，避免耗时相近的相邻用例集中到同一个worker
+        indices = [list(range(k, len(inputs), shards)) for k in range(shards)]
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run(shard: List[int]):
+            try:
+                async with self.scheduler.slot():
+                    async for j, raw in self._stream_shard(code, language, [inputs[i] for i in shard]):
+                        await queue.put((shard[j], raw))
+            except Exception as e:
+                await queue.put(e)
+            finally:
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(run(shard)) for shard in indices]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _stream_shard(self, code: str, language: str,
+                            inputs: List[str]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """在一个进程中依次运行一组输入"""
+        done = set()
+        pool = self._pool_for(language)
+        if pool is not None:
+            try:
+                async for j, raw in pool.stream_batch(code, inputs, timeout=self.timeout, limits=self.limits):
+                    done.add(j)
+                    yield j, raw
+                return
+            except Exception as e:
+                logger.error(f"worker池批量执行失败，剩余用例改用逐个运行: {e}")
+        for j, input_data in enumerate(inputs):
+            if j not in done:
+                yield j, await self._dispatch(code, language, input_data)
+
+    def _to_test_case_result(self, case: Dict[str, Any], raw: Dict[str, Any]) -> TestCaseResult:
+        """将运行结果转换为测试用例结果，输出按token比较（忽略空白差异，可设浮点容差）"""
+        expected = case.get("expected", "")
+        actual = raw.get("output") or ""
+        ok = raw.get("ok", False)
+        diff = None
+        if ok:
+            comparison = compare_outputs(expected, actual, case.get("abs_eps", self.abs_eps),
+                                         case.get("rel_eps", self.rel_eps))
+            status = "OK" if comparison.ok else "WA"
+            diff = comparison.message
         else:
-            return {
-                "ok": False,
-                "output": "",
-                "error": f"不支持的语言: {language}",
-                "execution_time": None
-            }
+            status = raw.get("status") or "RE"
+        return TestCaseResult(
+            input=case.get("input", ""),
+            expected=expected,
+            actual=actual,
+            passed=status == "OK",
+            execution_time=raw.get("execution_time"),
+            cpu_time=raw.get("cpu_time"),
+            memory_usage=raw.get("memory_usage"),
+            status=status,
+            error=raw.get("error") if not ok else None,
+            truncated=raw.get("truncated", False),
+            diff=diff
+        )
 
     async def _run_python(self, code: str, input_data: str) -> Dict[str, Any]:
         """运行Python代码"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-            f.write(code)
-            temp_file = f.name
+        if self.use_pool:
+            try:
+                return await get_worker_pool().run(code, input_data, timeout=self.timeout, limits=self.limits)
+            except Exception as e:
+                # worker池不可用时退回到每次启动新进程
+                logger.error(f"worker池执行失败，改用独立进程: {e}")
+        return await self._run_python_subprocess(code, input_data)
 
+    async def _run_python_subprocess(self, code: str, input_data: str) -> Dict[str, Any]:
+        """在独立的新进程中运行Python代码"""
         try:
-            # 运行代码
-            process = await asyncio.create_subprocess_exec(
-                "python", temp_file,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
+            return await run_once(code, input_data, timeout=self.timeout, limits=self.limits)
+        except Exception as e:
+            logger.error(f"运行Python代码失败: {e}")
+            return self._error_result(str(e))
 
-            # 输入数据
-            stdin_data = input_data.encode() if input_data else b""
+    def _set_child_limits(self, limit_address_space: bool = False):
+        """子进程中设置rlimit（在exec之前执行）；limit_address_space=True 时同时限制地址空间与栈"""
+        cpu = math.ceil(self.cpu_time_limit)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        if limit_address_space:
+            memory = self.memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+            # 递归较深的解法需要大栈，栈与堆共用内存额度
+            _, stack_hard = resource.getrlimit(resource.RLIMIT_STACK)
+            if stack_hard == resource.RLIM_INFINITY or stack_hard >= memory:
+                resource.setrlimit(resource.RLIMIT_STACK, (memory, stack_hard))
 
-            # 执行代码
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(input=stdin_data),
-                timeout=self.timeout
-            )
+    def _memfd_source(self, code: str) -> Optional[int]:
+        """把源码写入匿名内存文件（memfd），不落盘；平台不支持时返回None"""
+        if not hasattr(os, "memfd_create") or not os.path.isdir("/proc/self/fd"):
+            return None
+        try:
+            fd = os.memfd_create("solution.js")
+        except OSError:
+            return None
+        data = code.encode("utf-8")
+        while data:
+            data = data[os.write(fd, data):]
+        return fd
 
-            # 解码输出
-            output = stdout.decode('utf-8')
-            error = stderr.decode('utf-8') if stderr else None
+    async def _run_javascript(self, code: str, input_data: str) -> Dict[str, Any]:
+        """运行JavaScript代码"""
+        if self.use_pool:
+            try:
+                return await get_node_worker_pool().run(code, input_data, timeout=self.timeout,
+                                                        limits=self.limits)
+            except Exception as e:
+                # worker池不可用时退回到每次启动新进程
+                logger.error(f"Node worker池执行失败，改用独立进程: {e}")
+        return await self._run_javascript_subprocess(code, input_data)
 
-            # 检查执行是否成功
-            ok = process.returncode == 0
+    async def _run_javascript_subprocess(self, code: str, input_data: str) -> Dict[str, Any]:
+        """在独立的新node进程中运行JavaScript代码
 
-            return {
-                "ok": ok,
-                "output": output,
-                "error": error,
-                "execution_time": None  # 暂时不计算执行时间
-            }
-        except asyncio.TimeoutError:
-            process.kill()
-            return {
-                "ok": False,
-                "output": "",
-                "error": "执行超时",
-                "execution_time": None
-            }
+        源码优先放在memfd中，子进程通过 /proc/self/fd/N 读取，整个过程不访问文件系统；
+        memfd不可用时退回到临时文件。
+        """
+        source_fd = self._memfd_source(code)
+        temp_file = None
+        if source_fd is not None:
+            # node默认会对入口脚本做realpath，memfd解析出的路径无法打开，需要保留原路径
+            script_args = ["--preserve-symlinks-main", f"/proc/self/fd/{source_fd}"]
+            pass_fds = (source_fd,)
+        else:
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
+                f.write(code)
+                temp_file = f.name
+            script_args = [temp_file]
+            pass_fds = ()
+
+        try:
+            # 运行代码：CPU时间用rlimit限制，V8会预留大量虚拟地址空间，内存改用堆上限限制
+            return await self._run_process(
+                ["node", f"--max-old-space-size={self.memory_limit_mb}", *script_args], input_data,
+                pass_fds=pass_fds, mle_markers=("heap out of memory",)
+            )
         except Exception as e:
-            logger.error(f"运行Python代码失败: {e}")
-            return {
-                "ok": False,
-                "output": "",
-                "error": str(e),
-                "execution_time": None
-            }
+            logger.error(f"运行JavaScript代码失败: {e}")
+            return self._error_result(str(e))
         finally:
-            # 清理临时文件
-            if os.path.exists(temp_file):
+            # 子进程已持有源码的副本，父进程关闭memfd或清理临时文件
+            if source_fd is not None:
+                os.close(source_fd)
+            if temp_file and os.path.exists(temp_file):
                 os.unlink(temp_file)
 
-    async def _run_javascript(self, code: str, input_data: str) -> Dict[str, Any]:
-        """运行JavaScript代码"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-            f.write(code)
-            temp_file = f.name
-
+    async def _run_compiled(self, plugin: CompiledLanguage, code: str, input_data: str) -> Dict[str, Any]:
+        """运行编译型语言代码，编译产物按 (源码, 编译参数) 缓存，源码不变时不再编译"""
+        if not plugin.available():
+            return self._error_result(f"运行环境未安装 {plugin.compiler}，暂不支持 {plugin.name} 代码")
+        artifact = await get_compile_cache().get_or_compile(plugin, code)
+        if artifact.error is not None:
+            return self._error_result(f"编译错误：\n{artifact.error}")
         try:
-            # 运行代码
-            process = await asyncio.create_subprocess_exec(
-                "node", temp_file,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+            return await self._run_process(
+                plugin.run_command(artifact.path, code, self.memory_limit_mb), input_data,
+                limit_address_space=plugin.limit_address_space, mle_markers=plugin.mle_markers
             )
+        except Exception as e:
+            logger.error(f"运行{plugin.name}代码失败: {e}")
+            return self._error_result(str(e))
 
-            # 输入数据
-            stdin_data = input_data.encode() if input_data else b""
-
-            # 执行代码
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(input=stdin_data),
+    async def _run_process(self, command: List[str], input_data: str, pass_fds: Tuple[int, ...] = (),
+                           limit_address_space: bool = False, mle_markers: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """在新进程中运行程序，按退出状态与stderr判定 OK/TLE/MLE/OLE/RE"""
+        start = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=pass_fds,
+            preexec_fn=functools.partial(self._set_child_limits, limit_address_space)
+        )
+        try:
+            # 增量读取输出，每个流最多保留 output_limit 字节，超出时立即终止进程
+            stdout, stderr = CappedBuffer(self.output_limit), CappedBuffer(self.output_limit)
+            await asyncio.wait_for(
+                self._communicate_capped(process, input_data.encode("utf-8"), stdout, stderr),
                 timeout=self.timeout
             )
 
-            # 解码输出
-            output = stdout.decode('utf-8')
-            error = stderr.decode('utf-8') if stderr else None
+            output = stdout.text()
+            error = stderr.text() or None
+            truncated = stdout.truncated or stderr.truncated
 
-            # 检查执行是否成功
-            ok = process.returncode == 0
+            # 根据退出状态判断触发了哪个限制
+            if truncated:
+                status = "OLE"
+                error = (error.rstrip("\n") + "\n" if error else "") + f"输出超过 {self.output_limit} 字节，进程已被终止"
+            elif process.returncode == 0:
+                status = "OK"
+            elif process.returncode in (-signal.SIGXCPU, -signal.SIGKILL):
+                status = "TLE"
+            elif error and any(marker in error for marker in mle_markers):
+                status = "MLE"
+            else:
+                status = "RE"
 
             return {
-                "ok": ok,
+                "ok": status == "OK",
+                "status": status,
                 "output": output,
                 "error": error,
-                "execution_time": None  # 暂时不计算执行时间
+                "truncated": truncated,
+                "execution_time": time.perf_counter() - start,
+                "cpu_time": None,
+                "memory_usage": None
             }
         except asyncio.TimeoutError:
             process.kill()
-            return {
-                "ok": False,
-                "output": "",
-                "error": "执行超时",
-                "execution_time": None
-            }
-        except Exception as e:
-            logger.error(f"运行JavaScript代码失败: {e}")
-            return {
-                "ok": False,
-                "output": "",
-                "error": str(e),
-                "execution_time": None
-            }
-        finally:
-            # 清理临时文件
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
+            await process.wait()
+            return self._error_result("执行超时", status="TLE", execution_time=time.perf_counter() - start)
+
+    async def _communicate_capped(self, process: asyncio.subprocess.Process, stdin_data: bytes,
+                                  stdout: CappedBuffer, stderr: CappedBuffer):
+        """写入标准输入并增量读取输出；任一输出流超过上限时杀掉进程"""
+        async def feed():
+            try:
+                if stdin_data:
+                    process.stdin.write(stdin_data)
+                    await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        async def pump(stream: asyncio.StreamReader, buffer: CappedBuffer):
+            while True:
+                chunk = await stream.read(64 * 1024)
+                if not chunk:
+                    return
+                try:
+                    buffer.write(chunk)
+                except OutputLimitExceeded:
+                    process.kill()
+                    return
+
+        await asyncio.gather(feed(), pump(process.stdout, stdout), pump(process.stderr, stderr))
+        await process.wait()
+
+    def _error_result(self, error: str, status: str = "RE", execution_time: Optional[float] = None) -> Dict[str, Any]:
+        """构建失败结果"""
+        return {
+            "ok": False,
+            "status": status,
+            "output": "",
+            "error": error,
+            "truncated": False,
+            "execution_time": execution_time,
+            "cpu_time": None,
+            "memory_usage": None
+        }
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """执行队列已满，拒绝新任务"""
+
+
+class ExecutionScheduler:
+    """代码执行准入控制
+
+    同时运行的任务数不超过 max_parallelism，超出的任务排队等待；
+    排队数达到 max_queue_depth 时直接拒绝，排队超过 queue_timeout 秒的任务同样被拒绝，
+    让突发流量下延迟平滑上升而不是压垮机器。
+    """
+    def __init__(self, max_parallelism: Optional[int] = None, max_queue_depth: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.max_parallelism = max_parallelism or int(os.getenv("RUNNER_MAX_PARALLELISM", os.cpu_count() or 1))
+        self.max_queue_depth = max_queue_depth if max_queue_depth is not None else int(os.getenv("RUNNER_MAX_QUEUE_DEPTH", 100))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("RUNNER_QUEUE_TIMEOUT", 30))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._wait_times = deque(maxlen=1000)
+
+    def _bind_loop(self):
+        """信号量绑定到当前事件循环"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_parallelism)
+            self.running = 0
+            self.waiting = 0
+
+    def check_admission(self):
+        """队列已满时抛出 QueueFullError；异步任务可在提交时先检查，直接拒绝"""
+        self._bind_loop()
+        if self._semaphore.locked() and self.waiting >= self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(f"执行队列已满（{self.waiting}/{self.max_queue_depth}），请稍后重试")
+
+    @asynccontextmanager
+    async def slot(self):
+        """获取一个执行槽位，队列满或排队超时时抛出 QueueFullError"""
+        self.check_admission()
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QueueFullError(f"排队超过 {self.queue_timeout} 秒，请稍后重试")
+        finally:
+            self.waiting -= 1
+
+        self._wait_times.append(time.perf_counter() - start)
+        self.admitted += 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """队列指标：深度、并发、排队等待时间（秒）"""
+        waits = sorted(self._wait_times)
+        return {
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "max_parallelism": self.max_parallelism,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "queue_wait_p95": waits[max(0, int(len(waits) * 0.95) - 1)] if waits else 0.0,
+            "queue_wait_max": waits[-1] if waits else 0.0
+        }
+
+
+_default_scheduler: Optional[ExecutionScheduler] = None
+
+
+def get_scheduler() -> ExecutionScheduler:
+    """获取进程内共享的调度器"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = ExecutionScheduler()
+    return _default_scheduler
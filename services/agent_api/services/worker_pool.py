@@ -0,0 +1,387 @@
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import logging
+
+from .python_worker import FRAME_HEADER
+
+logger = logging.getLogger(__name__)
+
+# 预先导入的常用模块（逗号分隔），常见题解几乎都会用到
+DEFAULT_PRELOAD = "collections,heapq,bisect,itertools,functools,math,sys,re,string,operator"
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_worker.py")
+NODE_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "node_worker.js")
+
+
+class WorkerCrashed(Exception):
+    """worker进程意外退出"""
+
+
+def failed_result(status: str, error: str, execution_time: Optional[float] = None) -> Dict[str, Any]:
+    """worker未能返回结果时（超时被杀、进程崩溃）的结果"""
+    return {
+        "ok": False,
+        "status": status,
+        "output": "",
+        "error": error,
+        "truncated": False,
+        "execution_time": execution_time,
+        "cpu_time": None,
+        "memory_usage": None
+    }
+
+
+class WorkerProcess:
+    """常驻worker进程（Python或Node.js，协议相同）"""
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.jobs_done = 0
+        self.rss = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def send(self, job: Dict[str, Any]):
+        """发送一帧"""
+        body = json.dumps(job, ensure_ascii=False).encode("utf-8")
+        try:
+            self.process.stdin.write(FRAME_HEADER.pack(len(body)) + body)
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            raise WorkerCrashed("worker进程已退出")
+
+    async def receive(self) -> Dict[str, Any]:
+        """读取一帧"""
+        try:
+            header = await self.process.stdout.readexactly(FRAME_HEADER.size)
+            (length,) = FRAME_HEADER.unpack(header)
+            body = await self.process.stdout.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise WorkerCrashed("worker进程已退出")
+        return json.loads(body.decode("utf-8"))
+
+    async def run(self, code: str, input_data: str, limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """执行一个任务"""
+        await self.send({"code": code, "input": input_data, "limits": limits})
+        result = await self.receive()
+        self.jobs_done += 1
+        self.rss = result.pop("rss", 0)
+        return result
+
+    def kill(self):
+        """终止worker进程"""
+        if self.alive:
+            try:
+                # 直接发信号，不依赖进程所属事件循环仍在运行
+                os.kill(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    async def wait_closed(self):
+        """等待进程退出"""
+        self.kill()
+        if self.process.stdin is not None:
+            self.process.stdin.close()
+        await self.process.wait()
+
+
+class WorkerPool:
+    """预启动的worker池
+
+    每个worker执行完 max_jobs_per_worker 个任务、RSS 超过 max_rss_mb，
+    或者超时/崩溃后都会被替换为新进程，池大小保持不变。
+    子类通过 _command 指定worker的启动命令。
+    """
+    stderr = subprocess.DEVNULL
+
+    def __init__(self, size: Optional[int] = None, max_jobs_per_worker: Optional[int] = None,
+                 max_rss_mb: Optional[int] = None):
+        self.size = size or int(os.getenv("RUNNER_POOL_SIZE", os.cpu_count() or 1))
+        self.max_jobs_per_worker = max_jobs_per_worker or int(os.getenv("RUNNER_WORKER_MAX_JOBS", 100))
+        self.max_rss = (max_rss_mb or int(os.getenv("RUNNER_WORKER_MAX_RSS_MB", 256))) * 1024 * 1024
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers = set()
+        self._tasks = set()
+        self._loop = None
+
+    def _command(self) -> List[str]:
+        raise NotImplementedError
+
+    async def _crash_result(self, worker: WorkerProcess, error: WorkerCrashed) -> Dict[str, Any]:
+        """worker崩溃时当前用例的结果"""
+        return failed_result("RE", str(error))
+
+    async def _spawn(self) -> WorkerProcess:
+        """启动一个新的worker并等待其就绪"""
+        process = await asyncio.create_subprocess_exec(
+            *self._command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self.stderr
+        )
+        worker = WorkerProcess(process)
+        self._workers.add(worker)
+        await worker.receive()  # 就绪帧
+        return worker
+
+    async def _replenish(self):
+        """补充一个worker到空闲队列"""
+        try:
+            worker = await self._spawn()
+            self._idle.put_nowait(worker)
+        except Exception as e:
+            logger.error(f"启动worker失败: {e}")
+
+    async def start(self):
+        """启动worker池（绑定到当前事件循环）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # 事件循环变化时（如测试中每个用例新建循环），旧进程无法继续使用
+        self._discard_workers()
+        self._loop = loop
+        self._idle = asyncio.Queue()
+        try:
+            workers = await asyncio.gather(*(self._spawn() for _ in range(self.size)))
+        except Exception:
+            self._discard_workers()
+            self._loop = None
+            raise
+        for worker in workers:
+            self._idle.put_nowait(worker)
+        logger.info(f"{type(self).__name__} 已启动，大小: {self.size}")
+
+    def _retire(self, worker: WorkerProcess):
+        """淘汰worker并异步补充新进程"""
+        worker.kill()
+        self._workers.discard(worker)
+        loop = asyncio.get_running_loop()
+        for coro in (worker.wait_closed(), self._replenish()):
+            task = loop.create_task(coro)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_recycle(self, worker: WorkerProcess) -> bool:
+        return worker.jobs_done >= self.max_jobs_per_worker or worker.rss > self.max_rss
+
+    def _job_limits(self, limits: Optional[Dict[str, Any]], timeout: float) -> Optional[Dict[str, Any]]:
+        """发给worker的限制"""
+        return limits
+
+    def _receive_timeout(self, timeout: float) -> float:
+        """等待worker回传一帧的超时时间，超时后worker被淘汰"""
+        return timeout
+
+    async def run(self, code: str, input_data: str = "", timeout: float = 5,
+                  limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """在空闲worker上运行代码"""
+        await self.start()
+        worker = await self._idle.get()
+        try:
+            result = await asyncio.wait_for(worker.run(code, input_data, self._job_limits(limits, timeout)),
+                                            timeout=self._receive_timeout(timeout))
+        except asyncio.TimeoutError:
+            self._retire(worker)
+            return failed_result("TLE", "执行超时", timeout)
+        except WorkerCrashed as e:
+            result = await self._crash_result(worker, e)
+            self._retire(worker)
+            return result
+        except BaseException:
+            self._retire(worker)
+            raise
+
+        if self._should_recycle(worker):
+            self._retire(worker)
+        else:
+            self._idle.put_nowait(worker)
+        return result
+
+    async def run_batch(self, code: str, inputs: List[str], timeout: float = 5,
+                        limits: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """在同一个worker中批量运行多个用例，结果与输入顺序一致"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(inputs)
+        async for index, result in self.stream_batch(code, inputs, timeout=timeout, limits=limits):
+            results[index] = result
+        return results
+
+    async def stream_batch(self, code: str, inputs: List[str], timeout: float = 5,
+                           limits: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """批量运行多个用例，每个用例完成后立即产出 (序号, 结果)
+
+        代码只发送、编译一次；某个用例超时或导致worker崩溃时，
+        该用例记为失败，剩余用例在新的worker上继续执行。
+        调用方提前结束迭代时，正在执行的worker会被淘汰。
+        """
+        await self.start()
+        next_index = 0
+        while next_index < len(inputs):
+            worker = await self._idle.get()
+            start_index = next_index
+            try:
+                await worker.send({"code": code, "cases": inputs[start_index:],
+                                   "limits": self._job_limits(limits, timeout)})
+                while next_index < len(inputs):
+                    frame = await asyncio.wait_for(worker.receive(), timeout=self._receive_timeout(timeout))
+                    frame.pop("index", None)
+                    next_index += 1
+                    yield next_index - 1, frame
+                done = await asyncio.wait_for(worker.receive(), timeout=self._receive_timeout(timeout))
+            except asyncio.TimeoutError:
+                self._retire(worker)
+                next_index += 1
+                yield next_index - 1, failed_result("TLE", "执行超时", timeout)
+                continue
+            except WorkerCrashed as e:
+                result = await self._crash_result(worker, e)
+                self._retire(worker)
+                next_index += 1
+                yield next_index - 1, result
+                continue
+            except BaseException:
+                self._retire(worker)
+                raise
+
+            worker.jobs_done += next_index - start_index
+            worker.rss = done.get("rss", 0)
+            if self._should_recycle(worker):
+                self._retire(worker)
+            else:
+                self._idle.put_nowait(worker)
+
+    def _discard_workers(self):
+        for worker in list(self._workers):
+            worker.kill()
+        self._workers.clear()
+
+    async def close(self):
+        """关闭所有worker"""
+        # 等待进行中的回收/补充任务完成，避免中途取消导致进程或管道泄漏
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await asyncio.gather(*(worker.wait_closed() for worker in self._workers), return_exceptions=True)
+        self._workers.clear()
+        self._loop = None
+        self._idle = None
+
+
+class PythonWorkerPool(WorkerPool):
+    """预启动的Python worker池
+
+    worker启动时预先导入 preload 中的模块；fork=True 时worker作为zygote，每个任务在fork出的
+    子进程中执行，子进程通过写时复制共享已导入的模块，zygote 自身不执行用户代码，
+    内存不随任务增长，也不需要按任务数回收。墙钟超时由zygote杀死子进程，worker无需替换。
+    """
+    fork_grace = 1.0  # zygote未能按时回传结果时的额外等待（秒），之后按worker卡死处理
+
+    def __init__(self, size: Optional[int] = None, max_jobs_per_worker: Optional[int] = None,
+                 max_rss_mb: Optional[int] = None, python: str = sys.executable,
+                 preload: Optional[List[str]] = None, fork: Optional[bool] = None):
+        super().__init__(size, max_jobs_per_worker, max_rss_mb)
+        self.python = python
+        if preload is None:
+            preload = [name for name in os.getenv("RUNNER_PYTHON_PRELOAD", DEFAULT_PRELOAD).split(",") if name]
+        self.preload = preload
+        if fork is None:
+            fork = os.getenv("RUNNER_PYTHON_FORK", "1") == "1"
+        self.fork = fork and hasattr(os, "fork")
+
+    def _command(self) -> List[str]:
+        command = [self.python, "-u", WORKER_SCRIPT]
+        if self.preload:
+            command.append("--preload=" + ",".join(self.preload))
+        if self.fork:
+            command.append("--fork")
+        return command
+
+    def _should_recycle(self, worker: WorkerProcess) -> bool:
+        if self.fork:
+            return worker.rss > self.max_rss
+        return super()._should_recycle(worker)
+
+    def _job_limits(self, limits: Optional[Dict[str, Any]], timeout: float) -> Optional[Dict[str, Any]]:
+        if self.fork:
+            return {**(limits or {}), "wall_time": timeout}
+        return limits
+
+    def _receive_timeout(self, timeout: float) -> float:
+        return timeout + self.fork_grace if self.fork else timeout
+
+
+class NodeWorkerPool(WorkerPool):
+    """预启动的Node.js worker池
+
+    每次运行在worker内全新的 vm 上下文中执行，堆上限由 --max-old-space-size 控制；
+    堆溢出会让整个worker退出，此时根据其stderr判定为MLE并替换worker。
+    """
+    stderr = subprocess.PIPE
+
+    def __init__(self, size: Optional[int] = None, max_jobs_per_worker: Optional[int] = None,
+                 max_rss_mb: Optional[int] = None, memory_mb: Optional[int] = None, node: str = "node"):
+        super().__init__(
+            size or int(os.getenv("RUNNER_NODE_POOL_SIZE", 0)) or None,
+            max_jobs_per_worker,
+            max_rss_mb or int(os.getenv("RUNNER_NODE_WORKER_MAX_RSS_MB", 512))
+        )
+        self.memory_mb = memory_mb or int(os.getenv("RUNNER_MEMORY_LIMIT_MB", 256))
+        self.node = node
+
+    def _command(self) -> List[str]:
+        return [self.node, f"--max-old-space-size={self.memory_mb}", NODE_WORKER_SCRIPT]
+
+    async def _crash_result(self, worker: WorkerProcess, error: WorkerCrashed) -> Dict[str, Any]:
+        try:
+            stderr = await asyncio.wait_for(worker.process.stderr.read(), timeout=1)
+        except asyncio.TimeoutError:
+            stderr = b""
+        if b"heap out of memory" in stderr:
+            return failed_result("MLE", "超出内存限制")
+        return failed_result("RE", str(error))
+
+
+async def run_once(code: str, input_data: str = "", timeout: float = 5,
+                   limits: Optional[Dict[str, Any]] = None, python: str = sys.executable) -> Dict[str, Any]:
+    """启动一个一次性worker运行代码（不复用进程，限制与测量方式与worker池一致）"""
+    process = await asyncio.create_subprocess_exec(
+        python, "-u", WORKER_SCRIPT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    worker = WorkerProcess(process)
+    try:
+        await worker.receive()  # 就绪帧
+        result = await asyncio.wait_for(worker.run(code, input_data, limits), timeout=timeout)
+        result.pop("rss", None)
+        return result
+    except asyncio.TimeoutError:
+        return failed_result("TLE", "执行超时", timeout)
+    except WorkerCrashed as e:
+        return failed_result("RE", str(e))
+    finally:
+        await worker.wait_closed()
+
+
+_default_pool: Optional[PythonWorkerPool] = None
+_default_node_pool: Optional[NodeWorkerPool] = None
+
+
+def get_worker_pool() -> PythonWorkerPool:
+    """获取进程内共享的worker池"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = PythonWorkerPool()
+    return _default_pool
+
+
+def get_node_worker_pool() -> NodeWorkerPool:
+    """获取进程内共享的Node.js worker池"""
+    global _default_node_pool
+    if _default_node_pool is None:
+        _default_node_pool = NodeWorkerPool()
+    return _default_node_pool
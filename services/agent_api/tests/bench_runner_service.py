@@ -0,0 +1,60 @@
+"""RunnerService 性能基准：独立进程 vs 预启动worker池（Python 与 JavaScript）
+
+用法：python -m services.agent_api.tests.bench_runner_service [运行次数]
+"""
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+from services.agent_api.services.runner_service import RunnerService
+from services.agent_api.services.worker_pool import get_node_worker_pool, get_worker_pool
+
+CODE = {
+    "python": "import sys\nnums = list(map(int, sys.stdin.read().split()))\nprint(sum(nums))",
+    "javascript": "const nums = require('fs').readFileSync(0, 'utf8').split(/\\s+/).filter(Boolean).map(Number);\n"
+                  "console.log(nums.reduce((a, b) => a + b, 0));"
+}
+INPUT = " ".join(str(i) for i in range(1000))
+
+
+async def measure(service: RunnerService, runs: int, language: str = "python") -> list:
+    """测量每次run_code的端到端耗时（毫秒）"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await service.run_code(CODE[language], language, INPUT)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert result["ok"], result
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<12} mean={statistics.mean(timings):8.2f}ms  p50={statistics.median(timings):8.2f}ms  p95={p95:8.2f}ms")
+
+
+async def main(runs: int):
+    print(f"runs={runs}")
+    for language, warmup in (("python", "pass"), ("javascript", "")):
+        # 关闭结果缓存，测量真实执行开销
+        cold = await measure(RunnerService(use_pool=False, use_cache=False), runs, language)
+        # 预热：首次调用会启动worker池
+        await RunnerService(use_cache=False).run_code(warmup, language)
+        warm = await measure(RunnerService(use_cache=False), runs, language)
+
+        print(f"[{language}]")
+        report("subprocess", cold)
+        report("worker pool", warm)
+        print(f"speedup      {statistics.mean(cold) / statistics.mean(warm):.1f}x")
+    await get_worker_pool().close()
+    await get_node_worker_pool().close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
@@ -0,0 +1,46 @@
+from ..services.comparator import compare_outputs
+from ..services.runner_service import RunnerService
+
+
+class TestComparator:
+    """测试逐token比较输出"""
+    def test_whitespace_insensitive(self):
+        """测试空白与换行差异不影响结果"""
+        assert compare_outputs("1 2\n3\n", "1  2\r\n3").ok
+        assert compare_outputs("", "  \n").ok
+
+    def test_first_difference(self):
+        """测试定位第一处差异"""
+        result = compare_outputs("1 2\n3 4\n", "1 2\n3 5\n")
+        assert (result.line, result.column) == (2, 3)
+        assert result.message == "第2行第3列：期望 4，实际 5"
+        assert compare_outputs("1 2", "1").actual_token is None
+        assert compare_outputs("1", "1 2").expected_token is None
+
+    def test_float_tolerance(self):
+        """测试浮点容差"""
+        assert not compare_outputs("3.14159", "3.1416").ok
+        assert compare_outputs("3.14159", "3.1416", abs_eps=1e-4).ok
+        assert compare_outputs("2e9", "2000000001", rel_eps=1e-6).ok
+
+    def test_large_output_across_blocks(self):
+        """测试跨越多个分块的大输出"""
+        expected = " ".join(str(i) for i in range(300000))
+        actual = expected.replace(" ", "\n")
+        assert compare_outputs(expected, actual).ok
+        result = compare_outputs(expected, actual[:-6] + "0")
+        assert result.line == 300000
+        assert result.expected_token == "299999"
+
+
+class TestRunnerServiceCompare:
+    """测试RunnerService按token判定并给出差异"""
+    def test_wrong_answer_has_diff(self):
+        """测试答案错误时带有差异说明，用例可单独设置容差"""
+        service = RunnerService()
+        result = service._to_test_case_result({"input": "", "expected": "1\n2\n"}, {"ok": True, "output": "1 3"})
+        assert result.status == "WA"
+        assert result.diff == "第1行第3列：期望 2，实际 3"
+        result = service._to_test_case_result({"input": "", "expected": "0.5", "abs_eps": 1e-3},
+                                              {"ok": True, "output": "0.5004\n"})
+        assert result.passed
@@ -0,0 +1,103 @@
+import os
+import shutil
+import pytest
+from ..services import compile_cache
+from ..services.compile_cache import CompileCache
+from ..services.languages import get_language, normalize_language
+from ..services.runner_service import RunnerService
+
+C_SUM = "#include <stdio.h>\nint main(){long a,b;scanf(\"%ld %ld\",&a,&b);printf(\"%ld\\n\",a+b);return 0;}\n"
+
+needs_gcc = pytest.mark.skipif(shutil.which("gcc") is None, reason="未安装gcc")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = CompileCache(root=str(tmp_path / "cache"))
+    monkeypatch.setattr(compile_cache, "_default_cache", cache)
+    return cache
+
+
+class TestLanguages:
+    """测试语言插件注册表"""
+    def test_aliases(self):
+        """测试语言别名"""
+        assert normalize_language("C++") == "cpp"
+        assert get_language("c++").name == "cpp"
+        assert get_language("python") is None
+
+    def test_java_main_class(self):
+        """测试Java源文件按public类命名"""
+        java = get_language("java")
+        assert java.source_name("public class Solution { }") == "Solution.java"
+        assert java.source_name("class A { }") == "Main.java"
+
+
+class TestCompileCache:
+    """测试编译产物缓存"""
+    @needs_gcc
+    @pytest.mark.asyncio
+    async def test_unchanged_code_skips_compilation(self, cache):
+        """测试源码不变时只编译一次"""
+        service = RunnerService(use_cache=False)
+        cases = [{"input": f"{i} {i}", "expected": str(2 * i)} for i in range(3)]
+        results = await service.run_batch(C_SUM, "c", cases)
+        assert [r.passed for r in results] == [True, True, True]
+        result = await service.run_code(C_SUM, "c", "40 2")
+        assert result["output"] == "42\n"
+        assert (cache.misses, cache.hits) == (1, 3)
+
+    @needs_gcc
+    @pytest.mark.asyncio
+    async def test_compile_error_is_cached(self, cache):
+        """测试编译错误同样缓存"""
+        service = RunnerService(use_cache=False)
+        code = "int main() { return x; }\n"
+        for _ in range(2):
+            result = await service.run_code(code, "c", "")
+            assert result["status"] == "RE"
+            assert result["error"].startswith("编译错误")
+            assert "main.c" in result["error"]
+        assert (cache.misses, cache.hits) == (1, 1)
+
+    @needs_gcc
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, cache):
+        """测试超出磁盘上限时淘汰最久未使用的产物"""
+        cache.max_bytes = 1
+        plugin = get_language("c")
+        first = await cache.get_or_compile(plugin, C_SUM)
+        second = await cache.get_or_compile(plugin, C_SUM.replace("a+b", "b+a"))
+        assert not os.path.exists(first.path)
+        assert os.path.exists(second.path)
+        assert cache.evictions == 1
+
+    @needs_gcc
+    @pytest.mark.asyncio
+    async def test_limits(self, cache):
+        """测试编译型程序的超时与内存限制"""
+        service = RunnerService(use_cache=False)
+        service.cpu_time_limit = 1
+        result = await service.run_code("int main(){volatile long i=0;for(;;)i++;}", "c", "")
+        assert result["status"] == "TLE"
+        result = await service.run_code(
+            "#include <stdlib.h>\n#include <string.h>\n"
+            "int main(){char*p=malloc(1L<<30);if(!p)return 3;memset(p,1,1L<<30);return 0;}", "c", "")
+        assert result["status"] == "RE" and not result["ok"]
+
+    @pytest.mark.skipif(shutil.which("g++") is None, reason="未安装g++")
+    @pytest.mark.asyncio
+    async def test_cpp(self, cache):
+        """测试C++代码"""
+        code = "#include <iostream>\nint main(){int n;std::cin>>n;std::cout<<n*n<<std::endl;}\n"
+        result = await RunnerService(use_cache=False).run_code(code, "cpp", "12")
+        assert result["output"] == "144\n"
+
+    @pytest.mark.asyncio
+    async def test_missing_toolchain(self, cache, monkeypatch):
+        """测试未安装编译器时返回说明"""
+        monkeypatch.setattr(get_language("java"), "available", lambda: False)
+        result = await RunnerService(use_cache=False).run_code(
+            "public class Main { public static void main(String[] a) {} }", "java", "")
+        assert not result["ok"]
+        assert "javac" in result["error"]
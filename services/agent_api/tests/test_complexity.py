@@ -0,0 +1,125 @@
+import random
+import pytest
+from ..services.complexity import (
+    ComplexityProfiler, exceeds_claim, fit_complexity, normalize_complexity, pick_template, scale_input
+)
+from ..services.result_cache import ResultCache
+from ..services.runner_service import RunnerService
+from ..services.worker_pool import get_worker_pool
+
+
+class TestComplexityFit:
+    """测试复杂度拟合"""
+    def _samples(self, f, overhead=2e-4):
+        rng = random.Random(1)
+        sizes = [4 * 2 ** k for k in range(14)]
+        return [(n, (f(n) + overhead) * rng.uniform(0.95, 1.05)) for n in sizes if f(n) < 0.3]
+
+    def test_polynomial_classes(self):
+        """测试带固定开销与噪声的计时能区分线性与平方"""
+        assert fit_complexity(self._samples(lambda n: 2e-7 * n))[0] == "O(n)"
+        assert fit_complexity(self._samples(lambda n: 5e-8 * n * n))[0] == "O(n^2)"
+        assert fit_complexity(self._samples(lambda n: 1e-5))[0] == "O(1)"
+
+    def test_exponential_with_timeout(self):
+        """测试最后一个规模超时（耗时为下界）时仍能识别指数复杂度"""
+        samples = [(4, 2e-4), (8, 2.2e-4), (16, 7e-3), (32, 0.25)]
+        assert fit_complexity(samples)[0] == "O(2^n)"
+
+    def test_too_few_samples(self):
+        """测试样本不足时不给出结论"""
+        assert fit_complexity([(4, 0.1), (8, 0.2)])[0] is None
+
+
+class TestComplexityClaim:
+    """测试声明复杂度的提取与比较"""
+    def test_normalize(self):
+        """测试常见写法规范化"""
+        assert normalize_complexity("用哈希表，时间复杂度O(n)，空间O(n)") == "O(n)"
+        assert normalize_complexity("排序后双指针 O(nlogn)") == "O(n log n)"
+        assert normalize_complexity("O(n²)") == "O(n^2)"
+        assert normalize_complexity("O(N * log(N))") == "O(n log n)"
+        assert normalize_complexity("没有写复杂度") is None
+
+    def test_exceeds(self):
+        """测试只差对数因子不算不符"""
+        assert exceeds_claim("O(n^2)", "O(n)")
+        assert not exceeds_claim("O(n log n)", "O(n)")
+        assert not exceeds_claim("O(n)", "O(n^2)")
+        assert not exceeds_claim("O(n^2)", None)
+
+
+class TestScaleInput:
+    """测试按样例格式生成输入"""
+    def test_count_and_list(self):
+        """测试“个数 + 列表”格式，其余行原样保留"""
+        text = scale_input("3\n1 5 2\n7\n", 10, random.Random(0))
+        lines = text.splitlines()
+        assert lines[0] == "10"
+        assert len(lines[1].split()) == 10
+        assert lines[2] == "7"
+
+    def test_single_values(self):
+        """测试单个整数与单个字符串"""
+        assert scale_input("5", 64, random.Random(0)) == "64\n"
+        assert len(scale_input("abca", 64, random.Random(0)).strip()) == 64
+        assert scale_input("1 2", 64, random.Random(0)) is None
+
+    def test_pick_template(self):
+        """测试选出格式可识别的最长样例"""
+        assert pick_template(["1 2", "2\n1 2", "4\n1 2 3 4"]) == "4\n1 2 3 4"
+        assert pick_template(["测试输入1"]) is None
+
+
+class TestComplexityProfiler:
+    """测试在Runner上实测复杂度"""
+    @pytest.mark.asyncio
+    async def test_linear_vs_quadratic(self):
+        """测试声明O(n)却提交O(n^2)的代码能被识别"""
+        service = RunnerService()
+        service.result_cache = ResultCache()
+        profiler = ComplexityProfiler(service, total_budget=1.0)
+        linear = "n = int(input())\na = list(map(int, input().split()))\nprint(sum(a))"
+        quadratic = (
+            "n = int(input())\na = list(map(int, input().split()))\n"
+            "print(sum(1 for i in range(n) for j in range(i) if a[j] > a[i]))"
+        )
+        sample = "3\n3 1 2"
+        try:
+            estimate = await profiler.profile(quadratic, "python", sample)
+            assert estimate.complexity == "O(n^2)"
+            assert exceeds_claim(estimate.complexity, normalize_complexity("O(n)"))
+            estimate = await profiler.profile(linear, "python", sample)
+            assert estimate.complexity in ("O(n)", "O(n log n)")
+        finally:
+            await get_worker_pool().close()
+
+    @pytest.mark.asyncio
+    async def test_testing_subgraph_profiles_problem_examples(self):
+        """测试测试子图用题目样例运行并以样例为模板实测复杂度"""
+        from ..graphs.subgraphs.testing import TestingSubGraph
+        from ..schemas.state import CoachState, CodeSpec, IdeaSpec, ProblemSpec
+
+        service = RunnerService()
+        service.result_cache = ResultCache()
+        subgraph = TestingSubGraph()
+        subgraph.runner_service = service
+        subgraph.profiler = ComplexityProfiler(service, total_budget=1.0)
+        quadratic = (
+            "n = int(input())\na = list(map(int, input().split()))\n"
+            "print(sum(1 for i in range(n) for j in range(i) if a[j] > a[i]))"
+        )
+        state = CoachState(
+            problem=ProblemSpec(title="逆序对", description="统计逆序对个数",
+                                examples=[{"input": "3\n3 1 2", "output": "2"}], constraints=[]),
+            idea=IdeaSpec(user_idea_raw="归并排序，O(n log n)", analysis="", guidance=""),
+            code=CodeSpec(language="python", code_text=quadratic, format_ok=True, entrypoint_detected=True)
+        )
+        try:
+            final = await subgraph.build().compile().ainvoke(state.model_dump())
+        finally:
+            await get_worker_pool().close()
+        assert final["test_cases"] == [{"input": "3\n3 1 2", "expected": "2"}]
+        report = final["test_report"]
+        assert report.passed
+        assert (report.complexity, report.claimed_complexity) == ("O(n^2)", "O(n log n)")
@@ -0,0 +1,92 @@
+import json
+import os
+import sqlite3
+import threading
+import httpx
+import pytest
+from ..services.llm_cache import LLMCache, make_llm_key
+from ..services.llm_service import LLMService, close_http_clients
+
+
+class TestLLMCache:
+    """测试LLM响应的磁盘缓存"""
+    def test_key_covers_model_prompt_params(self):
+        """测试模型、输入、参数任一不同则键不同"""
+        base = make_llm_key("qwen-turbo", "text-generation", {"prompt": "两数之和"}, {"temperature": 0.7})
+        assert base == make_llm_key("qwen-turbo", "text-generation", {"prompt": "两数之和"}, {"temperature": 0.7})
+        assert base != make_llm_key("qwen-max", "text-generation", {"prompt": "两数之和"}, {"temperature": 0.7})
+        assert base != make_llm_key("qwen-turbo", "text-generation", {"prompt": "三数之和"}, {"temperature": 0.7})
+        assert base != make_llm_key("qwen-turbo", "text-generation", {"prompt": "两数之和"}, {"temperature": 0})
+
+    def test_survives_restart(self, tmp_path):
+        """测试新实例从磁盘命中，过期条目不再命中"""
+        path = str(tmp_path / "llm.sqlite")
+        LLMCache(persist_path=path).put("k", "v")
+        LLMCache(persist_path=path, ttl=-1).put("old", "v")
+        cache = LLMCache(persist_path=path)
+        assert cache.get("k") == "v"
+        assert cache.get("old") is None
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_compaction(self, tmp_path):
+        """测试整理时删除过期条目并按最近访问时间淘汰到上限以内"""
+        cache = LLMCache(persist_path=str(tmp_path / "llm.sqlite"), max_disk_bytes=4)
+        cache.put("a", "12")
+        cache.put("b", "34")
+        cache.put("c", "56")
+        cache._entries.clear()
+        cache.get("a")
+        cache.compact()
+        stats = cache.stats()
+        assert (stats["disk_entries"], stats["disk_bytes"]) == (2, 4)
+        assert cache.get("b") is None
+        assert cache.get("a") == "12"
+
+    def test_compaction_shrinks_file(self, tmp_path):
+        """测试新建的缓存文件启用增量VACUUM，淘汰后整理会让文件变小"""
+        path = str(tmp_path / "llm.sqlite")
+        cache = LLMCache(persist_path=path)
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        for i in range(50):
+            cache.put(str(i), "x" * 10000)
+        cache.compact()
+        before = os.path.getsize(path)
+        cache.disk.max_bytes = 10000
+        cache.compact()
+        assert cache.stats()["disk_entries"] == 1
+        assert os.path.getsize(path) < before // 10
+
+    def test_write_counter_is_thread_safe(self, tmp_path):
+        """测试多线程写入磁盘层时不丢失计数"""
+        disk = LLMCache(persist_path=str(tmp_path / "llm.sqlite")).disk
+        disk.compact_every = 10 ** 6
+        threads = [threading.Thread(target=lambda t=t: [disk.put(f"{t}-{i}", "v", None) for i in range(25)])
+                   for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert disk._writes == 200
+
+    @pytest.mark.asyncio
+    async def test_service_warm_after_restart(self, tmp_path, monkeypatch):
+        """测试重启后的LLMService直接复用之前的响应"""
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(json.loads(request.content))
+            return httpx.Response(200, json={"output": {"text": "思路：哈希表"}})
+
+        monkeypatch.setenv("DASHSCOPE_API_KEY", "test-key")
+        path = str(tmp_path / "llm.sqlite")
+        try:
+            for _ in range(2):
+                service = LLMService(transport=httpx.MockTransport(handler), cache=LLMCache(persist_path=path))
+                assert await service.generate("两数之和") == "思路：哈希表"
+                assert [t async for t in service.stream_generate("两数之和")] == ["思路：哈希表"]
+            assert len(calls) == 1
+            assert await service.generate("两数之和", temperature=0) == "思路：哈希表"
+            assert len(calls) == 2
+        finally:
+            await close_http_clients()
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from ..services import llm_service
+from ..services.llm_service import LLMService, close_http_clients, get_http_client
+
+
+def _service(handler, monkeypatch) -> LLMService:
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "test-key")
+    return LLMService(transport=httpx.MockTransport(handler))
+
+
+class TestLLMClient:
+    """测试LLM服务的异步连接池"""
+    @pytest.mark.asyncio
+    async def test_generate(self, monkeypatch):
+        """测试请求格式与响应解析"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            assert request.headers["Authorization"] == "Bearer test-key"
+            return httpx.Response(200, json={"output": {"text": f"  echo: {body['input']['prompt']}\n"}})
+
+        service = _service(handler, monkeypatch)
+        try:
+            assert await service.generate("你好") == "echo: 你好"
+        finally:
+            await close_http_clients()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_overlap(self, monkeypatch):
+        """测试多个会话的等待互相重叠，不阻塞事件循环"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.3)
+            return httpx.Response(200, json={"output": {"text": "ok"}})
+
+        service = _service(handler, monkeypatch)
+        try:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(service.generate(str(i)) for i in range(8)))
+            elapsed = time.perf_counter() - start
+        finally:
+            await close_http_clients()
+        assert results == ["ok"] * 8
+        assert elapsed < 1.0
+
+    @pytest.mark.asyncio
+    async def test_shared_client_and_config(self, monkeypatch):
+        """测试同一主机共享客户端，超时可配置"""
+        monkeypatch.setenv("LLM_CONNECT_TIMEOUT", "2")
+        monkeypatch.setenv("LLM_READ_TIMEOUT", "30")
+        try:
+            a = LLMService().client
+            b = LLMService().client
+            assert a is b
+            assert (a.timeout.connect, a.timeout.read) == (2, 30)
+            assert get_http_client("https://example.com/x") is not a
+        finally:
+            await close_http_clients()
+        assert not llm_service._http_clients
+
+    @pytest.mark.asyncio
+    async def test_close_keeps_other_loops(self):
+        """测试只关闭并移除当前事件循环上的客户端"""
+        other_loop = asyncio.new_event_loop()
+        other = httpx.AsyncClient()
+        llm_service._http_clients[("https", "other", None)] = (other, other_loop)
+        try:
+            get_http_client("https://example.com/x")
+            await close_http_clients()
+            assert list(llm_service._http_clients) == [("https", "other", None)]
+            assert not other.is_closed
+        finally:
+            llm_service._http_clients.pop(("https", "other", None), None)
+            await other.aclose()
+            other_loop.close()
+
+    @pytest.mark.asyncio
+    async def test_missing_api_key(self, monkeypatch):
+        """测试未设置API密钥时不发请求、不重试"""
+        monkeypatch.delenv("DASHSCOPE_API_KEY", raising=False)
+        with pytest.raises(ValueError):
+            await LLMService().generate("x")
+
+
+def _sse_handler(tokens, delay):
+    async def body():
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield f"id:1\nevent:result\ndata:{json.dumps({'output': {'text': token}})}\n\n".encode("utf-8")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["parameters"]["incremental_output"] is True
+        assert request.headers["X-DashScope-SSE"] == "enable"
+        return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream"})
+    return handler
+
+
+class TestLLMStreaming:
+    """测试流式输出"""
+    @pytest.mark.asyncio
+    async def test_tokens_arrive_incrementally(self, monkeypatch):
+        """测试首个token在生成结束前到达"""
+        service = _service(_sse_handler(["思路", "基本", "正确"], 0.2), monkeypatch)
+        try:
+            start = time.perf_counter()
+            tokens, arrivals = [], []
+            async for token in service.stream_generate("分析"):
+                tokens.append(token)
+                arrivals.append(time.perf_counter() - start)
+        finally:
+            await close_http_clients()
+        assert tokens == ["思路", "基本", "正确"]
+        assert arrivals[0] < 0.4 < arrivals[-1]
+
+    @pytest.mark.asyncio
+    async def test_malformed_chunk_skipped(self, monkeypatch):
+        """测试无法解析的数据块被跳过，不中断流、不重试"""
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            body = (f"data:{json.dumps({'output': {'text': '思路'}})}\n\n"
+                    "data:{\"output\": {\"te\n\n"
+                    f"data:{json.dumps({'output': {'text': '正确'}})}\n\n")
+            return httpx.Response(200, content=body.encode("utf-8"), headers={"Content-Type": "text/event-stream"})
+
+        service = _service(handler, monkeypatch)
+        try:
+            tokens = [t async for t in service.stream_generate("分析")]
+        finally:
+            await close_http_clients()
+        assert tokens == ["思路", "正确"]
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_thinking_streams_custom_events(self, monkeypatch):
+        """测试思路子图通过自定义流推送token"""
+        from ..graphs.subgraphs.thinking import ThinkingSubGraph
+        from ..schemas.state import CoachState
+
+        subgraph = ThinkingSubGraph()
+        subgraph.llm_service = _service(_sse_handler(["a", "b"], 0), monkeypatch)
+        compiled = subgraph.build().compile()
+        events, final = [], None
+        try:
+            async for mode, chunk in compiled.astream(CoachState(session_id="s", user_input="用哈希表").model_dump(),
+                                                      stream_mode=["custom", "values"]):
+                if mode == "custom":
+                    events.append(chunk)
+                else:
+                    final = chunk
+        finally:
+            await close_http_clients()
+        tokens = [e for e in events if e["type"] == "llm_token"]
+        assert [e["node"] for e in tokens] == ["analyze_idea"] * 2 + ["generate_guidance"] * 2
+        assert "".join(e["content"] for e in tokens[:2]) == "ab"
+        assert final["idea"].guidance == "ab"
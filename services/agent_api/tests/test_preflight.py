@@ -0,0 +1,43 @@
+import pytest
+
+from ..services.preflight import check_code
+from ..services.runner_service import RunnerService
+
+
+class TestPreflight:
+    """测试执行前的语法与入口检查"""
+    def test_python(self):
+        """测试Python代码的编译与入口检查"""
+        assert check_code("print(int(input()) * 2)", "python").ok
+        assert check_code("def main():\n    pass\n", "python").ok
+        assert check_code("class Solution:\n    pass\n", "python").ok
+
+        result = check_code("def solve(x:\n    return x\n", "python")
+        assert not result.format_ok
+        assert result.line == 1
+        assert "语法错误" in result.error
+
+        result = check_code("def helper(x):\n    return x\n", "python")
+        assert result.format_ok and not result.entrypoint_detected
+
+    def test_javascript_and_empty(self):
+        """测试JavaScript、编译型语言的入口检查与空代码"""
+        assert check_code("console.log(1)", "javascript").ok
+        assert not check_code("const x = 1;", "javascript").entrypoint_detected
+        assert not check_code("  \n", "python").format_ok
+        assert check_code("int main() { return 0; }", "c++").ok
+        assert not check_code("int solve() { return 0; }", "c").entrypoint_detected
+
+    @pytest.mark.asyncio
+    async def test_syntax_error_skips_worker(self):
+        """测试语法错误不占用执行资源"""
+        service = RunnerService()
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("不应启动worker")
+
+        service._dispatch = fail
+        result = await service.run_code("print(", "python", "")
+        assert not result["ok"]
+        assert result["status"] == "RE"
+        assert "语法错误" in result["error"]
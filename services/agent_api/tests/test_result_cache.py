@@ -0,0 +1,61 @@
+import pytest
+from ..services.result_cache import ResultCache, make_key
+from ..services.runner_service import RunnerService
+from ..services.worker_pool import get_worker_pool
+
+
+class TestResultCache:
+    """测试运行结果缓存"""
+    def test_key_covers_all_fields(self):
+        """测试语言、代码、输入、限制任一不同则键不同"""
+        base = make_key("python", "print(1)", "", {"cpu_time": 2})
+        assert base == make_key("python", "print(1)", "", {"cpu_time": 2})
+        assert base != make_key("javascript", "print(1)", "", {"cpu_time": 2})
+        assert base != make_key("python", "print(2)", "", {"cpu_time": 2})
+        assert base != make_key("python", "print(1)", "x", {"cpu_time": 2})
+        assert base != make_key("python", "print(1)", "", {"cpu_time": 3})
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", {"output": "1"})
+        cache.put("b", {"output": "2"})
+        cache.get("a")
+        cache.put("c", {"output": "3"})
+        assert cache.get("b") is None
+        assert cache.get("a") == {"output": "1"}
+        assert cache.stats()["evictions"] == 1
+
+    def test_persistence(self, tmp_path):
+        """测试持久化后新实例仍可命中"""
+        path = str(tmp_path / "results.db")
+        ResultCache(persist_path=path).put("k", {"ok": True, "output": "42\n"})
+        cache = ResultCache(persist_path=path)
+        assert cache.get("k") == {"ok": True, "output": "42\n"}
+        assert cache.stats()["hits"] == 1
+
+
+class TestRunnerServiceCache:
+    """测试RunnerService使用缓存"""
+    @pytest.mark.asyncio
+    async def test_repeat_run_is_cached(self):
+        """测试重复运行命中缓存，超时结果不缓存"""
+        service = RunnerService()
+        service.result_cache = ResultCache()
+        service.timeout = 0.5
+        try:
+            first = await service.run_code("import os\nprint(os.getpid())", "python")
+            second = await service.run_code("import os\nprint(os.getpid())", "python")
+            assert second["cached"] == True
+            assert second["output"] == first["output"]
+
+            cases = [{"input": "1", "expected": "1"}, {"input": "2", "expected": "2"}]
+            await service.run_batch("print(input())", "python", cases[:1])
+            results = await service.run_batch("print(input())", "python", cases)
+            assert [r.passed for r in results] == [True, True]
+            assert service.result_cache.stats()["hits"] == 2
+
+            await service.run_code("while True: pass", "python")
+            assert "cached" not in await service.run_code("while True: pass", "python")
+        finally:
+            await get_worker_pool().close()
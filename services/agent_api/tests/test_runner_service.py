@@ -0,0 +1,385 @@
+import tempfile
+import time
+import pytest
+from ..services import worker_pool
+from ..services.python_worker import CappedBuffer, OutputLimitExceeded
+from ..services.runner_service import RunnerService
+from ..services.scheduler import ExecutionScheduler
+from ..services.worker_pool import NodeWorkerPool, PythonWorkerPool, get_worker_pool
+
+
+class TestWorkerPool:
+    """测试Python worker池"""
+    @pytest.mark.asyncio
+    async def test_run_with_input(self):
+        """测试通过管道传入代码和输入"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            result = await pool.run("print(int(input()) * 2)", "21\n")
+            assert result["ok"] == True
+            assert result["output"] == "42\n"
+            assert result["execution_time"] is not None
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_runtime_error(self):
+        """测试运行时错误不影响worker复用"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            result = await pool.run("raise ValueError('boom')")
+            assert result["ok"] == False
+            assert "ValueError: boom" in result["error"]
+            result = await pool.run("print('still alive')")
+            assert result["output"] == "still alive\n"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_timeout_replaces_worker(self):
+        """测试超时后worker被替换"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            result = await pool.run("while True: pass", timeout=0.5)
+            assert result["ok"] == False
+            assert result["error"] == "执行超时"
+            result = await pool.run("print('ok')")
+            assert result["ok"] == True
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_recycle_after_max_jobs(self):
+        """测试执行N个任务后回收worker（非fork模式）"""
+        pool = PythonWorkerPool(size=1, max_jobs_per_worker=2, fork=False)
+        try:
+            pids = []
+            for _ in range(4):
+                result = await pool.run("import os; print(os.getpid())")
+                pids.append(result["output"])
+            assert pids[0] == pids[1]
+            assert pids[1] != pids[2]
+            assert pids[2] == pids[3]
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_sys_exit(self):
+        """测试用户代码调用sys.exit"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            result = await pool.run("import sys\nprint('a')\nsys.exit(0)")
+            assert result["ok"] == True
+            assert result["output"] == "a\n"
+            result = await pool.run("import sys\nsys.exit(3)")
+            assert result["ok"] == False
+        finally:
+            await pool.close()
+
+
+class TestForkWorker:
+    """测试zygote模式：预导入模块，每个任务在fork出的子进程中执行"""
+    @pytest.mark.asyncio
+    async def test_preloaded_and_isolated(self):
+        """测试子进程继承预导入的模块，且任务之间互不影响"""
+        pool = PythonWorkerPool(size=1, preload=["heapq", "bisect"], fork=True)
+        try:
+            result = await pool.run("import sys\nprint('heapq' in sys.modules, 'bisect' in sys.modules)")
+            assert result["output"] == "True True\n"
+            await pool.run("import math\nmath.pi = 3")
+            result = await pool.run("import math\nprint(math.pi)")
+            assert result["output"] == "3.141592653589793\n"
+            assert result["cpu_time"] is not None and result["memory_usage"] > 0
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_crash_and_timeout_keep_zygote(self):
+        """测试子进程崩溃或超时不需要替换zygote"""
+        pool = PythonWorkerPool(size=1, fork=True)
+        code = "import os\nprint(os.getppid())"
+        try:
+            zygote = (await pool.run(code))["output"]
+            result = await pool.run("import os\nos._exit(3)")
+            assert result["status"] == "RE" and "3" in result["error"]
+            result = await pool.run("import time\ntime.sleep(10)", timeout=0.5)
+            assert (result["status"], result["error"]) == ("TLE", "执行超时")
+            assert (await pool.run(code))["output"] == zygote
+        finally:
+            await pool.close()
+
+
+class TestRunnerService:
+    """测试Runner服务"""
+    @pytest.mark.asyncio
+    async def test_pooled_and_subprocess_agree(self):
+        """测试worker池与独立进程输出一致"""
+        code = "import sys\ndata = sys.stdin.read().split()\nprint(sum(map(int, data)))"
+        try:
+            pooled = await RunnerService().run_code(code, "python", "1 2 3")
+        finally:
+            await get_worker_pool().close()
+        cold = await RunnerService(use_pool=False, use_cache=False).run_code(code, "python", "1 2 3")
+        assert pooled["ok"] == cold["ok"] == True
+        assert pooled["output"] == cold["output"] == "6\n"
+
+
+class TestJavaScriptSubmission:
+    """测试JavaScript源码提交方式"""
+    CODE = "const s = require('fs').readFileSync(0, 'utf8');\nconsole.log(s.trim().split('').reverse().join(''));"
+
+    @pytest.mark.asyncio
+    async def test_memfd_does_not_touch_disk(self, monkeypatch):
+        """测试源码经memfd传给node，不创建临时文件"""
+        def no_temp_file(*args, **kwargs):
+            raise AssertionError("不应创建临时文件")
+        monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_temp_file)
+        result = await RunnerService(use_pool=False, use_cache=False).run_code(self.CODE, "javascript", "abc")
+        assert result["ok"] == True
+        assert result["output"] == "cba\n"
+
+    @pytest.mark.asyncio
+    async def test_temp_file_fallback(self, monkeypatch):
+        """测试memfd不可用时退回到临时文件"""
+        monkeypatch.setattr(RunnerService, "_memfd_source", lambda self, code: None)
+        result = await RunnerService(use_pool=False, use_cache=False).run_code(self.CODE, "javascript", "abc")
+        assert result["output"] == "cba\n"
+
+
+class TestNodeWorkerPool:
+    """测试常驻Node.js worker池"""
+    @pytest.mark.asyncio
+    async def test_stdin_styles_and_fresh_context(self):
+        """测试常见的读入方式，且每次运行的全局变量互不影响"""
+        pool = NodeWorkerPool(size=1)
+        try:
+            result = await pool.run(TestJavaScriptSubmission.CODE, "abc")
+            assert (result["status"], result["output"]) == ("OK", "cba\n")
+            code = (
+                "const rl = require('readline').createInterface({ input: process.stdin });\n"
+                "const lines = [];\n"
+                "rl.on('line', (l) => lines.push(l));\n"
+                "rl.on('close', () => console.log(lines.length, typeof leaked));\n"
+                "globalThis.leaked = 1;"
+            )
+            assert (await pool.run(code, "1\n2\n"))["output"] == "2 number\n"
+            assert (await pool.run("console.log(typeof leaked)"))["output"] == "undefined\n"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_errors(self):
+        """测试死循环判定为TLE、异常判定为RE，worker可继续使用"""
+        pool = NodeWorkerPool(size=1)
+        try:
+            result = await pool.run("while (true) {}", limits={"cpu_time": 0.5})
+            assert result["status"] == "TLE"
+            result = await pool.run("null.x")
+            assert result["status"] == "RE" and "TypeError" in result["error"]
+            result = await pool.run("process.exit(2)")
+            assert result["status"] == "RE"
+            assert (await pool.run("console.log('ok')"))["output"] == "ok\n"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_heap_overflow_restarts_worker(self):
+        """测试堆溢出判定为MLE，worker被替换"""
+        pool = NodeWorkerPool(size=1, memory_mb=64)
+        try:
+            code = "const a = []; while (true) a.push(new Array(1e5).fill(1));"
+            result = await pool.run(code, timeout=20)
+            assert result["status"] == "MLE"
+            assert (await pool.run("console.log(1 + 1)"))["output"] == "2\n"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_run_batch(self):
+        """测试批量运行，代码只编译一次"""
+        pool = NodeWorkerPool(size=1)
+        try:
+            code = "const n = Number(require('fs').readFileSync(0, 'utf8'));\nconsole.log(n * n);"
+            results = await pool.run_batch(code, [str(i) for i in range(10)])
+            assert [r["output"] for r in results] == [f"{i * i}\n" for i in range(10)]
+        finally:
+            await pool.close()
+
+
+class TestRunBatch:
+    """测试批量运行"""
+    @pytest.mark.asyncio
+    async def test_batch_single_spawn(self):
+        """测试多个用例复用同一个worker进程"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            code = "import os\nn = int(input())\nprint(n * n, os.getppid())"
+            results = await pool.run_batch(code, [f"{i}\n" for i in range(50)])
+            assert len(results) == 50
+            assert all(r["ok"] for r in results)
+            assert [int(r["output"].split()[0]) for r in results] == [i * i for i in range(50)]
+            assert len({r["output"].split()[1] for r in results}) == 1
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_isolates_failures(self):
+        """测试单个用例崩溃或超时不影响其他用例"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            code = (
+                "import os\n"
+                "s = input()\n"
+                "if s == 'crash': os._exit(1)\n"
+                "if s == 'hang':\n"
+                "    while True: pass\n"
+                "print(s)"
+            )
+            results = await pool.run_batch(code, ["a", "crash", "b", "hang", "c"], timeout=0.5)
+            assert [r["ok"] for r in results] == [True, False, True, False, True]
+            assert [r["output"] for r in results if r["ok"]] == ["a\n", "b\n", "c\n"]
+            assert results[3]["error"] == "执行超时"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_run_batch_returns_test_case_results(self):
+        """测试RunnerService.run_batch返回TestCaseResult"""
+        cases = [
+            {"input": "1 2", "expected": "3"},
+            {"input": "2 2", "expected": "5"},
+            {"input": "x", "expected": "0"},
+        ]
+        code = "a, b = map(int, input().split())\nprint(a + b)"
+        try:
+            results = await RunnerService().run_batch(code, "python", cases)
+        finally:
+            await get_worker_pool().close()
+        assert [r.passed for r in results] == [True, False, False]
+        assert results[0].execution_time is not None
+        assert results[2].error is not None and "ValueError" in results[2].error
+
+    @pytest.mark.asyncio
+    async def test_parallel_batch_keeps_order(self, monkeypatch):
+        """测试用例分片到多个worker并行执行，结果保持原顺序"""
+        pool = PythonWorkerPool(size=4)
+        monkeypatch.setattr(worker_pool, "_default_pool", pool)
+        service = RunnerService(use_cache=False)
+        service.scheduler = ExecutionScheduler(max_parallelism=4)
+        code = "import os, time\ntime.sleep(0.3)\nprint(input(), os.getppid())"
+        cases = [{"input": str(i), "expected": str(i)} for i in range(8)]
+        try:
+            await pool.start()
+            start = time.perf_counter()
+            results = await service.run_batch(code, "python", cases)
+            wall_time = time.perf_counter() - start
+        finally:
+            await pool.close()
+        assert [r.actual.split()[0] for r in results] == [str(i) for i in range(8)]
+        assert len({r.actual.split()[1] for r in results}) == 4
+        assert wall_time < sum(r.execution_time for r in results) / 2
+
+    @pytest.mark.asyncio
+    async def test_stream_batch_yields_on_completion(self, monkeypatch):
+        """测试每个用例完成后立即产出，快的用例不必等慢的用例"""
+        pool = PythonWorkerPool(size=2)
+        monkeypatch.setattr(worker_pool, "_default_pool", pool)
+        service = RunnerService(use_cache=False)
+        service.scheduler = ExecutionScheduler(max_parallelism=2)
+        code = "import time\ns = input()\nif s == 'slow': time.sleep(1)\nprint(s)"
+        cases = [{"input": "slow", "expected": "slow"}, {"input": "fast", "expected": "fast"}]
+        try:
+            start = time.perf_counter()
+            stream = service.stream_batch(code, "python", cases)
+            index, result = await stream.__anext__()
+            first_latency = time.perf_counter() - start
+            rest = [item async for item in stream]
+        finally:
+            await pool.close()
+        assert (index, result.actual) == (1, "fast\n")
+        assert first_latency < 0.8
+        assert [i for i, _ in rest] == [0]
+
+
+class TestResourceLimits:
+    """测试资源限制与测量"""
+    @pytest.mark.asyncio
+    async def test_cpu_limit_is_tle(self):
+        """测试超出CPU时间判定为TLE，且worker可继续使用"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            result = await pool.run("while True: pass", timeout=10, limits={"cpu_time": 1})
+            assert result["status"] == "TLE"
+            assert result["cpu_time"] >= 1
+            result = await pool.run("print('ok')", limits={"cpu_time": 1})
+            assert result["status"] == "OK"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_memory_limit_is_mle(self):
+        """测试超出内存限制判定为MLE"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            result = await pool.run("x = bytearray(512 * 1024 * 1024)", limits={"memory_mb": 64})
+            assert result["status"] == "MLE"
+            result = await pool.run("x = bytearray(16 * 1024 * 1024)\nprint(len(x))", limits={"memory_mb": 64})
+            assert result["status"] == "OK"
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_measures_time_and_memory(self):
+        """测试测量墙钟时间、CPU时间与峰值内存"""
+        pool = PythonWorkerPool(size=1)
+        try:
+            big = await pool.run("x = bytearray(64 * 1024 * 1024)\nx[::4096] = b'1' * len(x[::4096])")
+            small = await pool.run("print(1)")
+            assert big["memory_usage"] > small["memory_usage"] + 32
+            assert big["execution_time"] is not None and big["cpu_time"] is not None
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_runtime_error_is_re(self):
+        """测试运行错误判定为RE，输出错误判定为WA"""
+        cases = [{"input": "", "expected": "1"}]
+        service = RunnerService(use_pool=False)
+        assert (await service.run_batch("print(1/0)", "python", cases))[0].status == "RE"
+        assert (await service.run_batch("print(2)", "python", cases))[0].status == "WA"
+        assert (await service.run_batch("print(1)", "python", cases))[0].status == "OK"
+
+
+class TestOutputLimit:
+    """测试输出上限"""
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("language, code, use_pool", [
+        ("python", "while True: print('x' * 100)", True),
+        ("javascript", "while (true) console.log('x'.repeat(100));", True),
+        ("javascript", "while (true) console.log('x'.repeat(100));", False),
+    ])
+    async def test_flood_is_truncated(self, language, code, use_pool):
+        """测试输出超过上限时终止运行，只返回开头与结尾"""
+        service = RunnerService(use_pool=use_pool, use_cache=False)
+        service.output_limit = 10000
+        try:
+            result = await service.run_code(code, language)
+            ok = await service.run_code("print('small')" if language == "python" else "console.log('small')", language)
+        finally:
+            await get_worker_pool().close()
+            await worker_pool.get_node_worker_pool().close()
+        assert result["status"] == "OLE"
+        assert result["truncated"] == True
+        assert len(result["output"]) < 10200
+        assert "省略" in result["output"]
+        assert result["output"].startswith("x" * 100)
+        assert (ok["status"], ok["output"], ok["truncated"]) == ("OK", "small\n", False)
+
+    def test_capped_buffer_write_returns_length(self):
+        """测试写入返回传入的字节数，与是否截断无关"""
+        buffer = CappedBuffer(100)
+        assert buffer.write(b"hello") == 5
+        assert buffer.write(b"x" * 60) == 60
+        assert CappedBuffer().write(b"hello") == 5
+        with pytest.raises(OutputLimitExceeded):
+            buffer.write(b"y" * 60)
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from ..services.scheduler import ExecutionScheduler, QueueFullError
+
+
+class TestExecutionScheduler:
+    """测试执行准入控制"""
+    @pytest.mark.asyncio
+    async def test_limits_parallelism(self):
+        """测试并发数不超过上限"""
+        scheduler = ExecutionScheduler(max_parallelism=2, max_queue_depth=10)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.running)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(job() for _ in range(8)))
+        assert peak == 2
+        metrics = scheduler.metrics()
+        assert metrics["admitted"] == 8
+        assert metrics["queue_depth"] == 0
+        assert metrics["queue_wait_max"] > 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """测试队列满时拒绝新任务"""
+        scheduler = ExecutionScheduler(max_parallelism=1, max_queue_depth=1)
+        release = asyncio.Event()
+
+        async def job():
+            async with scheduler.slot():
+                await release.wait()
+
+        running = asyncio.create_task(job())
+        queued = asyncio.create_task(job())
+        await asyncio.sleep(0.01)
+        assert scheduler.metrics()["queue_depth"] == 1
+        with pytest.raises(QueueFullError):
+            async with scheduler.slot():
+                pass
+        release.set()
+        await asyncio.gather(running, queued)
+        assert scheduler.metrics()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_after_queue_timeout(self):
+        """测试排队超时后拒绝"""
+        scheduler = ExecutionScheduler(max_parallelism=1, max_queue_depth=10, queue_timeout=0.05)
+        async with scheduler.slot():
+            with pytest.raises(QueueFullError):
+                async with scheduler.slot():
+                    pass
+        assert scheduler.metrics()["queue_depth"] == 0
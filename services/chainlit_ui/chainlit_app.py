@@ -51,14 +51,7 @@ async def on_message(message: cl.Message):
         }
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{AGENT_API_URL}/events", json=payload)
-        if response.status_code == 200:
-            data = response.json()
-            # 处理后端响应
-            await process_response(data)
-        else:
-            await cl.Message(content=f"处理请求失败，请稍后重试。错误码：{response.status_code}").send()
+    await send_event(payload)
 
 
 @cl.action_callback("NEXT")
@@ -152,14 +145,62 @@ async def handle_action(action_type, action):
         }
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{AGENT_API_URL}/events", json=payload)
-        if response.status_code == 200:
-            data = response.json()
-            # 处理后端响应
-            await process_response(data)
-        else:
-            await cl.Message(content=f"处理请求失败，请稍后重试。错误码：{response.status_code}").send()
+    await send_event(payload)
+
+
+def format_test_case(event):
+    """格式化单个用例的结果"""
+    result = event.get("result", {})
+    status = result.get("status") or ("OK" if result.get("passed") else "WA")
+    icon = "✅" if result.get("passed") else "❌"
+    line = f"{icon} 用例 {event.get('index', 0) + 1}/{event.get('total', 0)}：{status}"
+    if result.get("execution_time") is not None:
+        line += f"（{result['execution_time'] * 1000:.0f} ms）"
+    if result.get("diff"):
+        line += f"\n    {result['diff']}"
+    return line
+
+
+async def send_event(payload):
+    """通过 /stream 发送事件，测试用例结果与LLM生成的内容边收到边显示，最后显示完整响应"""
+    progress = None
+    lines = []
+    drafts = {}  # 各节点正在生成的消息
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None)) as client:
+        async with client.stream("POST", f"{AGENT_API_URL}/stream", json=payload) as response:
+            if response.status_code != 200:
+                await cl.Message(content=f"处理请求失败，请稍后重试。错误码：{response.status_code}").send()
+                return
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                if event.get("type") == "test_case_result":
+                    # 每完成一个用例就更新同一条进度消息
+                    lines.append(format_test_case(event))
+                    content = "**测试进行中**\n\n" + "\n".join(lines)
+                    if progress is None:
+                        progress = cl.Message(content=content)
+                        await progress.send()
+                    else:
+                        progress.content = content
+                        await progress.update()
+                elif event.get("type") == "llm_token":
+                    draft = drafts.get(event.get("node"))
+                    if draft is None:
+                        title = event.get("title")
+                        draft = cl.Message(content=f"**{title}**\n\n" if title else "")
+                        await draft.send()
+                        drafts[event.get("node")] = draft
+                    await draft.stream_token(event.get("content", ""))
+                elif event.get("type") == "llm_done":
+                    draft = drafts.get(event.get("node"))
+                    if draft is not None:
+                        await draft.update()
+                elif event.get("type") == "final":
+                    await process_response(event)
+                elif event.get("type") == "error":
+                    await cl.Message(content=f"处理请求失败，请稍后重试。{event.get('detail', '')}").send()
 
 
 async def process_response(data):
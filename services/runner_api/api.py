@@ -0,0 +1,153 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List
+import json
+import sys
+import os
+import logging
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from services.agent_api.services.runner_service import RunnerService
+from services.agent_api.services.scheduler import QueueFullError
+from services.agent_api.services.worker_pool import get_node_worker_pool, get_worker_pool
+from services.runner_api.jobs import JobStore
+
+logger = logging.getLogger(__name__)
+
+runner = RunnerService()
+jobs = JobStore(max_jobs=int(os.getenv("RUNNER_API_MAX_JOBS", 10000)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时预热worker池，关闭时回收worker进程"""
+    try:
+        await get_worker_pool().start()
+    except Exception as e:
+        logger.error(f"预启动Python worker池失败: {e}")
+    yield
+    await jobs.close()
+    await get_worker_pool().close()
+    await get_node_worker_pool().close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class RunRequest(BaseModel):
+    """单次运行请求"""
+    code: str
+    language: str
+    input: str = ""
+
+
+class BatchRequest(BaseModel):
+    """批量运行请求"""
+    code: str
+    language: str
+    cases: List[Dict[str, Any]] = Field(default_factory=list)  # 每个用例包含 input / expected
+    parallel: bool = True
+
+
+def _queue_full(e: QueueFullError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+@app.post("/run")
+async def run(request: RunRequest):
+    """同步运行一次，直接返回结果"""
+    try:
+        return await runner.run_code(request.code, request.language, request.input)
+    except QueueFullError as e:
+        raise _queue_full(e)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: RunRequest):
+    """提交任务，立即返回任务ID；队列已满时直接返回503"""
+    try:
+        runner.scheduler.check_admission()
+    except QueueFullError as e:
+        raise _queue_full(e)
+    job = jobs.submit(runner, request.code, request.language, request.input)
+    return job.summary()
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """查询任务状态"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """获取任务结果，任务未完成时返回409，排队时队列已满返回503"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed" and job.queue_full:
+        raise _queue_full(QueueFullError(job.error))
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"任务尚未完成: {job.status}")
+    return {"job_id": job.id, "status": job.status, "result": job.result}
+
+
+@app.post("/batch")
+async def run_batch(request: BatchRequest, stream: bool = False):
+    """批量运行测试用例
+
+    stream=false 时返回全部结果（与用例顺序一致）；
+    stream=true 时以NDJSON逐行返回 {"index", "result"}，每个用例完成后立即发送；
+    中途出错时最后一行为 {"error", "status_code"}。
+    """
+    if not stream:
+        try:
+            results = await runner.run_batch(request.code, request.language, request.cases,
+                                             parallel=request.parallel)
+        except QueueFullError as e:
+            raise _queue_full(e)
+        return {"results": [r.model_dump() for r in results]}
+
+    async def lines():
+        try:
+            async for index, result in runner.stream_batch(request.code, request.language, request.cases,
+                                                           parallel=request.parallel):
+                yield json.dumps({"index": index, "result": result.model_dump()}, ensure_ascii=False) + "\n"
+        except QueueFullError as e:
+            yield json.dumps({"error": str(e), "status_code": 503}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # 响应头已发出，无法再改状态码，用错误行告知客户端结果不完整
+            logger.exception("流式批量运行失败")
+            yield json.dumps({"error": str(e) or type(e).__name__, "status_code": 500}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics")
+async def metrics():
+    """运行指标"""
+    return {
+        "runner": runner.scheduler.metrics(),
+        "result_cache": runner.result_cache.stats() if runner.result_cache else None,
+        "jobs": jobs.metrics()
+    }
+
+
+@app.get("/health")
+async def health():
+    """健康检查"""
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("RUNNER_API_PORT", 8002)))
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import logging
+
+from services.agent_api.services.scheduler import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """一次异步提交的运行任务"""
+    def __init__(self, code: str, language: str, input_data: str):
+        self.id = uuid.uuid4().hex
+        self.code = code
+        self.language = language
+        self.input_data = input_data
+        self.status = "queued"  # queued / running / done / failed
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.queue_full = False  # 因执行队列已满而失败，可稍后重试
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def summary(self) -> Dict[str, Any]:
+        """任务状态（不含结果）"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "language": self.language,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobStore:
+    """内存中的任务表
+
+    最多保留 max_jobs 个任务，超出时先淘汰最早完成的任务，未完成的任务不会被淘汰。
+    """
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks = set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def submit(self, runner, code: str, language: str, input_data: str) -> Job:
+        """登记任务并在后台执行"""
+        job = Job(code, language, input_data)
+        self._jobs[job.id] = job
+        self._evict()
+        task = asyncio.get_running_loop().create_task(self._run(runner, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, runner, job: Job):
+        job.status = "running"
+        try:
+            job.result = await runner.run_code(job.code, job.language, job.input_data)
+            job.status = "done"
+        except QueueFullError as e:
+            job.error = str(e)
+            job.queue_full = True
+            job.status = "failed"
+        except Exception as e:
+            logger.error(f"任务 {job.id} 执行失败: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            # 结果已产生，释放源码与输入
+            job.code = job.input_data = ""
+
+    def _evict(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                break
+
+    def metrics(self) -> Dict[str, int]:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    async def close(self):
+        """取消未完成的任务"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
@@ -0,0 +1,81 @@
+import json
+import time
+from fastapi.testclient import TestClient
+from ..api import app, runner
+from services.agent_api.services.scheduler import QueueFullError
+
+
+class TestRunnerApi:
+    """测试runner_api接口"""
+    def test_run(self):
+        """测试同步运行"""
+        with TestClient(app) as client:
+            response = client.post("/run", json={"code": "print(int(input()) + 1)", "language": "python", "input": "41"})
+            assert response.status_code == 200
+            assert response.json()["output"] == "42\n"
+
+    def test_job_lifecycle(self):
+        """测试提交任务、查询状态、获取结果"""
+        with TestClient(app) as client:
+            response = client.post("/jobs", json={"code": "print('job')", "language": "python"})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            for _ in range(100):
+                if client.get(f"/jobs/{job_id}").json()["status"] == "done":
+                    break
+                time.sleep(0.05)
+            result = client.get(f"/jobs/{job_id}/result").json()
+            assert result["result"]["output"] == "job\n"
+            assert client.get("/jobs/missing").status_code == 404
+
+    def test_batch_and_stream(self):
+        """测试批量运行与NDJSON流式返回"""
+        payload = {
+            "code": "print(input()[::-1])",
+            "language": "python",
+            "cases": [{"input": "ab", "expected": "ba"}, {"input": "cd", "expected": "cd"}]
+        }
+        with TestClient(app) as client:
+            results = client.post("/batch", json=payload).json()["results"]
+            assert [r["passed"] for r in results] == [True, False]
+            with client.stream("POST", "/batch", params={"stream": "true"}, json=payload) as response:
+                items = [json.loads(line) for line in response.iter_lines() if line]
+            assert sorted(item["index"] for item in items) == [0, 1]
+            assert client.get("/metrics").json()["jobs"] is not None
+
+    def test_queue_full_returns_503(self, monkeypatch):
+        """测试队列已满时提交任务返回503，排队中被拒绝的任务结果同样返回503"""
+        with TestClient(app) as client:
+            monkeypatch.setattr(runner.scheduler, "max_parallelism", 0)
+            monkeypatch.setattr(runner.scheduler, "max_queue_depth", 0)
+            monkeypatch.setattr(runner.scheduler, "_loop", None)
+            response = client.post("/jobs", json={"code": "print(1)", "language": "python"})
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+
+            async def rejected(*args):
+                raise QueueFullError("排队超过 30 秒，请稍后重试")
+
+            monkeypatch.setattr(runner.scheduler, "check_admission", lambda: None)
+            monkeypatch.setattr(runner, "run_code", rejected)
+            job_id = client.post("/jobs", json={"code": "print(1)", "language": "python"}).json()["job_id"]
+            for _ in range(100):
+                if client.get(f"/jobs/{job_id}").json()["status"] == "failed":
+                    break
+                time.sleep(0.05)
+            response = client.get(f"/jobs/{job_id}/result")
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+
+    def test_stream_error_line(self, monkeypatch):
+        """测试流式批量运行中途出错时最后一行为错误行"""
+        async def broken(*args, **kwargs):
+            raise RuntimeError("worker 异常退出")
+            yield
+
+        monkeypatch.setattr(runner, "stream_batch", broken)
+        payload = {"code": "print(1)", "language": "python", "cases": [{"input": "", "expected": "1"}]}
+        with TestClient(app) as client:
+            with client.stream("POST", "/batch", params={"stream": "true"}, json=payload) as response:
+                items = [json.loads(line) for line in response.iter_lines() if line]
+        assert items == [{"error": "worker 异常退出", "status_code": 500}]
@@ -0,0 +1,48 @@
+import json
+import httpx
+import pytest
+from services.agent_api.services.runner_client import RunnerClient
+from services.agent_api.services.worker_pool import get_worker_pool
+from ..api import app
+
+
+class TestRunnerClient:
+    """测试agent_api通过RunnerClient调用runner_api"""
+    @pytest.mark.asyncio
+    async def test_client_matches_runner_service_interface(self):
+        """测试run_code / run_batch / stream_batch"""
+        client = RunnerClient("http://runner", transport=httpx.ASGITransport(app=app))
+        cases = [{"input": "1 2", "expected": "3"}, {"input": "2 2", "expected": "5"}]
+        code = "a, b = map(int, input().split())\nprint(a + b)"
+        try:
+            result = await client.run_code("print('remote')", "python")
+            assert result["output"] == "remote\n"
+            results = await client.run_batch(code, "python", cases)
+            assert [r.passed for r in results] == [True, False]
+            streamed = {index: r async for index, r in client.stream_batch(code, "python", cases)}
+            assert [streamed[i].status for i in range(2)] == ["OK", "WA"]
+        finally:
+            await client.close()
+            await get_worker_pool().close()
+
+    @pytest.mark.asyncio
+    async def test_stream_batch_incomplete_raises(self):
+        """测试流中出现错误行或结果少于用例数时抛出异常"""
+        result = {"input": "1 2", "expected": "3", "actual": "3", "passed": True, "status": "OK"}
+        bodies = [
+            json.dumps({"index": 0, "result": result}) + "\n",
+            json.dumps({"index": 0, "result": result}) + "\n" + json.dumps({"error": "boom", "status_code": 500}) + "\n",
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=bodies.pop(0).encode("utf-8"))
+
+        client = RunnerClient("http://runner", transport=httpx.MockTransport(handler))
+        cases = [{"input": "1 2", "expected": "3"}, {"input": "2 2", "expected": "4"}]
+        try:
+            for message in ["1/2", "boom"]:
+                with pytest.raises(RuntimeError, match=message):
+                    async for _ in client.stream_batch("print(3)", "python", cases):
+                        pass
+        finally:
+            await client.close()
@@ -0,0 +1,124 @@
+# test_llm_cache.py
+"""
+测试LLM响应缓存与共享的聊天模型客户端
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from coach.llm_cache import LLMCache, make_llm_key
+
+
+class TestLLMCache(unittest.TestCase):
+    """
+    测试进程内共享的LLM响应缓存
+    """
+
+    def test_lru_bytes_and_ttl(self):
+        """
+        条数、字节数上限按LRU淘汰，过期条目不再命中
+        """
+        cache = LLMCache(max_entries=2, max_bytes=10, ttl=None)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        cache.put("d", "x" * 10)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats()["evictions"], 3)
+
+        cache = LLMCache(ttl=0.05)
+        cache.put("k", "v")
+        self.assertEqual(cache.get("k"), "v")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_key_includes_model_and_params(self):
+        """
+        模型或采样参数不同的请求不共用缓存
+        """
+        messages = [{"role": "user", "content": "两数之和"}]
+        key = make_llm_key("qwen3-max", "u", {"temperature": 0}, messages)
+        self.assertNotEqual(key, make_llm_key("qwen-turbo", "u", {"temperature": 0}, messages))
+        self.assertNotEqual(key, make_llm_key("qwen3-max", "u", {"temperature": 1}, messages))
+
+    def test_shared_across_instances(self):
+        """
+        新建的 LLMService 也能命中之前的响应
+        """
+        try:
+            from coach.services.llm_service import LLMService
+        except ImportError:
+            self.skipTest("未安装 langchain_openai")
+        calls = []
+
+        class FakeLLM:
+            def invoke(self, messages):
+                calls.append(messages)
+                return type("Response", (), {"content": "{}"})()
+
+        cache = LLMCache()
+        for _ in range(2):
+            service = LLMService(cache=cache)
+            service.get_llm = FakeLLM
+            self.assertEqual(service.invoke_with_retry("system", "题目"), "{}")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_disk_tier_survives_restart(self):
+        """
+        新进程（新的缓存实例）从磁盘层命中，整理时按上限淘汰最久未访问的条目
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm.sqlite")
+            LLMCache(persist_path=path).put("两数之和", "{}")
+            cache = LLMCache(persist_path=path)
+            self.assertEqual(cache.get("两数之和"), "{}")
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            self.assertEqual(cache.get("两数之和"), "{}")
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+
+            cache = LLMCache(persist_path=path, max_disk_bytes=4)
+            cache.put("a", "12")
+            cache.put("b", "34")
+            cache.get("两数之和")
+            cache.disk.compact()
+            self.assertEqual(cache.disk.stats()["bytes"], 4)
+            self.assertIsNone(LLMCache(persist_path=path).get("a"))
+
+
+class TestLLMClients(unittest.TestCase):
+    """
+    测试共享的聊天模型客户端
+    """
+
+    @mock.patch.dict(os.environ, {"DASHSCOPE_API_KEY": "test-key"})
+    def test_one_client_per_model_and_base_url(self):
+        """
+        相同 (model, base_url) 复用同一客户端，同一 base_url 共用连接池
+        """
+        try:
+            from coach.llm_clients import close_chat_models, get_chat_model
+            from coach.services.llm_service import LLMService
+        except ImportError:
+            self.skipTest("未安装 langchain_openai")
+        try:
+            llm = get_chat_model("qwen3-max")
+            self.assertIs(get_chat_model("qwen3-max"), llm)
+            self.assertIs(LLMService().get_llm(), llm)
+            other = get_chat_model("qwen-plus")
+            self.assertIsNot(other, llm)
+            self.assertIs(other.http_client, llm.http_client)
+            self.assertIsNot(get_chat_model("qwen3-max", temperature=0), llm)
+        finally:
+            close_chat_models()
+
+
+if __name__ == "__main__":
+    unittest.main()
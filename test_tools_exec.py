@@ -0,0 +1,476 @@
+# test_tools_exec.py
+"""
+测试代码执行工具
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from coach.compare import compare_outputs
+from coach.result_cache import ResultCache, get_result_cache, is_cacheable, make_key
+from coach.sandbox import SandboxExecutor
+from coach.stress import StressTester
+from coach.testgen import MaxInputCache, edge_inputs, format_ints, max_inputs, parse_bounds, random_inputs
+from coach.tools_exec import (_limits_key, compile_solution, generate_edge_cases, preflight, run_max_tests,
+                              run_solution, run_tests)
+
+
+class TestRunTests(unittest.TestCase):
+    """
+    测试编译一次、多用例运行
+    """
+
+    def test_top_level_state_isolated(self):
+        """
+        代码只编译一次，顶层的可变对象不会在用例之间残留
+        """
+        code = (
+            "SEEN = []\n"
+            "MEMO = {}\n"
+            "def solve(inp):\n"
+            "    SEEN.append(inp)\n"
+            "    MEMO[inp] = MEMO.get(inp, 0) + 1\n"
+            "    return str(len(SEEN) + MEMO[inp])\n"
+        )
+        testcases = [{"input": "x", "expected": "2"} for _ in range(5)]
+        self.assertTrue(run_tests(code, testcases, sandbox=False)["passed"])
+        self.assertTrue(run_tests(code, testcases, use_cache=False)["passed"])
+        self.assertIs(compile_solution(code), compile_solution(code))
+
+    def test_global_rebinding_isolated(self):
+        """
+        用例中对全局变量的重新赋值不影响其他用例
+        """
+        code = (
+            "counter = 0\n"
+            "def solve(inp):\n"
+            "    global counter\n"
+            "    counter += 1\n"
+            "    return str(counter)\n"
+        )
+        testcases = [{"input": "", "expected": "1"} for _ in range(3)]
+        self.assertTrue(run_tests(code, testcases, sandbox=False)["passed"])
+        self.assertTrue(run_tests(code, testcases)["passed"])
+
+    def test_compile_cached(self):
+        """
+        相同源码复用同一个code对象
+        """
+        code = "def solve(inp):\n    return inp\n"
+        self.assertIs(compile_solution(code), compile_solution(code))
+
+    def test_errors(self):
+        """
+        缺少solve、语法错误、运行时错误
+        """
+        self.assertFalse(run_solution("x = 1", "")["ok"])
+        result = run_tests("def solve(inp:\n", [{"input": "1", "expected": "1"}])
+        self.assertIn("SyntaxError", result["failing"][0]["error"])
+        result = run_tests("def solve(inp):\n    return 1 / 0\n", [{"input": "1", "expected": "1"}])
+        self.assertIn("ZeroDivisionError", result["failing"][0]["error"])
+
+
+class TestPreflight(unittest.TestCase):
+    """
+    测试执行前的编译与入口检查
+    """
+
+    def test_preflight(self):
+        """
+        语法错误与缺少solve在编译阶段即报告
+        """
+        self.assertIsNone(preflight("def solve(inp):\n    return inp\n"))
+        self.assertIsNone(preflight("from operator import neg as solve\n"))
+        self.assertIn("SyntaxError", preflight("def solve(inp:\n"))
+        self.assertIn("solve", preflight("def main(inp):\n    return inp\n"))
+
+    def test_run_tests_skips_execution(self):
+        """
+        检查不通过时所有用例直接失败，不运行代码
+        """
+        testcases = [{"input": str(i), "expected": str(i)} for i in range(3)]
+        result = run_tests("def main(inp):\n    return inp\n", testcases)
+        self.assertFalse(result["passed"])
+        self.assertEqual(len(result["failing"]), 3)
+        self.assertEqual(result["total_time"], 0)
+        result = run_max_tests("def solve(inp:\n", testcases, "1 <= n <= 100000")
+        self.assertEqual(result["checked"], 0)
+        self.assertIn("SyntaxError", result["failing"][0]["error"])
+
+class TestCompare(unittest.TestCase):
+    """
+    测试逐token比较输出
+    """
+
+    def test_whitespace_insensitive(self):
+        """
+        空白与换行差异不影响结果
+        """
+        self.assertTrue(compare_outputs("1 2\n3\n", "1  2 3").ok)
+        self.assertTrue(compare_outputs("", "\n  \n").ok)
+
+    def test_first_difference_position(self):
+        """
+        给出实际输出中第一处差异的行列
+        """
+        result = compare_outputs("1 2\n3 4\n", "1 2\n3 5\n")
+        self.assertEqual((result.line, result.column), (2, 3))
+        self.assertEqual(result.message, "第2行第3列：期望 4，实际 5")
+        self.assertIn("输出提前结束", compare_outputs("1 2", "1").message)
+        self.assertIn("多余的输出", compare_outputs("1", "1\n2").message)
+
+    def test_float_tolerance(self):
+        """
+        设置容差时数值token按误差比较
+        """
+        self.assertFalse(compare_outputs("0.333333", "0.3333333").ok)
+        self.assertTrue(compare_outputs("0.333333", "0.3333333", abs_eps=1e-6).ok)
+        self.assertTrue(compare_outputs("1000000", "1000001", rel_eps=1e-5).ok)
+        self.assertFalse(compare_outputs("abc", "abd", abs_eps=1).ok)
+
+    def test_large_output(self):
+        """
+        大输出跨越多个分块时定位仍然准确
+        """
+        expected = "\n".join(str(i) for i in range(200000))
+        actual = expected.replace("199998", "x")
+        self.assertTrue(compare_outputs(expected, expected.replace("\n", " ")).ok)
+        result = compare_outputs(expected, actual)
+        self.assertEqual((result.line, result.column, result.actual_token), (199999, 1, "x"))
+
+    def test_run_tests_reports_diff(self):
+        """
+        run_tests 的失败用例带有差异位置
+        """
+        code = "def solve(inp):\n    return '1 2\\n3 5'\n"
+        result = run_tests(code, [{"input": "", "expected": "1 2\n3 4\n"}], sandbox=False, use_cache=False)
+        self.assertEqual(result["failing"][0]["diff"], "第2行第3列：期望 4，实际 5")
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    测试运行结果缓存
+    """
+
+    def test_repeat_run_hits_cache(self):
+        """
+        相同代码与输入的再次运行不再执行用户代码
+        """
+        code = (
+            "import builtins\n"
+            "builtins._cache_runs = getattr(builtins, '_cache_runs', 0) + 1\n"
+            "def solve(inp):\n"
+            "    return inp[::-1]\n"
+        )
+        import builtins
+        builtins._cache_runs = 0
+        testcases = [{"input": "abc", "expected": "cba"}]
+        self.assertTrue(run_tests(code, testcases, sandbox=False)["passed"])
+        self.assertTrue(run_tests(code, testcases, sandbox=False)["passed"])
+        self.assertEqual(builtins._cache_runs, 1)
+        run_tests(code, testcases, sandbox=False, use_cache=False)
+        self.assertEqual(builtins._cache_runs, 2)
+        del builtins._cache_runs
+
+    def test_lru_and_persistence(self):
+        """
+        超出容量时淘汰最久未使用的条目，持久化的结果在新实例中仍可命中
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.db")
+            cache = ResultCache(max_entries=2, persist_path=path)
+            keys = [make_key("python", "code", str(i)) for i in range(3)]
+            for i, key in enumerate(keys):
+                cache.put(key, {"ok": True, "output": str(i)})
+            self.assertEqual(cache.evictions, 1)
+            self.assertEqual(cache.get(keys[0]), {"ok": True, "output": "0"})  # 从磁盘读回
+
+            reloaded = ResultCache(persist_path=path)
+            self.assertEqual(reloaded.get(keys[2])["output"], "2")
+            self.assertIsNone(reloaded.get(make_key("python", "code", "missing")))
+            self.assertEqual(reloaded.stats()["hits"], 1)
+            self.assertEqual(reloaded.stats()["misses"], 1)
+
+    def test_worker_crash_not_cached(self):
+        """
+        worker崩溃的结果不缓存，再次运行时重新执行
+        """
+        code = "import os\ndef solve(inp):\n    os._exit(1)\n"
+        testcases = [{"input": "crash", "expected": ""}]
+        cache = get_result_cache()
+        key = make_key("python", code, "crash", _limits_key(True))
+        result = run_tests(code, testcases, parallel=False)
+        self.assertIn("异常退出", result["failing"][0]["error"])
+        self.assertIsNone(cache.get(key))
+        self.assertTrue(is_cacheable({"ok": False, "error": "ZeroDivisionError"}))
+        self.assertFalse(is_cacheable({"ok": False, "error": "无法返回运行结果", "internal": True}))
+
+
+class TestSandbox(unittest.TestCase):
+    """
+    测试隔离执行
+    """
+
+    def setUp(self):
+        self.sandbox = SandboxExecutor(timeout=3, cpu_time=1)
+
+    def tearDown(self):
+        self.sandbox.close()
+
+    def test_cpu_timeout(self):
+        """
+        死循环在CPU时间限制内被中断
+        """
+        code = "def solve(inp):\n    while True:\n        pass\n"
+        result = self.sandbox.run(code, "")
+        self.assertFalse(result["ok"])
+        self.assertTrue(result["timeout"])
+        self.assertEqual(self.sandbox.run("def solve(inp):\n    return inp\n", "x")["output"], "x")
+
+    def test_wall_timeout_replaces_worker(self):
+        """
+        阻塞（不消耗CPU）超过墙钟限制时，worker被替换
+        """
+        code = "import time\ndef solve(inp):\n    time.sleep(60)\n"
+        result = self.sandbox.run(code, "")
+        self.assertTrue(result["timeout"])
+        self.assertEqual(self.sandbox.run("def solve(inp):\n    return inp\n", "y")["output"], "y")
+
+    def test_crash(self):
+        """
+        用户代码让进程退出
+        """
+        result = self.sandbox.run("import os\ndef solve(inp):\n    os._exit(1)\n", "")
+        self.assertFalse(result["ok"])
+        self.assertTrue(self.sandbox.run("def solve(inp):\n    return '1'\n", "")["ok"])
+
+
+class TestParallelSandbox(unittest.TestCase):
+    """
+    测试多worker并行运行用例
+    """
+
+    def setUp(self):
+        self.sandbox = SandboxExecutor(timeout=3, cpu_time=1, workers=4)
+
+    def tearDown(self):
+        self.sandbox.close()
+
+    def test_run_many_keeps_order(self):
+        """
+        用例分散到多个worker并行运行，结果保持输入顺序
+        """
+        code = "import os, time\ndef solve(inp):\n    time.sleep(0.3)\n    return inp + ' ' + str(os.getpid())\n"
+        start = time.perf_counter()
+        results = self.sandbox.run_many(code, [str(i) for i in range(8)])
+        wall_time = time.perf_counter() - start
+        self.assertEqual([r["output"].split()[0] for r in results], [str(i) for i in range(8)])
+        self.assertEqual(len({r["output"].split()[1] for r in results}), 4)
+        self.assertLess(wall_time, sum(r["time"] for r in results) / 2)
+
+
+class TestStress(unittest.TestCase):
+    """
+    测试与参考解对拍找反例
+    """
+
+    REFERENCE = "def solve(inp):\n    n, *a = map(int, inp.split())\n    return str(max(a))\n"
+    TESTCASES = [{"input": "3\n1 5 2\n", "expected": "5\n"}]
+
+    def setUp(self):
+        self.tester = StressTester(workers=2, cpu_time=1)
+
+    def tearDown(self):
+        self.tester.close()
+
+    def test_generated_inputs_follow_sample_shape(self):
+        """
+        随机输入与边界输入保持“个数 + 列表”的形状
+        """
+        for inp in random_inputs(self.TESTCASES, 50, seed=1) + edge_inputs(self.TESTCASES):
+            count, values = inp.splitlines()
+            self.assertEqual(int(count), len(values.split()))
+        self.assertIn("3\n5 2 1\n", edge_inputs(self.TESTCASES))
+
+    def test_finds_counterexample(self):
+        """
+        找到第一个不一致的输入即停止
+        """
+        wrong = "def solve(inp):\n    n, *a = map(int, inp.split())\n    return str(a[-1])\n"
+        result = self.tester.find_counterexample(wrong, self.REFERENCE, self.TESTCASES, seed=1)
+        self.assertTrue(result["found"])
+        values = list(map(int, result["input"].split()[1:]))
+        self.assertEqual(result["expected"], str(max(values)))
+        self.assertEqual(result["got"], str(values[-1]))
+
+    def test_correct_solution_throughput(self):
+        """
+        正确解对拍数千组输入找不到反例，且能在交互时间内完成
+        """
+        code = "def solve(inp):\n    return str(sorted(map(int, inp.split()[1:]))[-1])\n"
+        self.tester.find_counterexample(code, self.REFERENCE, self.TESTCASES, trials=10, seed=1)
+        result = self.tester.find_counterexample(code, self.REFERENCE, self.TESTCASES, trials=3000, seed=2)
+        self.assertFalse(result["found"])
+        self.assertGreaterEqual(result["checked"], 3000)
+        self.assertLess(result["time"], 3)
+
+    def test_timeout_is_reported(self):
+        """
+        学生代码死循环时作为超时反例返回
+        """
+        result = self.tester.find_counterexample("def solve(inp):\n    while True: pass\n",
+                                                 self.REFERENCE, self.TESTCASES, seed=1)
+        self.assertTrue(result["found"])
+        self.assertTrue(result["timeout"])
+
+    def test_edge_cases_need_reference(self):
+        """
+        边界用例的期望输出由参考解给出，没有参考解时不生成
+        """
+        self.assertEqual(generate_edge_cases(self.TESTCASES), [])
+        cases = generate_edge_cases(self.TESTCASES, self.REFERENCE)
+        self.assertIn({"input": "1\n1\n", "expected": "1"}, cases)
+
+    def test_reference_only_from_trusted_source(self):
+        """
+        只有题目自带（或验证过）的参考解才提供对拍，学生自己提交的代码不算参考解；
+        没有参考解时，有样例才显示对拍按钮（首次请求时再生成参考解）
+        """
+        from coach.services.state_service import StateService
+        state_service = StateService()
+        state = state_service.init_state()
+        state.user_attempt.code = self.REFERENCE
+        state.artifacts.final_solution = self.REFERENCE
+        self.assertEqual(state_service.reference_code(state), "")
+        self.assertFalse(state_service.can_stress(state))
+        state.problem.testcases = self.TESTCASES
+        self.assertTrue(state_service.can_stress(state))
+        state.problem.reference_solution = self.REFERENCE
+        self.assertEqual(state_service.reference_code(state), self.REFERENCE.strip())
+        try:
+            import app
+        except ImportError:
+            return
+        state.phase = "coding"
+        self.assertIn("counterexample", [action.name for action in app.stage_actions(state)])
+
+    def test_generated_reference_must_pass_samples(self):
+        """
+        LLM生成的暴力解通过全部样例才采用；题目提取不再生成参考解，换题时清空上一题的参考解
+        """
+        import coach.services  # noqa: F401  先加载服务，避免子图模块的循环导入
+        from coach.graphs.subgraphs.problem_extraction import ProblemExtractionSubGraph
+        from coach.services.problem_service import ProblemService
+        from coach.services.state_service import StateService
+        state = StateService().init_state()
+        problem_service = ProblemService()
+        self.assertEqual(problem_service.generate_reference(state.problem), "")
+        state.problem.testcases = self.TESTCASES
+        for code, expected in ((self.REFERENCE, self.REFERENCE.strip()),
+                               ("def solve(inp):\n    return '0'\n", "")):
+            problem_service.llm_service.invoke_with_retry = lambda system, user: f"```python\n{code}```"
+            self.assertEqual(problem_service.generate_reference(state.problem), expected)
+
+        state.problem.reference_solution = self.REFERENCE
+        subgraph = ProblemExtractionSubGraph()
+        subgraph.llm_service.invoke_with_retry = lambda system, user: "{}"
+        extracted = subgraph.extract_fields(state)
+        self.assertEqual(extracted["problem"]["reference_solution"], "")
+        self.assertFalse(hasattr(subgraph, "generate_reference"))
+
+
+class TestMaxInputs(unittest.TestCase):
+    """
+    测试按约束生成最大规模输入
+    """
+
+    TESTCASES = [{"input": "4\n2 7 11 15\n9\n", "expected": "0 1\n"}]
+    CONSTRAINTS = "2 <= nums.length <= 10^5\n-10^9 <= nums[i], target <= 10^9"
+
+    def test_parse_bounds(self):
+        """
+        解析常见的约束写法
+        """
+        bounds = parse_bounds("1 ≤ n ≤ 2×10^5，-10^9 <= nums[i], target <= 10^9；k <= 1e5; m < 10⁴")
+        self.assertEqual(bounds["n"], (1, 200000))
+        self.assertEqual(bounds["nums[i]"], (-10 ** 9, 10 ** 9))
+        self.assertEqual(bounds["target"], (-10 ** 9, 10 ** 9))
+        self.assertEqual(bounds["k"], (1, 100000))
+        self.assertEqual(bounds["m"], (1, 10000))
+
+    def test_format_ints(self):
+        """
+        向量化格式化与 str() 结果一致
+        """
+        values = [0, 5, -3, 10, 99, 100, -10 ** 9, 10 ** 18 - 1, 10 ** 17]
+        self.assertEqual(format_ints(values), " ".join(map(str, values)))
+
+    def test_max_inputs(self):
+        """
+        生成上界规模的各类数组，元素在取值范围内，其余行保持样例
+        """
+        cases = max_inputs(self.TESTCASES, self.CONSTRAINTS)
+        self.assertEqual([c["name"] for c in cases],
+                         ["random", "sorted", "reversed", "equal", "alternating", "max"])
+        for case in cases:
+            count, values, target = case["input"].splitlines()
+            values = list(map(int, values.split()))
+            self.assertEqual(int(count), 10 ** 5)
+            self.assertEqual(len(values), 10 ** 5)
+            self.assertTrue(all(-10 ** 9 <= v <= 10 ** 9 for v in values))
+            self.assertEqual(target, "9")
+        sorted_values = list(map(int, cases[1]["input"].splitlines()[1].split()))
+        self.assertEqual(sorted_values, sorted(sorted_values))
+        self.assertEqual(max_inputs([{"input": "5\n"}], "1 <= n <= 45"), [{"name": "max", "input": "45\n"}])
+        self.assertEqual(max_inputs(self.TESTCASES, "没有约束"), [])
+        # 只有元素取值范围时不能推出数组长度
+        self.assertEqual(max_inputs(self.TESTCASES, "-10^9 <= nums[i] <= 10^9"), [])
+
+    def test_max_word_lists(self):
+        """
+        字符串列表按单词生成，升序/降序与随机不同
+        """
+        cases = max_inputs([{"input": "3\nabc bca cab\n"}], "1 <= n <= 1000")
+        self.assertEqual([c["name"] for c in cases], ["random", "sorted", "reversed", "equal"])
+        words = {c["name"]: c["input"].splitlines()[1].split() for c in cases}
+        for name, values in words.items():
+            self.assertEqual(len(values), 1000)
+            self.assertTrue(all(len(w) == 3 and set(w) <= set("abc") for w in values))
+        self.assertEqual(words["sorted"], sorted(words["random"]))
+        self.assertEqual(words["reversed"], sorted(words["random"], reverse=True))
+        self.assertNotEqual(words["sorted"], words["random"])
+        self.assertEqual(len(set(words["equal"])), 1)
+
+    def test_cache_by_fingerprint(self):
+        """
+        同一题目只生成一次
+        """
+        cache = MaxInputCache()
+        first = cache.get(self.TESTCASES, self.CONSTRAINTS)
+        self.assertIs(cache.get(self.TESTCASES, self.CONSTRAINTS), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_quadratic_solution_times_out(self):
+        """
+        样例能通过的平方复杂度解法在最大规模输入上超时
+        """
+        code = (
+            "def solve(inp):\n"
+            "    n, *rest = map(int, inp.split())\n"
+            "    nums, target = rest[:n], rest[n]\n"
+            "    for i in range(n):\n"
+            "        for j in range(i + 1, n):\n"
+            "            if nums[i] + nums[j] == target:\n"
+            "                return f'{i} {j}'\n"
+            "    return '-1'\n"
+        )
+        self.assertTrue(run_tests(code, self.TESTCASES)["passed"])
+        result = run_max_tests(code, self.TESTCASES, self.CONSTRAINTS)
+        self.assertFalse(result["passed"])
+        self.assertTrue(result["failing"][0]["timeout"])
+
+
+if __name__ == "__main__":
+    unittest.main()